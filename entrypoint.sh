@@ -10,5 +10,15 @@ done
 # Run migrations
 python3 manage.py migrate
 
-# Start Gunicorn
+# Start every deployment with fresh per-worker metrics files
+if [ -n "${METRICS_MULTIPROC_DIR:-}" ]; then
+  mkdir -p "$METRICS_MULTIPROC_DIR"
+  rm -f "$METRICS_MULTIPROC_DIR"/metrics_*.json
+fi
+
+# Start Gunicorn. ASGI=True serves the async views natively through uvicorn
+# workers; WEB_CONCURRENCY sets the number of worker processes either way.
+if [ "${ASGI:-False}" = "True" ]; then
+  exec gunicorn phone_book.phone_book.asgi:application -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:8000
+fi
 exec gunicorn phone_book.phone_book.wsgi:application --bind 0.0.0.0:8000
@@ -0,0 +1,187 @@
+import contextvars
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Template
+
+from phone_book.apps.common.metrics import request_db_seconds, request_duration, request_queries
+
+logger = logging.getLogger('phone_book.requests')
+
+# Statements kept per request for the slow-request log
+MAX_RECORDED_QUERIES = 100
+# Anything else is labelled 'other' so clients cannot grow the metric series
+KNOWN_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """Counters for one request; shared with the threads it runs queries on."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.statements = []
+
+    def as_fields(self):
+        return {
+            'total_ms': round(self.total * 1000, 2),
+            'db_ms': round(self.db_time * 1000, 2),
+            'queries': self.queries,
+            'template_ms': round(self.template_time * 1000, 2),
+        }
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper, installed on every connection."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        stats.queries += 1
+        stats.db_time += duration
+        if len(stats.statements) < MAX_RECORDED_QUERIES:
+            # Parameters hold contact data and password hashes; keep them out of the logs.
+            stats.statements.append((duration, sql))
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+_template_render = Template.render
+
+
+def install_template_timing():
+    """
+    Time template rendering for requests. Called once from
+    ``CommonConfig.ready()`` when ``REQUEST_TEMPLATE_TIMING`` is on.
+    """
+    Template.render = _timed_template_render
+
+
+def _timed_template_render(self, context):
+    stats = _current.get()
+    if stats is None:
+        return _template_render(self, context)
+    # Included templates render inside their parent; only time the outermost.
+    stats.template_depth += 1
+    started = time.perf_counter()
+    try:
+        return _template_render(self, context)
+    finally:
+        stats.template_depth -= 1
+        if not stats.template_depth:
+            stats.template_time += time.perf_counter() - started
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Measure query count, database time, template render time and total time
+    of every request.
+
+    The figures are sent in a ``Server-Timing`` header (when
+    ``SERVER_TIMING_HEADER`` is on) and logged as structured fields on the
+    ``phone_book.requests`` logger. Requests slower than
+    ``SLOW_REQUEST_THRESHOLD_MS`` are logged as warnings with their SQL,
+    without the query parameters.
+    Durations and query totals also feed the per-view metrics served by
+    ``MetricsView``.
+
+    Queries are counted on any thread the request runs them on, including the
+    ``sync_to_async`` threads used by async views. Place it first in
+    ``MIDDLEWARE`` so the total covers the whole stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        connection_created.connect(install_query_recorder, dispatch_uid='request_instrumentation')
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats, token = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats)
+
+    def start(self):
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+        stats = RequestStats()
+        return stats, _current.set(stats)
+
+    def finish(self, request, response, stats):
+        stats.total = time.perf_counter() - stats.started
+        if getattr(settings, 'SERVER_TIMING_HEADER', True):
+            response['Server-Timing'] = self.server_timing(stats)
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unmatched'
+        method = request.method if request.method in KNOWN_METHODS else 'other'
+        request_duration.observe(stats.total, view, method, response.status_code)
+        request_queries.inc(view, amount=stats.queries)
+        request_db_seconds.inc(view, amount=stats.db_time)
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            **stats.as_fields(),
+        }
+        message = ' '.join(f"{key}={value}" for key, value in fields.items())
+        threshold = getattr(settings, 'SLOW_REQUEST_THRESHOLD_MS', 500)
+        if threshold and stats.total * 1000 >= threshold:
+            logger.warning(
+                "Slow request %s\n%s", message, self.format_statements(stats),
+                extra={'request_stats': fields, 'sql': [sql for _, sql in stats.statements]},
+            )
+        else:
+            logger.info("Request %s", message, extra={'request_stats': fields})
+        return response
+
+    @staticmethod
+    def server_timing(stats):
+        fields = stats.as_fields()
+        return (
+            f'db;dur={fields["db_ms"]};desc="{stats.queries} queries", '
+            f'tpl;dur={fields["template_ms"]};desc="Templates", '
+            f'total;dur={fields["total_ms"]}'
+        )
+
+    @staticmethod
+    def format_statements(stats):
+        lines = [
+            f"  {duration * 1000:8.2f} ms  {sql}"[:2000]
+            for duration, sql in stats.statements
+        ]
+        if stats.queries > len(stats.statements):
+            lines.append(f"  ... {stats.queries - len(stats.statements)} more")
+        return '\n'.join(lines) or '  (no queries)'
@@ -1,148 +1,133 @@
 import json
+import re
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
 from django.http import JsonResponse
-from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework.response import Response
 
+from phone_book.apps.common.responses import EnvelopedJsonResponse, is_enveloped
+
 
 class APIResponseMiddleware:
+    """
+    Wrap API responses in the standard envelope.
+
+    Views that return ``EnvelopedJsonResponse`` and DRF views rendered by
+    ``EnvelopeJSONRenderer`` are enveloped before their first serialization
+    and pass straight through. The remaining branches only handle responses
+    built elsewhere (plain ``JsonResponse``, error pages, third-party views).
+
+    Works in both sync and async request paths, so async views under ASGI
+    are not pushed onto a thread.
+    """
+    sync_capable = True
+    async_capable = True
+    # Endpoints that return raw responses
+    skip_prefixes = (
+        '/static/',  # Static files
+        '/admin/',   # Django admin
+        '/api/schema/',  # API schema
+    )
+    skip_exact = (
+        '/',  # Root ReDoc documentation
+    )
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.is_skipped_path = self.compile_skip_paths()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def compile_skip_paths(self):
+        """
+        Build one anchored regex for every skipped path, honouring BASE_PREFIX,
+        so dispatch costs a single match per request.
+        """
+        alternatives = [re.escape(path) for path in self.skip_prefixes]
+        alternatives += [re.escape(path) + r'\Z' for path in self.skip_exact]
+        base_prefix = getattr(settings, 'BASE_PREFIX', '').strip('/')
+        root = f"(?:/{re.escape(base_prefix)})?" if base_prefix else ''
+        return re.compile(f"{root}(?:{'|'.join(alternatives)})").match
 
     def __call__(self, request):
-        response = self.get_response(request)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        # Already wrapped before serialization
+        if getattr(response, 'enveloped', False):
+            return response
+
+        # Never buffer or re-wrap streamed bodies (exports, file downloads)
+        if response.streaming:
+            return response
 
         # Skip processing for redirect responses (300–399)
         if 300 <= response.status_code < 400:
             return response
-        
-        # Skip processing for certain endpoints that should return raw responses
-        skip_paths = [
-            '/static/',  # Static files
-            '/admin/',   # Django admin
-            '/api/schema/',  # API schema
-            '/',  # Root ReDoc documentation
-        ]
-        
+
         # Skip processing for documentation endpoints and static content
-        if any(request.path.startswith(path) for path in skip_paths):
+        if self.is_skipped_path(request.path):
             return response
-        
+
         # Skip processing for HTML responses (likely documentation)
         content_type = response.get('Content-Type', '')
         if content_type.startswith('text/html') or content_type.startswith('application/json') and 'redoc' in request.path.lower():
             return response
 
-        # Handle DRF Response objects
+        # DRF responses rendered by another renderer: wrap the unrendered data
         if isinstance(response, Response):
-            # DRF responses already have proper structure, just standardize format
-            try:
-                data = response.data
-                
-                # If it's already in our standard format, return as is
-                if isinstance(data, dict) and "response_status" in data:
-                    return response
-                
-                # Standardize DRF response
-                standardized_data = {
-                    "response_status": "success" if response.status_code < 400 else "error",
-                    "response_description": self._get_response_description(response, data),
-                    "response_data": data
-                }
-                
-                # Create new JsonResponse with standardized format
-                return JsonResponse(standardized_data, status=response.status_code)
-                
-            except Exception:
-                # If we can't process the DRF response, return it as is
+            data = response.data
+            if is_enveloped(data):
                 return response
+            return EnvelopedJsonResponse(data, status=response.status_code)
 
         # Handle permission errors (403)
         if response.status_code == 403:
-            try:
-                content = json.loads(response.content) if response.content else {}
-                detail = content.get('detail', response.reason_phrase)
-            except json.JSONDecodeError:
-                detail = response.reason_phrase
-            return JsonResponse({
-                "response_status": "error",
-                "response_description": f"Forbidden: {detail}",
-                "response_data": {"detail": detail}
-            }, status=403)
+            detail = self._get_detail(response, response.reason_phrase)
+            return EnvelopedJsonResponse({"detail": detail}, message=f"Forbidden: {detail}", status=403)
 
         # Handle validation errors (400)
         if response.status_code == 400:
-            try:
-                content = json.loads(response.content) if response.content else {}
-                detail = content.get('detail', content)
-            except json.JSONDecodeError:
-                detail = response.reason_phrase
-            return JsonResponse({
-                "response_status": "error",
-                "response_description": "Validation error occurred.",
-                "response_data": detail
-            }, status=400)
+            content = self._get_content(response)
+            detail = content.get('detail', content) if isinstance(content, dict) else response.reason_phrase
+            return EnvelopedJsonResponse(detail, message="Validation error occurred.", status=400)
 
         # Handle authentication errors (401)
         if response.status_code == 401:
-            try:
-                content = json.loads(response.content) if response.content else {}
-                detail = content.get('detail', 'Authentication credentials were not provided.')
-            except json.JSONDecodeError:
-                detail = 'Authentication credentials were not provided.'
-            return JsonResponse({
-                "response_status": "error",
-                "response_description": f"Authentication required: {detail}",
-                "response_data": {"detail": detail}
-            }, status=401)
-
-        # Check if the response is already a JsonResponse
+            detail = self._get_detail(response, 'Authentication credentials were not provided.')
+            return EnvelopedJsonResponse(
+                {"detail": detail}, message=f"Authentication required: {detail}", status=401
+            )
+
+        # Plain JsonResponse from a view that does not build the envelope
+        # itself; this is the only path that still re-parses the body.
         if isinstance(response, JsonResponse):
-            try:
-                content = json.loads(response.content)
-                # Add standard fields if not already present
-                if "response_status" not in content:
-                    standardized_response = {
-                        "response_status": "success" if response.status_code <= 399 else "error",
-                        "response_description": content.get("message", "Request processed"),
-                        "response_data": content.get("data", content)
-                    }
-                    return JsonResponse(standardized_response, status=response.status_code)
-            except json.JSONDecodeError:
-                pass
+            content = self._get_content(response)
+            if isinstance(content, dict) and not is_enveloped(content):
+                return EnvelopedJsonResponse(
+                    content.get("data", content),
+                    message=content.get("message", "Request processed"),
+                    status=response.status_code,
+                )
+            return response
 
         # Handle other error responses
         if response.status_code > 399:
-            return JsonResponse({
-                "response_status": "error",
-                "response_description": response.reason_phrase,
-                "response_data": {}
-            }, status=response.status_code)
+            return EnvelopedJsonResponse({}, message=response.reason_phrase, status=response.status_code)
 
         return response
-    
-    def _get_response_description(self, response, data):
-        """
-        Get an appropriate response description based on the response data and status code.
-        """
-        # Check if data has a message field
-        if isinstance(data, dict):
-            if 'message' in data:
-                return data['message']
-            elif 'detail' in data:
-                return data['detail']
-        
-        # Default messages based on status code
-        if response.status_code == 200:
-            return "Request processed successfully."
-        elif response.status_code == 201:
-            return "Resource created successfully."
-        elif response.status_code == 204:
-            return "Resource deleted successfully."
-        elif response.status_code == 400:
-            return "Bad request."
-        elif response.status_code == 404:
-            return "Resource not found."
-        elif response.status_code == 500:
-            return "Internal server error."
-        else:
-            return "Request processed."
+
+    def _get_content(self, response):
+        try:
+            return json.loads(response.content) if response.content else {}
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+
+    def _get_detail(self, response, default):
+        content = self._get_content(response)
+        return content.get('detail', default) if isinstance(content, dict) else default
@@ -1,7 +1,9 @@
-import threading
+from asgiref.local import Local
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.contrib.auth import get_user_model
 
-_user_local = threading.local()
+# Thread-local under WSGI, task-local under ASGI
+_user_local = Local()
 User = get_user_model()
 
 
@@ -10,11 +12,18 @@ class CurrentUserMiddleware:
     Middleware to store the current user in thread-local storage.
     This allows access to the current user from anywhere in the application.
     """
+    sync_capable = True
+    async_capable = True
     
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         # Store the current user in thread-local storage
         _user_local.user = getattr(request, 'user', None)
         
@@ -26,6 +35,14 @@ class CurrentUserMiddleware:
             
         return response
 
+    async def __acall__(self, request):
+        _user_local.user = getattr(request, 'user', None)
+        try:
+            return await self.get_response(request)
+        finally:
+            if hasattr(_user_local, 'user'):
+                del _user_local.user
+
 
 def get_current_user():
     """
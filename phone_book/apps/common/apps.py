@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_migrate
 
 
 class CommonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'phone_book.apps.common'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        if getattr(settings, 'REQUEST_TEMPLATE_TIMING', True):
+            from middlewares.instrumentation_middleware import install_template_timing
+            install_template_timing()
+        post_migrate.connect(signals.repair_settings_search_index, sender=self)
@@ -0,0 +1,115 @@
+"""
+JWT authentication that serves the token's user from the shared cache.
+
+Each user has a version key in the cache. The cached user is stored together
+with the version it was loaded at, and both are fetched in one round trip; the
+entry is used only while the versions match. Saving or deleting the user bumps
+its version once the transaction commits (see ``signals``), so a changed
+password, deactivation or deletion takes effect on the next request.
+
+Cache failures are logged and the user is loaded from the database.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+logger = logging.getLogger(__name__)
+
+
+def _user_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def _version_key(user_id):
+    return f"auth:user-version:{user_id}"
+
+
+def _initial_version():
+    # Seed from the clock so a lost counter never repeats an old version.
+    return int(time.time() * 1000)
+
+
+def get_cached_user(user_id):
+    """
+    Return ``(user, version)``. ``user`` is None on a miss; ``version`` is
+    None if the cache is down, in which case nothing should be cached.
+    """
+    user_key, version_key = _user_key(user_id), _version_key(user_id)
+    try:
+        values = cache.get_many([user_key, version_key])
+        version = values.get(version_key)
+        if version is None:
+            cache.add(version_key, _initial_version(), timeout=None)
+            return None, cache.get(version_key)
+    except Exception:
+        logger.warning("Could not read the cached user %s", user_id, exc_info=True)
+        return None, None
+    entry = values.get(user_key)
+    if entry is not None and entry[0] == version:
+        return entry[1], version
+    return None, version
+
+
+def cache_user(user_id, user, version):
+    try:
+        cache.set(_user_key(user_id), (version, user), getattr(settings, 'JWT_USER_CACHE_TIMEOUT', 300))
+    except Exception:
+        logger.warning("Could not cache the user %s", user_id, exc_info=True)
+
+
+def _bump_user_version(user_id):
+    try:
+        try:
+            cache.incr(_version_key(user_id))
+        except ValueError:
+            cache.add(_version_key(user_id), _initial_version(), timeout=None)
+    except Exception:
+        logger.warning("Could not bump the cached user version of %s", user_id, exc_info=True)
+
+
+def invalidate_cached_user(user_id):
+    """Stop serving the cached user once the current transaction commits."""
+    transaction.on_commit(lambda: _bump_user_version(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that loads the user from the cache, keeping the
+    same active-user and password-change checks.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user, version = get_cached_user(user_id)
+        if user is None:
+            try:
+                user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            if version is not None:
+                cache_user(user_id, user, version)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
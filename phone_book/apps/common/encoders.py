@@ -0,0 +1,59 @@
+"""
+Pluggable JSON encoding for API responses.
+
+The ``JSON_ENCODER`` setting picks the implementation: ``'auto'`` (orjson
+when it is installed, the standard library otherwise), ``'orjson'``,
+``'stdlib'``, or a dotted path to a callable with the signature of
+``stdlib_dumps``. Types JSON has no notation for (dates, decimals, lazy
+strings, ...) are always converted by the given encoder class, so every
+implementation produces the same output for them.
+"""
+import json
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def stdlib_dumps(obj, encoder_class=DjangoJSONEncoder):
+    """Encode ``obj`` to compact UTF-8 JSON with the ``json`` module."""
+    return json.dumps(obj, cls=encoder_class, separators=(',', ':')).encode('utf-8')
+
+
+@lru_cache(maxsize=None)
+def _default_hook(encoder_class):
+    return encoder_class().default
+
+
+def orjson_dumps(obj, encoder_class=DjangoJSONEncoder):
+    """Encode ``obj`` with orjson, deferring datetimes to ``encoder_class``."""
+    return orjson.dumps(
+        obj,
+        default=_default_hook(encoder_class),
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_json_dumps(name='auto'):
+    """Resolve a ``JSON_ENCODER`` value to an encoding function."""
+    if name == 'auto':
+        return orjson_dumps if orjson is not None else stdlib_dumps
+    if name == 'orjson':
+        if orjson is None:
+            raise ImportError("JSON_ENCODER is 'orjson' but orjson is not installed.")
+        return orjson_dumps
+    if name == 'stdlib':
+        return stdlib_dumps
+    return import_string(name)
+
+
+def dumps(obj, encoder_class=DjangoJSONEncoder):
+    """Encode ``obj`` to JSON bytes with the configured implementation."""
+    return get_json_dumps(getattr(settings, 'JSON_ENCODER', 'auto'))(obj, encoder_class)
@@ -1,7 +1,8 @@
 import django_filters
-from django.db import models
 from django_filters import rest_framework as filters
 
+from .search import search_settings
+
 
 class BaseFilterSet(filters.FilterSet):
     """
@@ -40,13 +41,10 @@ class CommonSettingsFilterSet(BaseFilterSet):
     
     def filter_search(self, queryset, name, value):
         """
-        Search in key, value, and description fields.
+        Search in key, value, and description fields through the database
+        search backend, most relevant first.
         """
-        return queryset.filter(
-            models.Q(key__icontains=value) |
-            models.Q(value__icontains=value) |
-            models.Q(description__icontains=value)
-        )
+        return search_settings(queryset, value, ranked=True)
 
 
 class DateRangeFilter(filters.FilterSet):
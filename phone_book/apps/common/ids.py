@@ -0,0 +1,77 @@
+"""
+ULID primary keys: 26 Crockford base32 characters, sortable by creation time.
+
+The first 48 bits are a millisecond timestamp and the remaining 80 are
+random. IDs made in the same millisecond by one process increment the random
+part instead of drawing a new one, so they are strictly increasing. The
+generator holds a lock for that state and re-seeds itself in forked children
+(e.g. gunicorn workers), whose IDs stay unique through their own randomness.
+
+IDs assigned before ULIDs were a 13-digit decimal millisecond timestamp
+followed by random characters. Those sort after every ULID, so ordering a
+table that holds both by ``id`` interleaves old and new rows; order by
+``created_at`` where creation order is meant.
+"""
+import os
+import threading
+import time
+
+ENCODING = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+ULID_LENGTH = 26
+RANDOM_BITS = 80
+RANDOM_LIMIT = 1 << RANDOM_BITS
+
+
+def encode(value):
+    """Encode a 128-bit integer as 26 Crockford base32 characters."""
+    chars = []
+    for _ in range(ULID_LENGTH):
+        chars.append(ENCODING[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+
+class ULIDGenerator:
+    """Monotonic ULID source; one instance per process is enough."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._last_random = 0
+
+    def _next(self):
+        # Caller holds the lock.
+        ms = time.time_ns() // 1_000_000
+        if ms > self._last_ms:
+            random = int.from_bytes(os.urandom(10), 'big')
+        else:
+            # Same millisecond, or the clock went back: keep counting up.
+            ms = self._last_ms
+            random = self._last_random + 1
+            if random >= RANDOM_LIMIT:
+                ms += 1
+                random = int.from_bytes(os.urandom(10), 'big')
+        self._last_ms, self._last_random = ms, random
+        return (ms << RANDOM_BITS) | random
+
+    def new(self):
+        with self._lock:
+            value = self._next()
+        return encode(value)
+
+    def new_many(self, count):
+        """Return ``count`` increasing IDs, taking the lock once."""
+        with self._lock:
+            values = [self._next() for _ in range(count)]
+        return [encode(value) for value in values]
+
+
+_generator = ULIDGenerator()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_generator.reset)
+
+new_ulid = _generator.new
+new_ulids = _generator.new_many
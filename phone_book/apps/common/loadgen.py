@@ -0,0 +1,102 @@
+"""
+A small closed-loop load generator for benchmarks.
+
+``concurrency`` workers each send requests back to back until the scenario's
+request budget is used up. Every request is timed individually, so the
+summary reports latency percentiles as well as throughput.
+"""
+import itertools
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, errors, elapsed):
+    """Summary of one scenario run; latencies are in seconds."""
+    latencies = sorted(latencies)
+    completed = len(latencies)
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 3)
+
+    return {
+        'requests': completed,
+        'errors': errors,
+        'duration_seconds': round(elapsed, 3),
+        'throughput_rps': round(completed / elapsed, 1) if elapsed else None,
+        'latency_ms': {
+            'mean': ms(sum(latencies) / completed) if completed else None,
+            'p50': ms(percentile(latencies, 50)),
+            'p95': ms(percentile(latencies, 95)),
+            'p99': ms(percentile(latencies, 99)),
+            'max': ms(latencies[-1]) if latencies else None,
+        },
+    }
+
+
+def run_load(make_worker, requests, concurrency=1, warmup=0):
+    """
+    Drive ``requests`` calls spread over ``concurrency`` threads.
+
+    ``make_worker()`` is called once per thread and returns a callable that
+    takes the request sequence number and returns True on success. The first
+    ``warmup`` calls of each thread are not recorded. With a concurrency of 1
+    the calls run on the current thread, so they share its database
+    connection and transaction.
+    """
+    sequence = itertools.count()
+    lock = threading.Lock()
+    latencies = []
+    errors = 0
+    window = {}
+    # Timing starts once every worker has finished warming up.
+    barrier = threading.Barrier(concurrency, action=lambda: window.setdefault('start', time.perf_counter()))
+
+    def work(budget):
+        nonlocal errors
+        try:
+            worker = make_worker()
+            for _ in range(warmup):
+                worker(next(sequence))
+        except BaseException:
+            barrier.abort()  # Do not leave the other workers waiting.
+            raise
+        barrier.wait()
+        local, failed = [], 0
+        for _ in range(budget):
+            number = next(sequence)
+            started = time.perf_counter()
+            try:
+                ok = worker(number)
+            except Exception:
+                ok = False
+            local.append(time.perf_counter() - started)
+            failed += not ok
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    def threaded(budget):
+        try:
+            work(budget)
+        finally:
+            connections.close_all()
+
+    budgets = [requests // concurrency + (index < requests % concurrency) for index in range(concurrency)]
+    if concurrency == 1:
+        work(budgets[0])
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(threaded, budgets))
+    return summarize(latencies, errors, time.perf_counter() - window['start'])
@@ -0,0 +1,73 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse, JsonResponse
+from django.test import RequestFactory, override_settings
+from rest_framework.response import Response
+
+from middlewares.response_middleware import APIResponseMiddleware
+from phone_book.apps.common.encoders import get_json_dumps
+from phone_book.apps.common.renderers import EnvelopeJSONRenderer
+from phone_book.apps.common.responses import EnvelopedJsonResponse
+
+
+def sample_page(rows):
+    return {
+        'count': rows,
+        'next': None,
+        'previous': None,
+        'results': [
+            {'id': i, 'name': f'Contact {i}', 'phone_number': f'+1 555 01{i:04d}', 'email': f'c{i}@example.com'}
+            for i in range(rows)
+        ],
+    }
+
+
+def rendered_drf_response(data):
+    response = Response(data)
+    response.accepted_renderer = EnvelopeJSONRenderer()
+    response.accepted_media_type = 'application/json'
+    response.renderer_context = {'response': response}
+    return response.render()
+
+
+class Command(BaseCommand):
+    help = "Measure the per-request overhead APIResponseMiddleware adds to each kind of response."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5000, help="Requests timed per scenario.")
+        parser.add_argument('--repeat', type=int, default=5, help="Timing runs per scenario; the fastest is kept.")
+        parser.add_argument('--rows', type=int, default=25, help="Contacts in the sample payload.")
+        parser.add_argument('--encoder', default='auto', help="JSON_ENCODER value to benchmark (default: auto).")
+
+    def handle(self, *args, **options):
+        iterations, repeat = options['iterations'], options['repeat']
+        data = sample_page(options['rows'])
+        request = RequestFactory().get('/api/phonebook/v1/')
+        scenarios = [
+            ('EnvelopedJsonResponse', lambda: EnvelopedJsonResponse(data)),
+            ('DRF Response (envelope renderer)', lambda: rendered_drf_response(data)),
+            ('plain JsonResponse (re-parsed)', lambda: JsonResponse(data)),
+            ('skipped path', lambda: HttpResponse(b'', content_type='text/plain')),
+        ]
+        with override_settings(JSON_ENCODER=options['encoder']):
+            self.stdout.write(
+                f"{iterations} requests per scenario, {options['rows']} rows, "
+                f"encoder {get_json_dumps(options['encoder']).__name__}"
+            )
+            for label, build in scenarios:
+                path = '/static/x' if label == 'skipped path' else request.path
+                request.path = path
+                middleware = APIResponseMiddleware(lambda request: build())
+                view = self.time(build, iterations, repeat)
+                total = self.time(lambda: middleware(request), iterations, repeat)
+                self.stdout.write(
+                    f"  {label:<34} view {view:8.2f} us  with middleware {total:8.2f} us  "
+                    f"overhead {total - view:8.2f} us/request"
+                )
+
+    @staticmethod
+    def time(func, iterations, repeat):
+        """Best-of-``repeat`` microseconds per call."""
+        func()  # warm up
+        return min(timeit.repeat(func, number=iterations, repeat=repeat)) / iterations * 1e6
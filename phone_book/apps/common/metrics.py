@@ -0,0 +1,238 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Every thread records into its own shard, so observing a value takes no lock;
+shards are summed when the metrics are scraped. Counts read from another
+thread's shard mid-update may be one observation behind, which a scraper
+never notices. Shards of threads that have exited are folded into one base
+shard, so thread churn does not grow the registry.
+
+Under a multi-process server each worker periodically writes its totals to
+``METRICS_MULTIPROC_DIR`` (one file per process) and a scrape, served by any
+one worker, adds up every file in the directory. Files of exited workers are
+kept so counters never go backwards; clear the directory when the server
+starts.
+"""
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    def empty(self):
+        raise NotImplementedError
+
+    def merge(self, total, values):
+        for index, value in enumerate(values):
+            total[index] += value
+
+    def expose(self, series):
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        self.registry.shard_entry(self, labels)[0] += amount
+
+    def empty(self):
+        return [0]
+
+    def expose(self, series):
+        for labels, (value,) in series:
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}'
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(registry, name, documentation, labelnames)
+
+    def observe(self, value, *labels):
+        # Layout: one count per bucket, then +Inf, sum and count.
+        entry = self.registry.shard_entry(self, labels)
+        entry[bisect.bisect_left(self.buckets, value)] += 1
+        entry[-2] += value
+        entry[-1] += 1
+
+    def empty(self):
+        return [0] * (len(self.buckets) + 3)
+
+    def expose(self, series):
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), values):
+                cumulative += count
+                le = (('le', bound if bound == '+Inf' else _format_number(float(bound))),)
+                yield f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_number(values[-2])}'
+            yield f'{self.name}_count{_format_labels(self.labelnames, labels)} {values[-1]}'
+
+
+class Registry:
+    """Metrics of this process, sharded per thread."""
+
+    def __init__(self):
+        self.metrics = {}
+        self._shards = {}  # Thread -> shard
+        self._base = {}  # Totals of exited threads
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._next_flush = 0.0
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name!r} is already registered.")
+        self.metrics[metric.name] = metric
+
+    def shard_entry(self, metric, labels):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._retire_exited_threads()
+                self._shards[threading.current_thread()] = shard
+        key = (metric.name, tuple(str(label) for label in labels))
+        entry = shard.get(key)
+        if entry is None:
+            entry = shard[key] = metric.empty()
+        self.maybe_flush()
+        return entry
+
+    def _retire_exited_threads(self):
+        # Caller holds the lock. An exited thread can no longer write to its shard.
+        for thread in [thread for thread in self._shards if not thread.is_alive()]:
+            for key, values in self._shards.pop(thread).items():
+                self._add(self._base, key, values)
+
+    def collect(self):
+        """Return ``{(name, labels): values}`` summed over this process's threads."""
+        totals = {}
+        with self._lock:
+            self._retire_exited_threads()
+            for key, values in self._base.items():
+                self._add(totals, key, values)
+            shards = list(self._shards.values())
+        for shard in shards:
+            for key, values in list(shard.items()):
+                self._add(totals, key, values)
+        return totals
+
+    def _add(self, totals, key, values):
+        metric = self.metrics.get(key[0])
+        if metric is None:
+            return
+        total = totals.get(key)
+        if total is None:
+            total = totals[key] = metric.empty()
+        metric.merge(total, values)
+
+    # Multi-process aggregation
+
+    @property
+    def multiproc_dir(self):
+        return getattr(settings, 'METRICS_MULTIPROC_DIR', '')
+
+    def maybe_flush(self):
+        """Write this process's totals if the flush interval has passed."""
+        if not self.multiproc_dir or time.monotonic() < self._next_flush:
+            return
+        if self._flush_lock.acquire(blocking=False):
+            try:
+                self.flush()
+            finally:
+                self._flush_lock.release()
+
+    def flush(self):
+        directory = self.multiproc_dir
+        self._next_flush = time.monotonic() + getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'metrics_{os.getpid()}.json')
+        snapshot = [[name, list(labels), values] for (name, labels), values in self.collect().items()]
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as handle:
+            json.dump(snapshot, handle)
+        os.replace(temporary, path)
+
+    def collect_all(self):
+        """Totals over every process sharing ``METRICS_MULTIPROC_DIR``, or this one."""
+        if not self.multiproc_dir:
+            return self.collect()
+        with self._flush_lock:
+            self.flush()
+        totals = {}
+        for path in glob.glob(os.path.join(self.multiproc_dir, 'metrics_*.json')):
+            try:
+                with open(path) as handle:
+                    snapshot = json.load(handle)
+            except (OSError, ValueError):
+                continue  # Being replaced, or a worker died mid-write.
+            for name, labels, values in snapshot:
+                self._add(totals, (name, tuple(labels)), values)
+        return totals
+
+    def expose(self):
+        """Render all metrics in the Prometheus text format."""
+        totals = self.collect_all()
+        lines = []
+        for name, metric in self.metrics.items():
+            series = sorted((labels, values) for (metric_name, labels), values in totals.items() if metric_name == name)
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            lines.extend(metric.expose(series))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+request_duration = Histogram(
+    registry, 'phonebook_http_request_duration_seconds',
+    'Time spent serving HTTP requests, by URL name, method and status.',
+    ('view', 'method', 'status'),
+)
+request_queries = Counter(
+    registry, 'phonebook_http_request_queries_total',
+    'Database queries run while serving HTTP requests, by URL name.',
+    ('view',),
+)
+request_db_seconds = Counter(
+    registry, 'phonebook_http_request_db_seconds_total',
+    'Database time spent serving HTTP requests, by URL name.',
+    ('view',),
+)
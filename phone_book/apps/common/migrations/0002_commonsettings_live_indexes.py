@@ -0,0 +1,21 @@
+# Generated by Django 5.2.2 on 2026-10-18 18:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='commonsettings',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['key'], name='common_live_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commonsettings',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['is_public', 'key'], name='common_live_public_key_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from phone_book.apps.common.search import SETTINGS_SEARCH, install_search_index, uninstall_search_index
+
+
+def install(apps, schema_editor):
+    install_search_index(schema_editor, SETTINGS_SEARCH)
+
+
+def uninstall(apps, schema_editor):
+    uninstall_search_index(schema_editor, SETTINGS_SEARCH)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0002_commonsettings_live_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.2 on 2026-10-18 18:47
+
+import django.db.models.manager
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0003_settings_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='commonsettings',
+            options={'base_manager_name': 'all_objects', 'default_manager_name': 'all_objects', 'ordering': ['key'], 'verbose_name': 'Common Setting', 'verbose_name_plural': 'Common Settings'},
+        ),
+        migrations.AlterModelManagers(
+            name='commonsettings',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
@@ -3,6 +3,26 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 
+from .ids import new_ulid, new_ulids
+from .settings_registry import notify_settings_changed
+
+
+class BaseModelQuerySet(models.QuerySet):
+    """
+    QuerySet that gives rows without an ID a ULID on ``bulk_create``, in list
+    order, since ``bulk_create`` never calls ``save()``.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        missing = [obj for obj in objs if not obj.pk]
+        for obj, pk in zip(missing, new_ulids(len(missing))):
+            obj.pk = pk
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+BaseModelManager = models.Manager.from_queryset(BaseModelQuerySet)
+
 
 class BaseModel(models.Model):
     """
@@ -11,19 +31,17 @@ class BaseModel(models.Model):
     id = models.CharField(max_length=26, primary_key=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = BaseModelManager()
     
     class Meta:
         abstract = True
     
     def save(self, *args, **kwargs):
         if not self.id:
-            # Generate a unique ID (you can use ulid or uuid)
-            import time
-            import random
-            import string
-            timestamp = int(time.time() * 1000)
-            random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=10))
-            self.id = f"{timestamp:013d}{random_part}"
+            # Time-ordered, so new rows append to the end of the primary key index.
+            # Older IDs do not sort with these; use created_at for creation order.
+            self.id = new_ulid()
         super().save(*args, **kwargs)
 
 
@@ -38,27 +56,83 @@ class TimestampMixin(models.Model):
         abstract = True
 
 
+def _touch_fields(model):
+    """``updated_at`` when the model keeps one; ``update()`` skips ``auto_now``."""
+    return ['updated_at'] if any(field.name == 'updated_at' for field in model._meta.concrete_fields) else []
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """
+    QuerySet that soft deletes and restores all matching rows with a single
+    ``UPDATE``. Like ``update()``, neither calls ``save()`` nor sends signals.
+    """
+
+    def _set_deleted(self, is_deleted, deleted_at):
+        now = timezone.now()
+        values = {'is_deleted': is_deleted, 'deleted_at': deleted_at}
+        values.update((name, now) for name in _touch_fields(self.model))
+        return self.filter(is_deleted=not is_deleted).update(**values)
+
+    def soft_delete(self):
+        """Soft delete the live rows; return how many were deleted."""
+        return self._set_deleted(True, timezone.now())
+
+    def restore(self):
+        """
+        Restore the soft deleted rows; return how many were restored.
+
+        Call it on ``all_objects``: ``objects`` never returns deleted rows.
+        """
+        return self._set_deleted(False, None)
+
+    def alive(self):
+        return self.filter(is_deleted=False)
+
+    def deleted(self):
+        return self.filter(is_deleted=True)
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """
+    Manager that hides soft deleted rows, so ``restore()`` and ``deleted()``
+    match nothing through it; use ``all_objects`` for those.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class SoftDeleteMixin(models.Model):
     """
     Mixin to add soft delete functionality to models.
+
+    ``objects`` only returns live rows; ``all_objects`` includes soft deleted
+    ones. ``all_objects`` is the default manager, so unique checks in forms,
+    the admin and serializers see the deleted rows that unique columns still
+    hold.
     """
     is_deleted = models.BooleanField(default=False, help_text="Indicates if the record is soft deleted")
     deleted_at = models.DateTimeField(null=True, blank=True, help_text="Timestamp when the record was soft deleted")
+
+    objects = SoftDeleteManager()
+    all_objects = models.Manager.from_queryset(SoftDeleteQuerySet)()
     
     class Meta:
         abstract = True
+        default_manager_name = 'all_objects'
+        base_manager_name = 'all_objects'
     
     def soft_delete(self):
         """Soft delete the instance."""
         self.is_deleted = True
         self.deleted_at = timezone.now()
-        self.save()
+        self.save(update_fields=['is_deleted', 'deleted_at', *_touch_fields(self)])
     
     def restore(self):
         """Restore a soft deleted instance."""
         self.is_deleted = False
         self.deleted_at = None
-        self.save()
+        self.save(update_fields=['is_deleted', 'deleted_at', *_touch_fields(self)])
 
 
 class StatusChoices(models.TextChoices):
@@ -71,21 +145,59 @@ class StatusChoices(models.TextChoices):
     SUSPENDED = 'suspended', 'Suspended'
 
 
+class BaseSoftDeleteQuerySet(BaseModelQuerySet, SoftDeleteQuerySet):
+    pass
+
+
+class CommonSettingsQuerySet(BaseSoftDeleteQuerySet):
+    """Refreshes the settings registry after writes that send no signals."""
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if rows:
+            notify_settings_changed()
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if objs:
+            notify_settings_changed()
+        return objs
+
+
 # Example model using the mixins
 class CommonSettings(BaseModel, TimestampMixin, SoftDeleteMixin):
     """
     Model to store application-wide settings.
+
+    Read them through ``settings_registry.get_setting``, which serves them
+    from memory.
     """
     key = models.CharField(max_length=255, unique=True, help_text="Setting key")
     value = models.TextField(help_text="Setting value")
     description = models.TextField(blank=True, help_text="Description of the setting")
     is_public = models.BooleanField(default=False, help_text="Whether this setting is public")
+
+    # BaseModel's manager would shadow SoftDeleteMixin's; combine the two.
+    objects = SoftDeleteManager.from_queryset(CommonSettingsQuerySet)()
+    all_objects = BaseModelManager.from_queryset(CommonSettingsQuerySet)()
     
     class Meta:
         db_table = 'phone_book_common_settings'
         verbose_name = 'Common Setting'
         verbose_name_plural = 'Common Settings'
         ordering = ['key']
+        # See SoftDeleteMixin
+        default_manager_name = 'all_objects'
+        base_manager_name = 'all_objects'
+        # Live rows only, so default lookups never read soft deleted ones
+        indexes = [
+            models.Index(fields=['key'], condition=models.Q(is_deleted=False), name='common_live_key_idx'),
+            models.Index(
+                fields=['is_public', 'key'], condition=models.Q(is_deleted=False),
+                name='common_live_public_key_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.key}: {self.value[:50]}..."
@@ -1,30 +1,511 @@
+import base64
+import binascii
+import hashlib
+import json
+import logging
+from collections.abc import Sequence
+
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
-from django.http import JsonResponse
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import EmptyPage, InvalidPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .responses import EnvelopedJsonResponse
+
+logger = logging.getLogger(__name__)
+
+
+class CountStrategy:
+    """
+    Decides how the total row count of a paginated queryset is obtained.
+
+    ``count`` returns a ``(value, source)`` pair where ``source`` names the
+    strategy that actually produced the value, since a strategy may fall back
+    to another one.
+    """
+    name = None
+    # Whether page boundaries can be derived from the count. Approximate
+    # strategies paginate by looking one row ahead instead.
+    exact = False
+
+    def count(self, queryset):
+        raise NotImplementedError
+
+
+class ExactCount(CountStrategy):
+    """A plain ``COUNT(*)`` on every request."""
+    name = 'exact'
+    exact = True
+
+    def count(self, queryset):
+        return queryset.count(), self.name
+
+
+class CachedCount(CountStrategy):
+    """
+    Exact count cached per filter signature (the compiled SQL and params) for
+    ``PAGINATION_COUNT_CACHE_TIMEOUT`` seconds.
+    """
+    name = 'cached'
+
+    def cache_key(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        signature = f"{queryset.db}:{sql}:{params!r}"
+        return f"pagination:count:{hashlib.md5(signature.encode('utf-8')).hexdigest()}"
+
+    def count(self, queryset):
+        key = self.cache_key(queryset)
+        try:
+            value = cache.get(key)
+        except Exception:
+            logger.warning("Could not read cached count", exc_info=True)
+            return ExactCount().count(queryset)
+        if value is not None:
+            return value, self.name
+        value = queryset.count()
+        try:
+            cache.set(key, value, getattr(settings, 'PAGINATION_COUNT_CACHE_TIMEOUT', 60))
+        except Exception:
+            logger.warning("Could not cache count", exc_info=True)
+        return value, ExactCount.name
+
+
+class EstimatedCount(CountStrategy):
+    """
+    Planner estimate on PostgreSQL: ``pg_class.reltuples`` for unfiltered
+    querysets, the ``EXPLAIN`` row estimate otherwise. Small results and other
+    database engines fall back to an exact count.
+    """
+    name = 'estimate'
+    # Below this many rows an exact count is cheap and more useful.
+    exact_threshold = 1000
+
+    def count(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return ExactCount().count(queryset)
+        estimate = self.estimate(queryset, connection)
+        if estimate is None or estimate < self.exact_threshold:
+            return ExactCount().count(queryset)
+        return estimate, self.name
+
+    def estimate(self, queryset, connection):
+        query = queryset.query
+        with connection.cursor() as cursor:
+            if not query.where and not query.distinct and not query.combinator:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [connection.ops.quote_name(queryset.model._meta.db_table)],
+                )
+                row = cursor.fetchone()
+                # reltuples is -1 until the table has been vacuumed or analyzed.
+                return row[0] if row and row[0] >= 0 else None
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class NoCount(CountStrategy):
+    """
+    Skip counting entirely; clients navigate with ``next``/``previous``.
+
+    ``GenericPagination`` then pages with cursors (see ``KeysetPaginator``),
+    unless a page number was requested or the ordering cannot be sought.
+    """
+    name = 'none'
+
+    def count(self, queryset):
+        return None, self.name
+
+
+COUNT_STRATEGIES = {
+    strategy.name: strategy for strategy in (ExactCount(), CachedCount(), EstimatedCount(), NoCount())
+}
+
+
+class CountingPaginator(Paginator):
+    """
+    Django paginator whose ``count`` comes from a ``CountStrategy``.
+    """
+
+    def __init__(self, object_list, per_page, count_strategy, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_strategy = count_strategy
+        self.count_source = None
+
+    @cached_property
+    def count(self):
+        value, self.count_source = self.count_strategy.count(self.object_list)
+        return value
+
+
+class LookaheadPage(Page):
+    """
+    Page that knows whether a next page exists without knowing the total.
+    """
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return (self.number - 1) * self.paginator.per_page + 1
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1
+
+
+class LookaheadPaginator(CountingPaginator):
+    """
+    Paginator for approximate or absent counts: each page fetches one extra
+    row to find out whether another page follows, and page numbers are never
+    validated against the (possibly stale or estimated) count.
+    """
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('That page contains no results')
+        return LookaheadPage(rows[:self.per_page], number, self, len(rows) > self.per_page)
+
+    @property
+    def num_pages(self):
+        count = self.count
+        if count is None:
+            return None
+        return super().num_pages
+
+
+class CoalescedPaginator(Paginator):
+    """
+    Paginator whose count and page rows go through a ``SingleFlight`` group,
+    so concurrent requests for the same page of the same query share one set
+    of queries. ``key`` must identify the query and the version of its data.
+    """
+
+    def __init__(self, object_list, per_page, flight, key, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.flight = flight
+        self.key = key
+
+    @cached_property
+    def count(self):
+        return self.flight.do(f"{self.key}:count", Paginator.count.func, self)
+
+    def page(self, number):
+        page = super().page(number)
+        page.object_list = self.flight.do(
+            f"{self.key}:page:{page.number}:{self.per_page}", list, page.object_list
+        )
+        return page
 
 
 class GenericPagination(PageNumberPagination):
     page_size = 10  # Default number of items per page
     page_size_query_param = 'page_size'  # Query parameter to control page size
     max_page_size = 100  # Maximum allowed page size to prevent large responses
+    # Strategy used for the total count: 'exact', 'cached', 'estimate' or 'none'.
+    # Defaults to the PAGINATION_COUNT_STRATEGY setting.
+    count_strategy = None
+    count_strategy_query_param = 'count'  # Lets clients pick a cheaper strategy
+    cursor_query_param = 'cursor'  # Position of a keyset page when counting is skipped
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def get_count_strategy(self, request, view=None):
+        """
+        Resolve the count strategy from the query string, the view's
+        ``pagination_count_strategy`` attribute, this class, or settings.
+        """
+        name = (
+            request.query_params.get(self.count_strategy_query_param)
+            or getattr(view, 'pagination_count_strategy', None)
+            or self.count_strategy
+            or getattr(settings, 'PAGINATION_COUNT_STRATEGY', ExactCount.name)
+        )
+        return COUNT_STRATEGIES.get(name, COUNT_STRATEGIES[ExactCount.name])
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        strategy = self.get_count_strategy(request, view)
+        if strategy.name == NoCount.name and self.page_query_param not in request.query_params:
+            ordering = keyset_ordering(queryset)
+            if ordering is not None:
+                return self.paginate_keyset(queryset, request, page_size, ordering)
+        paginator_class = CountingPaginator if strategy.exact else LookaheadPaginator
+        paginator = paginator_class(queryset, page_size, strategy)
+        page_number = self.get_page_number(request, paginator)
+
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+
+        if self.template is not None and (self.page.has_next() or self.page.has_previous()):
+            # The browsable API should display pagination controls.
+            self.display_page_controls = True
+
+        return list(self.page)
+
+    def paginate_keyset(self, queryset, request, page_size, ordering):
+        """Return the keyset page at the request's cursor; no OFFSET, no count."""
+        paginator = KeysetPaginator(queryset, page_size, ordering=ordering)
+        try:
+            self.page = paginator.page(request.query_params.get(self.cursor_query_param))
+        except InvalidCursor:
+            raise NotFound(self.invalid_cursor_message)
+        return list(self.page)
+
+    def get_cursor_link(self, cursor):
+        if cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if getattr(self.page, 'is_keyset', False):
+            return self.get_cursor_link(self.page.next_cursor)
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if getattr(self.page, 'is_keyset', False):
+            return self.get_cursor_link(self.page.previous_cursor)
+        return super().get_previous_link()
 
     def get_paginated_response(self, data):
         """
-        Returns a paginated response in the format: {"message": str, "data": dict}.
+        Returns a paginated response in the standard envelope, with the
+        message as ``response_description`` and the page as ``response_data``.
         
         Args:
             data: The serialized data for the current page.
         
         Returns:
-            JsonResponse: A response containing pagination metadata and results.
+            EnvelopedJsonResponse: A response containing pagination metadata and results.
+            ``count_strategy`` names the strategy that produced ``count``,
+            which is null when counting was skipped.
         """
         # Use a default or provided message for the paginated response
         message = getattr(self, 'custom_message', "Data retrieved successfully.")
-        return JsonResponse({
-            "message": message,
-            "data": {
-                "count": self.page.paginator.count,
-                "next": self.get_next_link(),
-                "previous": self.get_previous_link(),
-                "results": data
-            }
-        }, status=200)
+        paginator = self.page.paginator
+        if getattr(self.page, 'is_keyset', False):
+            count, count_source = None, NoCount.name
+        else:
+            count, count_source = paginator.count, paginator.count_source
+        return EnvelopedJsonResponse({
+            "count": count,
+            "count_strategy": count_source,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data
+        }, message=message, status=200)
+
+
+class InvalidCursor(Exception):
+    """Raised when a keyset cursor cannot be decoded."""
+
+
+def encode_cursor(values, direction):
+    """
+    Encode a keyset position as an opaque, URL-safe token.
+
+    Args:
+        values: The ordering-key values of the boundary row.
+        direction: 'next' to continue after the row, 'previous' to page back.
+    """
+    payload = json.dumps({'k': list(values), 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a token produced by ``encode_cursor`` into (values, direction)."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values, direction = payload['k'], payload['d']
+    except (binascii.Error, ValueError, UnicodeError, KeyError, TypeError) as exc:
+        raise InvalidCursor(token) from exc
+    if not isinstance(values, list) or direction not in ('next', 'previous'):
+        raise InvalidCursor(token)
+    return values, direction
+
+
+def keyset_ordering(queryset):
+    """
+    Return the ordering of ``queryset`` as ``KeysetPaginator`` field names,
+    with ``pk`` appended when no field is unique, or None when it cannot be
+    sought: descending, related, nullable or computed orderings.
+    """
+    query = queryset.query
+    ordering = list(query.order_by) or (list(queryset.model._meta.ordering) if query.default_ordering else [])
+    if not ordering or not all(isinstance(name, str) and name.isidentifier() for name in ordering):
+        return None
+    opts = queryset.model._meta
+    try:
+        fields = [opts.pk if name == 'pk' else opts.get_field(name) for name in ordering]
+    except FieldDoesNotExist:
+        return None
+    if any(field.null or field.is_relation for field in fields):
+        return None
+    if not any(field.primary_key or field.unique for field in fields):
+        ordering.append('pk')
+    return tuple(ordering)
+
+
+def get_page_window(page_obj, radius=4):
+    """
+    Return the page numbers within ``radius`` of the current page, without
+    materialising the paginator's full ``page_range``.
+    """
+    number, num_pages = page_obj.number, page_obj.paginator.num_pages
+    return range(max(1, number - radius), min(num_pages, number + radius) + 1)
+
+
+class KeysetPage(Sequence):
+    """
+    A page of results produced by ``KeysetPaginator``.
+
+    Mirrors the parts of ``django.core.paginator.Page`` templates rely on, but
+    navigates with cursors instead of page numbers.
+    """
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f"<KeysetPage of {len(self.object_list)} items>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return encode_cursor(self.paginator.key(self.object_list[-1]), 'next')
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return encode_cursor(self.paginator.key(self.object_list[0]), 'previous')
+
+
+class KeysetPaginator:
+    """
+    Seek-method paginator over a strictly ordered, unique key.
+
+    Each page is fetched with a ``WHERE (a, b) > (x, y) ORDER BY a, b LIMIT n``
+    style query, so neither deep pages nor a ``COUNT(*)`` are needed.
+
+    Args:
+        object_list: QuerySet to paginate.
+        per_page: Rows per page.
+        ordering: Ascending field names forming a unique key; the last one
+            should be the primary key to break ties.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('pk',)):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+
+    def key(self, obj):
+        return [getattr(obj, field) for field in self.ordering]
+
+    def _seek(self, values, lookup):
+        """Build the row-value comparison ``(ordering) <lookup> (values)``."""
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            clause = Q(**{f"{field}__{lookup}": values[i]})
+            for prior, value in zip(self.ordering[:i], values[:i]):
+                clause &= Q(**{prior: value})
+            condition |= clause
+        return condition
+
+    def _seek_queryset(self, cursor, values, lookup):
+        """
+        Filter ``object_list`` to the rows past the cursor ``values``, raising
+        ``InvalidCursor`` for values the ordering fields cannot hold.
+        """
+        opts = self.object_list.model._meta
+        try:
+            values = [
+                (opts.pk if field == 'pk' else opts.get_field(field)).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+            return self.object_list.filter(self._seek(values, lookup))
+        except (ValidationError, TypeError, ValueError) as exc:
+            raise InvalidCursor(cursor) from exc
+
+    def page(self, cursor=None):
+        """Return the page after (or, for 'previous' cursors, before) ``cursor``."""
+        if not cursor:
+            rows = list(self.object_list.order_by(*self.ordering)[:self.per_page + 1])
+            return KeysetPage(rows[:self.per_page], self, len(rows) > self.per_page, False)
+
+        values, direction = decode_cursor(cursor)
+        if len(values) != len(self.ordering):
+            raise InvalidCursor(cursor)
+        if direction == 'next':
+            queryset = self._seek_queryset(cursor, values, 'gt')
+            rows = list(queryset.order_by(*self.ordering)[:self.per_page + 1])
+            return KeysetPage(rows[:self.per_page], self, len(rows) > self.per_page, True)
+
+        descending = [f"-{field}" for field in self.ordering]
+        queryset = self._seek_queryset(cursor, values, 'lt')
+        rows = list(queryset.order_by(*descending)[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return KeysetPage(rows, self, True, has_previous)
@@ -0,0 +1,115 @@
+"""
+Cached resolution of a user's group names and permissions.
+
+A user's groups and ``app_label.codename`` permissions are resolved once and
+kept on the user object for the rest of the request. They are also stored in
+the shared cache for ``PERMISSION_CACHE_TIMEOUT`` seconds, so later requests
+skip the queries too.
+
+Cache keys embed a permissions version. Any change to group membership,
+group or user permissions, or to a group or permission itself, bumps that
+version once the transaction commits (see ``signals``), so stale entries are
+never read again.
+
+Cache failures are logged and treated as misses.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'common:permissions:version'
+# Attribute holding the resolved permissions on the request's user object
+USER_ATTRIBUTE = '_resolved_permissions'
+
+
+class ResolvedPermissions:
+    def __init__(self, groups, permissions):
+        self.groups = frozenset(groups)
+        self.permissions = frozenset(permissions)
+
+
+def _initial_version():
+    # Seed from the clock so a lost counter never repeats an old version.
+    return int(time.time() * 1000)
+
+
+def get_permissions_version():
+    """Return the permissions version, or None if the cache is down."""
+    try:
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, _initial_version(), timeout=None)
+            version = cache.get(VERSION_KEY)
+        return version
+    except Exception:
+        logger.warning("Could not read the permissions version", exc_info=True)
+        return None
+
+
+def bump_permissions_version():
+    try:
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.add(VERSION_KEY, _initial_version(), timeout=None)
+    except Exception:
+        logger.warning("Could not bump the permissions version", exc_info=True)
+
+
+def notify_permissions_changed():
+    """Drop every cached resolution once the current transaction commits."""
+    transaction.on_commit(bump_permissions_version)
+
+
+def _cache_key(user, version):
+    # The flags change what Django grants without touching any m2m table.
+    return f"common:permissions:{version}:{user.pk}:{user.is_active:d}{user.is_superuser:d}"
+
+
+def _load(user):
+    return ResolvedPermissions(
+        user.groups.values_list('name', flat=True),
+        user.get_all_permissions(),
+    )
+
+
+def resolve_permissions(user):
+    """Return the ``ResolvedPermissions`` of an authenticated user."""
+    resolved = getattr(user, USER_ATTRIBUTE, None)
+    if resolved is not None:
+        return resolved
+    version = get_permissions_version()
+    key = _cache_key(user, version) if version is not None else None
+    if key is not None:
+        try:
+            resolved = cache.get(key)
+        except Exception:
+            logger.warning("Permissions cache read failed for %s", key, exc_info=True)
+    if resolved is None:
+        resolved = _load(user)
+        if key is not None:
+            try:
+                cache.set(key, resolved, getattr(settings, 'PERMISSION_CACHE_TIMEOUT', 300))
+            except Exception:
+                logger.warning("Permissions cache write failed for %s", key, exc_info=True)
+    setattr(user, USER_ATTRIBUTE, resolved)
+    return resolved
+
+
+def get_user_groups(user):
+    """Return the names of the user's groups; empty for anonymous users."""
+    if not user or not user.is_authenticated:
+        return frozenset()
+    return resolve_permissions(user).groups
+
+
+def get_user_permissions(user):
+    """Return the user's ``app_label.codename`` permissions."""
+    if not user or not user.is_authenticated:
+        return frozenset()
+    return resolve_permissions(user).permissions
@@ -1,6 +1,8 @@
 from rest_framework import permissions
 from rest_framework.permissions import BasePermission
 
+from .permission_cache import get_user_groups, get_user_permissions
+
 
 class IsOwnerOrReadOnly(BasePermission):
     """
@@ -127,14 +129,28 @@ class HasGroupPermission(BasePermission):
         if not required_groups:
             return True
         
-        user_groups = request.user.groups.values_list('name', flat=True)
+        user_groups = get_user_groups(request.user)
         return any(group in user_groups for group in required_groups)
 
 
+# Shared instances of the classes listed in permission_classes_by_action
+_permission_instances = {}
+
+
+def _get_permission(permission_class):
+    permission = _permission_instances.get(permission_class)
+    if permission is None:
+        permission = _permission_instances[permission_class] = permission_class()
+    return permission
+
+
 class DynamicPermission(BasePermission):
     """
     Dynamic permission class that can be configured per view.
     Usage: Add permission_classes_by_action to the view.
+
+    Each listed class is instantiated once and shared between requests, so it
+    must not keep per-request state on the instance.
     """
     
     def has_permission(self, request, view):
@@ -143,7 +159,7 @@ class DynamicPermission(BasePermission):
         
         if action in permission_classes_by_action:
             for permission_class in permission_classes_by_action[action]:
-                permission = permission_class()
+                permission = _get_permission(permission_class)
                 if not permission.has_permission(request, view):
                     self.message = getattr(permission, 'message', 'Permission denied.')
                     return False
@@ -156,7 +172,11 @@ def user_has_permission(user, permission_name):
     """
     Check if user has a specific permission.
     """
-    return user.has_perm(permission_name) if user and user.is_authenticated else False
+    if not user or not user.is_authenticated:
+        return False
+    if user.is_active and user.is_superuser:
+        return True
+    return permission_name in get_user_permissions(user)
 
 
 def user_in_group(user, group_name):
@@ -165,7 +185,7 @@ def user_in_group(user, group_name):
     """
     if not user or not user.is_authenticated:
         return False
-    return user.groups.filter(name=group_name).exists()
+    return group_name in get_user_groups(user)
 
 
 def is_object_owner(user, obj):
@@ -0,0 +1,24 @@
+from rest_framework.renderers import JSONRenderer
+
+from .encoders import dumps
+from .responses import envelope, is_enveloped
+
+
+class EnvelopeJSONRenderer(JSONRenderer):
+    """
+    Render DRF responses straight into the standard API envelope.
+
+    The response is flagged as enveloped so ``APIResponseMiddleware`` passes
+    it through untouched; ``response.data`` keeps the unwrapped payload.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if response is None:
+            return b'' if data is None else dumps(data, self.encoder_class)
+        response.enveloped = True
+        if response.status_code == 204:
+            return b''
+        if not is_enveloped(data):
+            data = envelope(data, response.status_code)
+        return dumps(data, self.encoder_class)
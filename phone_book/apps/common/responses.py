@@ -0,0 +1,66 @@
+"""
+The standard API envelope::
+
+    {"response_status": "success" | "error",
+     "response_description": "...",
+     "response_data": ...}
+
+Views build it before the payload is serialized, either by returning an
+``EnvelopedJsonResponse`` or, for DRF views, through ``EnvelopeJSONRenderer``,
+so ``APIResponseMiddleware`` never has to decode and re-encode a body.
+"""
+from django.http import HttpResponse
+
+from .encoders import dumps
+
+STATUS_DESCRIPTIONS = {
+    200: "Request processed successfully.",
+    201: "Resource created successfully.",
+    204: "Resource deleted successfully.",
+    400: "Bad request.",
+    404: "Resource not found.",
+    500: "Internal server error.",
+}
+
+
+def response_description(status_code, data):
+    """
+    Describe a response: its ``message`` or ``detail``, else a default for the
+    status code.
+    """
+    if isinstance(data, dict):
+        if 'message' in data:
+            return data['message']
+        if 'detail' in data:
+            return data['detail']
+    return STATUS_DESCRIPTIONS.get(status_code, "Request processed.")
+
+
+def is_enveloped(data):
+    return isinstance(data, dict) and 'response_status' in data
+
+
+def envelope(data, status_code, description=None):
+    """Wrap ``data`` in the standard envelope."""
+    return {
+        "response_status": "success" if status_code < 400 else "error",
+        "response_description": description if description is not None else response_description(status_code, data),
+        "response_data": data,
+    }
+
+
+class EnvelopedJsonResponse(HttpResponse):
+    """
+    JSON response whose body is already wrapped in the standard envelope.
+
+    Args:
+        data: The ``response_data`` payload.
+        message: The ``response_description``; derived from ``data`` and the
+            status code when omitted.
+        status: HTTP status code.
+    """
+    enveloped = True
+
+    def __init__(self, data, message=None, status=200, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(envelope(data, status, message)), status=status, **kwargs)
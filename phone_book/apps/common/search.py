@@ -0,0 +1,337 @@
+"""
+Pluggable, database-native text search.
+
+A ``SearchSpec`` describes which columns of a table are searchable. The
+backend returned by ``get_search_backend`` decides how a query against those
+columns is executed on the active database engine:
+
+* PostgreSQL: ``pg_trgm`` GIN indexes on ``UPPER(column)`` so the ORM's
+  ``icontains`` lookups become index scans, plus ``tsvector`` ranking.
+* SQLite: an external-content FTS5 shadow table using the trigram tokenizer,
+  kept in sync by triggers and ranked with ``bm25``.
+* Anything else: plain ``icontains`` lookups through the ORM.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+# FTS5's trigram tokenizer cannot match phrases shorter than three characters.
+MIN_TRIGRAM_QUERY_LENGTH = 3
+
+
+class SearchSpec:
+    """
+    Description of a searchable table.
+
+    Args:
+        table: Database table holding the searchable rows.
+        fields: Names of the text columns to search.
+        pk: Name of the primary key column.
+    """
+
+    def __init__(self, table, fields, pk='id'):
+        self.table = table
+        self.fields = tuple(fields)
+        self.pk = pk
+
+    @property
+    def fts_table(self):
+        return f"{self.table}_fts"
+
+    def index_name(self, field, suffix):
+        return f"{self.table}_{field}_{suffix}"
+
+
+class SearchBackend:
+    """
+    Default backend: case-insensitive substring matching through the ORM.
+    """
+    vendor = None
+
+    def __init__(self, spec, using=DEFAULT_DB_ALIAS):
+        self.spec = spec
+        self.using = using
+
+    def search(self, queryset, query, ranked=False):
+        """
+        Filter ``queryset`` down to rows matching ``query``; when ``ranked`` is
+        true the result is ordered by relevance.
+        """
+        queryset = self.filter(queryset, query)
+        if ranked:
+            queryset = self.rank(queryset, query)
+        return queryset
+
+    def filter(self, queryset, query):
+        condition = Q()
+        for field in self.spec.fields:
+            condition |= Q(**{f"{field}__icontains": query})
+        return queryset.filter(condition)
+
+    def rank(self, queryset, query):
+        return queryset
+
+    # Schema management, called from migrations and after ``migrate``.
+
+    def install(self, schema_editor):
+        """Create the indexes or shadow tables this backend relies on."""
+
+    def uninstall(self, schema_editor):
+        """Drop everything created by ``install``."""
+
+    def repair(self, schema_editor):
+        """Restore structures that schema changes may have dropped."""
+
+    def suspend(self, schema_editor):
+        """Stop maintaining the index row by row, ahead of a bulk load."""
+
+    def resume(self, schema_editor):
+        """Bring the index back in line after ``suspend`` and the load."""
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    Trigram-indexed substring matching with ``tsvector`` relevance ranking.
+    """
+    vendor = 'postgresql'
+
+    def rank(self, queryset, query):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        vector = SearchVector(*self.spec.fields, config='simple')
+        return queryset.annotate(
+            search_rank=SearchRank(vector, SearchQuery(query, config='simple'))
+        ).order_by('-search_rank', *self.spec.fields[:1], self.spec.pk)
+
+    def install(self, schema_editor):
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        self._create_indexes(schema_editor)
+
+    def _create_indexes(self, schema_editor):
+        quote = schema_editor.quote_name
+        for field in self.spec.fields:
+            # Match the expression Django emits for icontains so the planner
+            # can serve those lookups from the index.
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {quote(self.spec.index_name(field, 'trgm'))} "
+                f"ON {quote(self.spec.table)} USING gin (UPPER({quote(field)}::text) gin_trgm_ops)"
+            )
+
+    def uninstall(self, schema_editor):
+        quote = schema_editor.quote_name
+        for field in self.spec.fields:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {quote(self.spec.index_name(field, 'trgm'))}")
+
+    def repair(self, schema_editor):
+        # Re-create indexes an interrupted bulk load left dropped.
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            if cursor.fetchone() is not None:
+                self._create_indexes(schema_editor)
+
+    # Building a GIN index once is far cheaper than updating it per row.
+    suspend = uninstall
+    resume = install
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """
+    FTS5 trigram shadow table kept in sync with the base table by triggers.
+    """
+    vendor = 'sqlite'
+    triggers = ('ai', 'ad', 'au')
+
+    def __init__(self, spec, using=DEFAULT_DB_ALIAS):
+        super().__init__(spec, using)
+        self._available = None
+
+    @staticmethod
+    def _phrase(query):
+        return '"' + query.replace('"', '""') + '"'
+
+    def is_available(self):
+        """Return True if the shadow table and its sync triggers exist."""
+        if self._available is None:
+            self._available = self._installed(connections[self.using])
+        return self._available
+
+    def _installed(self, connection):
+        fts = self.spec.fts_table
+        names = [fts] + [f"{fts}_{trigger}" for trigger in self.triggers]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE name IN (%s)" % ', '.join(['%s'] * len(names)),
+                names,
+            )
+            return cursor.fetchone()[0] == len(names)
+
+    def _usable(self, query):
+        return len(query) >= MIN_TRIGRAM_QUERY_LENGTH and self.is_available()
+
+    def filter(self, queryset, query):
+        if not self._usable(query):
+            return super().filter(queryset, query)
+        spec = self.spec
+        return queryset.filter(**{f"{spec.pk}__in": RawSQL(
+            f'SELECT "{spec.pk}" FROM "{spec.table}" WHERE rowid IN '
+            f'(SELECT rowid FROM "{spec.fts_table}" WHERE "{spec.fts_table}" MATCH %s)',
+            [self._phrase(query)],
+        )})
+
+    def rank(self, queryset, query):
+        if not self._usable(query):
+            return super().rank(queryset, query)
+        spec = self.spec
+        # bm25() scores are negative; lower means more relevant.
+        return queryset.annotate(search_rank=RawSQL(
+            f'SELECT bm25("{spec.fts_table}") FROM "{spec.fts_table}" '
+            f'WHERE "{spec.fts_table}" MATCH %s AND "{spec.fts_table}".rowid = "{spec.table}".rowid',
+            [self._phrase(query)],
+        )).order_by('search_rank', *spec.fields[:1], spec.pk)
+
+    def install(self, schema_editor):
+        spec = self.spec
+        fts = spec.fts_table
+        columns = ', '.join(spec.fields)
+        new_values = ', '.join(f"new.{field}" for field in spec.fields)
+        old_values = ', '.join(f"old.{field}" for field in spec.fields)
+        if self._installed(schema_editor.connection):
+            return
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{columns}, content='{spec.table}', content_rowid='rowid', tokenize='trigram')"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {spec.table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.rowid, {new_values}); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {spec.table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.rowid, {old_values}); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {columns} ON {spec.table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.rowid, {old_values}); "
+            f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.rowid, {new_values}); END"
+        )
+        # Triggers are dropped whenever Django remakes the base table, so
+        # re-index from scratch every time they have to be (re)created.
+        schema_editor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        self._available = None
+
+    def repair(self, schema_editor):
+        # Django remakes SQLite tables on most ALTERs, silently dropping the
+        # sync triggers; reinstall them if the shadow table is still there.
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [self.spec.fts_table])
+            if cursor.fetchone() is not None:
+                self.install(schema_editor)
+
+    def suspend(self, schema_editor):
+        # Without the insert trigger the shadow table falls behind; ``resume``
+        # re-creates it, which rebuilds the whole index in one pass.
+        if self._installed(schema_editor.connection):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {self.spec.fts_table}_ai")
+            self._available = None
+
+    def resume(self, schema_editor):
+        self.repair(schema_editor)
+
+    def uninstall(self, schema_editor):
+        fts = self.spec.fts_table
+        for trigger in self.triggers:
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts}_{trigger}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {fts}")
+        self._available = None
+
+
+BACKENDS_BY_VENDOR = {
+    backend.vendor: backend for backend in (PostgresSearchBackend, SQLiteSearchBackend)
+}
+
+_backends = {}
+
+
+def get_search_backend_class(using=DEFAULT_DB_ALIAS):
+    """
+    Resolve the backend class from the ``SEARCH_BACKEND`` setting.
+
+    ``'auto'`` picks the native backend for the connection's engine, ``'orm'``
+    forces plain ``icontains`` lookups, anything else is a dotted import path.
+    """
+    path = getattr(settings, 'SEARCH_BACKEND', 'auto')
+    if path == 'auto':
+        return BACKENDS_BY_VENDOR.get(connections[using].vendor, SearchBackend)
+    if path == 'orm':
+        return SearchBackend
+    return import_string(path)
+
+
+def _get_backend(backend_class, spec, using):
+    key = (backend_class, spec.table, using)
+    backend = _backends.get(key)
+    if backend is None:
+        backend = _backends[key] = backend_class(spec, using)
+    return backend
+
+
+def get_search_backend(spec, using=DEFAULT_DB_ALIAS):
+    """Return the (cached) search backend for ``spec`` on database ``using``."""
+    return _get_backend(get_search_backend_class(using), spec, using)
+
+
+def install_search_index(schema_editor, spec):
+    """Create the native search structures for ``spec``; safe to call repeatedly."""
+    connection = schema_editor.connection
+    backend_class = BACKENDS_BY_VENDOR.get(connection.vendor, SearchBackend)
+    _get_backend(backend_class, spec, connection.alias).install(schema_editor)
+
+
+def uninstall_search_index(schema_editor, spec):
+    """Drop the native search structures for ``spec``."""
+    connection = schema_editor.connection
+    backend_class = BACKENDS_BY_VENDOR.get(connection.vendor, SearchBackend)
+    _get_backend(backend_class, spec, connection.alias).uninstall(schema_editor)
+
+
+def suspend_search_index(connection, spec):
+    """Pause per-row search index maintenance for a bulk load into ``spec``."""
+    backend_class = BACKENDS_BY_VENDOR.get(connection.vendor, SearchBackend)
+    with connection.schema_editor() as schema_editor:
+        _get_backend(backend_class, spec, connection.alias).suspend(schema_editor)
+
+
+def resume_search_index(connection, spec):
+    """Catch the search index up after ``suspend_search_index``."""
+    backend_class = BACKENDS_BY_VENDOR.get(connection.vendor, SearchBackend)
+    with connection.schema_editor() as schema_editor:
+        _get_backend(backend_class, spec, connection.alias).resume(schema_editor)
+
+
+def repair_search_index(connection, spec, migration=None):
+    """
+    Re-create search structures dropped by later schema changes or an
+    interrupted bulk load, if any. When ``migration`` (``(app_label, name)``
+    of the migration installing them) is given, nothing is done until it has
+    been applied.
+    """
+    if migration is not None and migration not in MigrationRecorder(connection).applied_migrations():
+        return
+    backend_class = BACKENDS_BY_VENDOR.get(connection.vendor, SearchBackend)
+    with connection.schema_editor() as schema_editor:
+        _get_backend(backend_class, spec, connection.alias).repair(schema_editor)
+
+
+SETTINGS_SEARCH = SearchSpec(table='phone_book_common_settings', fields=('key', 'value', 'description'))
+
+
+def search_settings(queryset, query, ranked=False):
+    """
+    Filter a CommonSettings queryset by key, value or description substring.
+
+    When ``ranked`` is true the rows are ordered by relevance, then key.
+    """
+    return get_search_backend(SETTINGS_SEARCH, using=queryset.db).search(queryset, query, ranked=ranked)
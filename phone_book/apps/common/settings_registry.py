@@ -0,0 +1,134 @@
+"""
+Process-local registry of the live ``CommonSettings``.
+
+All rows are loaded into an immutable snapshot that lookups read without a
+query. Every write bumps a version key in the shared cache once its
+transaction commits. Each worker compares that version with its snapshot's
+at most every ``COMMON_SETTINGS_CHECK_INTERVAL`` seconds and reloads when
+they differ, so a change reaches every worker within that interval.
+
+When the cache is unavailable there is no version to compare. Snapshots are
+then simply reloaded every ``COMMON_SETTINGS_POLL_INTERVAL`` seconds.
+"""
+import logging
+import threading
+import time
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'common:settings:version'
+
+
+def _initial_version():
+    # Seed from the clock so a lost counter never repeats an old version.
+    return int(time.time() * 1000)
+
+
+def get_settings_version():
+    """Return the shared settings version, or None if the cache is down."""
+    try:
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, _initial_version(), timeout=None)
+            version = cache.get(VERSION_KEY)
+        return version
+    except Exception:
+        logger.warning("Could not read the common settings version", exc_info=True)
+        return None
+
+
+def bump_settings_version():
+    try:
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.add(VERSION_KEY, _initial_version(), timeout=None)
+    except Exception:
+        logger.warning("Could not bump the common settings version", exc_info=True)
+
+
+class SettingsSnapshot:
+    """Read-only view of the live settings at one version."""
+
+    def __init__(self, rows, version):
+        self.values = MappingProxyType({key: value for key, value, _ in rows})
+        self.public_keys = frozenset(key for key, _, is_public in rows if is_public)
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+    def public(self):
+        return {key: self.values[key] for key in self.public_keys}
+
+
+class SettingsRegistry:
+    def __init__(self):
+        self._snapshot = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """Return the current snapshot, reloading it if it is out of date."""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() < self._next_check:
+            return snapshot
+        with self._lock:
+            now = time.monotonic()
+            if self._snapshot is not None and now < self._next_check:
+                return self._snapshot
+            # Read the version before the rows: a write that lands in between
+            # leaves a newer version behind and causes another reload.
+            version = get_settings_version()
+            snapshot = self._snapshot
+            if snapshot is None or not self._is_current(snapshot, version, now):
+                snapshot = self._snapshot = self.load(version)
+            self._next_check = now + getattr(settings, 'COMMON_SETTINGS_CHECK_INTERVAL', 1.0)
+            return snapshot
+
+    @staticmethod
+    def _is_current(snapshot, version, now):
+        if version is None:
+            poll_interval = getattr(settings, 'COMMON_SETTINGS_POLL_INTERVAL', 30.0)
+            return snapshot.version is None and now < snapshot.loaded_at + poll_interval
+        return version == snapshot.version
+
+    @staticmethod
+    def load(version):
+        from .models import CommonSettings
+
+        rows = list(CommonSettings.objects.order_by().values_list('key', 'value', 'is_public'))
+        return SettingsSnapshot(rows, version)
+
+    def invalidate(self):
+        """Reload this process's snapshot on the next read."""
+        self._snapshot = None
+
+    def get(self, key, default=None):
+        return self.snapshot().values.get(key, default)
+
+    def __contains__(self, key):
+        return key in self.snapshot().values
+
+
+registry = SettingsRegistry()
+get_setting = registry.get
+
+
+def _settings_changed():
+    registry.invalidate()
+    bump_settings_version()
+
+
+def notify_settings_changed():
+    """
+    Refresh the settings snapshot of every worker once the current
+    transaction commits.
+
+    Called from the model signals and from ``CommonSettings`` querysets'
+    bulk writes; code that writes the table any other way must call it.
+    """
+    transaction.on_commit(_settings_changed)
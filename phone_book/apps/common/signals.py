@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db import connections
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .authentication import invalidate_cached_user
+from .models import CommonSettings
+from .permission_cache import notify_permissions_changed
+from .search import SETTINGS_SEARCH, repair_search_index
+from .settings_registry import notify_settings_changed
+from .tokens import sync_blacklisted
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=CommonSettings)
+@receiver(post_delete, sender=CommonSettings)
+def refresh_settings_registry(sender, **kwargs):
+    """Refresh every worker's settings snapshot when a setting changes."""
+    notify_settings_changed()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_permissions_on_m2m_change(sender, action, **kwargs):
+    """Drop cached permission resolutions when memberships or grants change."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        notify_permissions_changed()
+
+
+# Deleting a group or permission removes its m2m rows without m2m_changed.
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def invalidate_permissions_on_change(sender, **kwargs):
+    notify_permissions_changed()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_authenticated_user(sender, instance, **kwargs):
+    """Stop serving a changed or deleted user from the authentication cache."""
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def cache_blacklisted_token(sender, instance, **kwargs):
+    """Mirror a blacklisting into the blacklist cache."""
+    sync_blacklisted(instance.token.jti, instance.token.expires_at.timestamp())
+
+
+@receiver(post_delete, sender=BlacklistedToken)
+def uncache_blacklisted_token(sender, instance, **kwargs):
+    """Mirror a removal from the blacklist, e.g. through the admin."""
+    sync_blacklisted(instance.token.jti, instance.token.expires_at.timestamp(), blacklisted=False)
+
+
+def repair_settings_search_index(sender, using, **kwargs):
+    """Reinstall search sync triggers that a table rebuild may have dropped."""
+    repair_search_index(connections[using], SETTINGS_SEARCH, ('common', '0003_settings_search_index'))
@@ -0,0 +1,201 @@
+"""
+Single-flight execution: concurrent calls with the same key share one result.
+
+The first caller for a key (the leader) runs the function; callers that
+arrive while it is in flight wait for and reuse its result instead of running
+the same query again. Sync and async callers share the same in-flight table.
+
+With ``SINGLEFLIGHT_DISTRIBUTED`` enabled, leaders in different worker
+processes additionally coordinate through the shared cache: one of them takes
+a short lock (``cache.add``, i.e. ``SET NX`` on Redis), runs the function and
+publishes the result; the others poll for it for up to
+``SINGLEFLIGHT_WAIT_TIMEOUT_MS`` before running the function themselves.
+Results must therefore be picklable and treated as read-only by callers.
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.01
+_MISSING = object()
+
+
+class _Abandoned(Exception):
+    """Set on a flight whose async leader was cancelled before finishing."""
+
+
+class SingleFlight:
+    """
+    A named group of coalesced calls with execution counters.
+
+    Counters:
+        executions: Calls that ran the function.
+        coalesced: Calls served by an in-flight call of the same process.
+        remote: Calls served by a result another worker published.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._counters = {'executions': 0, 'coalesced': 0, 'remote': 0}
+        _registry[name] = self
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['in_flight'] = len(self._flights)
+        stats['saved'] = stats['coalesced'] + stats['remote']
+        return stats
+
+    def _join(self, key):
+        """Return ``(future, is_leader)`` for ``key``."""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self._counters['coalesced'] += 1
+                return future, False
+            future = self._flights[key] = Future()
+            # A running future cannot be cancelled by a waiter that gives up.
+            future.set_running_or_notify_cancel()
+            return future, True
+
+    def _leave(self, key, future):
+        with self._lock:
+            if self._flights.get(key) is future:
+                del self._flights[key]
+
+    def do(self, key, func, *args, **kwargs):
+        """Return ``func(*args, **kwargs)``, sharing it with concurrent calls for ``key``."""
+        while True:
+            future, is_leader = self._join(key)
+            if not is_leader:
+                try:
+                    return future.result()
+                except _Abandoned:
+                    continue
+            try:
+                result = self._execute(key, func, args, kwargs)
+            except BaseException as exc:
+                future.set_exception(exc)
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                self._leave(key, future)
+
+    async def ado(self, key, func, *args, **kwargs):
+        """Async ``do``: awaits ``func(*args, **kwargs)`` once per key."""
+        while True:
+            future, is_leader = self._join(key)
+            if not is_leader:
+                try:
+                    return await asyncio.wrap_future(future)
+                except _Abandoned:
+                    continue
+            try:
+                result = await self._aexecute(key, func, args, kwargs)
+            except asyncio.CancelledError:
+                # Only this caller went away; let a waiter take over.
+                future.set_exception(_Abandoned())
+                raise
+            except BaseException as exc:
+                future.set_exception(exc)
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                self._leave(key, future)
+
+    # Cross-process coordination through the shared cache.
+
+    @property
+    def distributed(self):
+        return getattr(settings, 'SINGLEFLIGHT_DISTRIBUTED', False)
+
+    def _cache_keys(self, key):
+        digest = hashlib.md5(str(key).encode()).hexdigest()
+        return f"singleflight:{self.name}:lock:{digest}", f"singleflight:{self.name}:result:{digest}"
+
+    def _wait_timeout(self):
+        return getattr(settings, 'SINGLEFLIGHT_WAIT_TIMEOUT_MS', 2000) / 1000
+
+    def _try_lock(self, lock_key):
+        try:
+            return cache.add(lock_key, 1, timeout=max(1, int(self._wait_timeout() * 2)))
+        except Exception:
+            logger.warning("Single-flight lock unavailable for %s", lock_key, exc_info=True)
+            return True
+
+    def _publish(self, lock_key, result_key, result):
+        try:
+            cache.set(result_key, result, timeout=max(1, int(self._wait_timeout() * 2)))
+            cache.delete(lock_key)
+        except Exception:
+            logger.warning("Could not publish single-flight result %s", result_key, exc_info=True)
+
+    def _poll(self, result_key):
+        try:
+            return cache.get(result_key, _MISSING)
+        except Exception:
+            return _MISSING
+
+    def _execute(self, key, func, args, kwargs):
+        if not self.distributed:
+            self._count('executions')
+            return func(*args, **kwargs)
+        lock_key, result_key = self._cache_keys(key)
+        deadline = time.monotonic() + self._wait_timeout()
+        while not self._try_lock(lock_key):
+            result = self._poll(result_key)
+            if result is not _MISSING:
+                self._count('remote')
+                return result
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(POLL_INTERVAL)
+        self._count('executions')
+        result = func(*args, **kwargs)
+        self._publish(lock_key, result_key, result)
+        return result
+
+    async def _aexecute(self, key, func, args, kwargs):
+        if not self.distributed:
+            self._count('executions')
+            return await func(*args, **kwargs)
+        lock_key, result_key = self._cache_keys(key)
+        deadline = time.monotonic() + self._wait_timeout()
+        while not await asyncio.to_thread(self._try_lock, lock_key):
+            result = await asyncio.to_thread(self._poll, result_key)
+            if result is not _MISSING:
+                self._count('remote')
+                return result
+            if time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(POLL_INTERVAL)
+        self._count('executions')
+        result = await func(*args, **kwargs)
+        await asyncio.to_thread(self._publish, lock_key, result_key, result)
+        return result
+
+
+_registry = {}
+
+
+def get_singleflight_stats():
+    """Counters of every ``SingleFlight`` group in this process, by name."""
+    return {name: group.stats() for name, group in sorted(_registry.items())}
@@ -1,3 +1,558 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import json
+import os
+import tempfile
+import threading
+from urllib.parse import parse_qsl, urlsplit
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache
+from django.db import connection
+from django.forms import modelform_factory
+from django.http import HttpResponse, JsonResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from middlewares.response_middleware import APIResponseMiddleware
+from .authentication import CachedJWTAuthentication
+from .encoders import get_json_dumps, orjson
+from .filters import CommonSettingsFilterSet
+from .ids import ENCODING, ULIDGenerator, new_ulid
+from .metrics import Counter, Histogram, Registry
+from .models import CommonSettings
+from .pagination import GenericPagination
+from .permissions import (
+    DynamicPermission, HasGroupPermission, ReadOnlyPermission, user_has_permission, user_in_group,
+)
+from .responses import EnvelopedJsonResponse
+from .search import SETTINGS_SEARCH, get_search_backend
+from .settings_registry import SettingsRegistry, get_settings_version
+from .singleflight import SingleFlight
+from .tokens import CachedRefreshToken
+
+# Crockford base32 to the digits int() understands
+DECODE = str.maketrans(ENCODING, '0123456789abcdefghijklmnopqrstuv')
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class GenericPaginationCountStrategyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(25):
+            CommonSettings.objects.create(key=f'setting.{i:02d}', value=str(i))
+
+    def paginate(self, **params):
+        request = Request(APIRequestFactory().get('/settings/', params))
+        paginator = GenericPagination()
+        rows = paginator.paginate_queryset(CommonSettings.objects.order_by('key'), request)
+        return json.loads(paginator.get_paginated_response([r.key for r in rows]).content)['response_data']
+
+    def test_exact_count(self):
+        data = self.paginate()
+        self.assertEqual((data['count'], data['count_strategy']), (25, 'exact'))
+        self.assertIsNotNone(data['next'])
+
+    def test_cached_count_is_reused(self):
+        self.assertEqual(self.paginate(count='cached')['count_strategy'], 'exact')
+        with self.assertNumQueries(1):
+            data = self.paginate(count='cached', page=2)
+        self.assertEqual((data['count'], data['count_strategy']), (25, 'cached'))
+
+    def test_estimate_falls_back_to_exact_off_postgres(self):
+        data = self.paginate(count='estimate')
+        self.assertEqual((data['count'], data['count_strategy']), (25, 'exact'))
+
+    def test_no_count_pages_with_cursors(self):
+        with self.assertNumQueries(1):
+            data = self.paginate(count='none')
+        self.assertEqual((data['count'], data['count_strategy']), (None, 'none'))
+        self.assertIsNone(data['previous'])
+        params = dict(parse_qsl(urlsplit(data['next']).query))
+        # Deep pages seek past the cursor instead of scanning OFFSET rows.
+        with self.assertNumQueries(1) as queries:
+            data = self.paginate(**params)
+        self.assertNotIn('OFFSET', queries.captured_queries[0]['sql'])
+        self.assertEqual(data['results'], [f'setting.{i}' for i in range(10, 20)])
+        previous = self.paginate(**dict(parse_qsl(urlsplit(data['previous']).query)))
+        self.assertEqual(previous['results'], [f'setting.{i:02d}' for i in range(10)])
+        with self.assertRaises(NotFound):
+            self.paginate(count='none', cursor='junk')
+
+    def test_no_count_uses_lookahead_for_page_numbers(self):
+        with self.assertNumQueries(1):
+            data = self.paginate(count='none', page=3)
+        self.assertEqual((data['count'], data['count_strategy']), (None, 'none'))
+        self.assertEqual(data['results'], [f'setting.{i}' for i in range(20, 25)])
+        self.assertIsNone(data['next'])
+        self.assertIsNotNone(self.paginate(count='none', page=2)['next'])
+
+
+class APIResponseMiddlewareTests(SimpleTestCase):
+    def process(self, path, response):
+        return APIResponseMiddleware(lambda request: response)(RequestFactory().get(path))
+
+    def test_enveloped_responses_pass_through(self):
+        response = EnvelopedJsonResponse({'results': [1]}, message='Done')
+        self.assertIs(self.process('/api/phonebook/lookup/', response), response)
+        self.assertEqual(json.loads(response.content), {
+            'response_status': 'success', 'response_description': 'Done', 'response_data': {'results': [1]},
+        })
+
+    def test_plain_json_responses_are_wrapped(self):
+        wrapped = self.process('/api/phonebook/lookup/', JsonResponse({'detail': 'Nope'}, status=404))
+        self.assertEqual(json.loads(wrapped.content)['response_status'], 'error')
+        self.assertEqual(json.loads(wrapped.content)['response_data'], {'detail': 'Nope'})
+
+    def test_only_the_root_path_is_skipped_exactly(self):
+        response = HttpResponse(status=500, content_type='text/plain')
+        self.assertIs(self.process('/', response), response)
+        self.assertIs(self.process('/static/app.css', response), response)
+        self.assertIsNot(self.process('/api/phonebook/v1/', response), response)
+
+    @override_settings(BASE_PREFIX='dev')
+    def test_skip_paths_honour_base_prefix(self):
+        response = HttpResponse(status=500, content_type='text/plain')
+        self.assertIs(self.process('/dev/', response), response)
+        self.assertIs(self.process('/dev/admin/', response), response)
+
+
+class JSONEncoderTests(SimpleTestCase):
+    def test_encoders_agree_on_non_json_types(self):
+        payload = {
+            'price': Decimal('1.50'),
+            'at': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            'label': gettext_lazy('Phone'),
+            1: 'integer key',
+        }
+        expected = json.loads(get_json_dumps('stdlib')(payload))
+        self.assertEqual(expected['at'], '2024-05-01T12:30:15.123Z')
+        if orjson is not None:
+            self.assertEqual(json.loads(get_json_dumps('orjson')(payload)), expected)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight('test.threads')
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def query():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return ['row']
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do('q', query)))
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=lambda: results.append(flight.do('q', query))) for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        while flight.stats()['coalesced'] < 3:
+            threading.Event().wait(0.001)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+        self.assertEqual(results, [['row']] * 4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.stats(), {'executions': 1, 'coalesced': 3, 'remote': 0, 'in_flight': 0, 'saved': 3})
+        # Nothing is cached once the flight has landed.
+        flight.do('q', query)
+        self.assertEqual(len(calls), 2)
+
+    def test_errors_reach_every_waiter(self):
+        flight = SingleFlight('test.errors')
+        with self.assertRaises(ZeroDivisionError):
+            flight.do('q', lambda: 1 / 0)
+        self.assertEqual(flight.stats()['in_flight'], 0)
+
+    def test_async_waiters_take_over_from_a_cancelled_leader(self):
+        flight = SingleFlight('test.async')
+        calls = []
+
+        async def query(delay):
+            calls.append(delay)
+            await asyncio.sleep(delay)
+            return delay
+
+        async def scenario():
+            leader = asyncio.ensure_future(flight.ado('q', query, 10))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.ado('q', query, 0))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        self.assertEqual(asyncio.run(scenario()), 0)
+        self.assertEqual(calls, [10, 0])
+        self.assertEqual(flight.stats()['executions'], 2)
+
+    @override_settings(CACHES=LOCMEM_CACHES, SINGLEFLIGHT_DISTRIBUTED=True, SINGLEFLIGHT_WAIT_TIMEOUT_MS=200)
+    def test_distributed_waiters_reuse_another_workers_result(self):
+        flight = SingleFlight('test.distributed')
+        other_worker = SingleFlight('test.distributed')
+        lock_key, result_key = flight._cache_keys('q')
+        from django.core.cache import cache
+        cache.add(lock_key, 1)
+        threading.Timer(0.02, cache.set, (result_key, ['remote'])).start()
+        self.assertEqual(flight.do('q', lambda: ['local']), ['remote'])
+        self.assertEqual(flight.stats()['remote'], 1)
+        # Without a published result the waiter falls back to running it.
+        cache.clear()
+        cache.add(lock_key, 1)
+        self.assertEqual(other_worker.do('q', lambda: ['local']), ['local'])
+        self.assertEqual(other_worker.stats()['executions'], 1)
+
+
+class MetricsRegistryTests(SimpleTestCase):
+    def setUp(self):
+        self.registry = Registry()
+        self.latency = Histogram(self.registry, 'test_seconds', 'Latency.', ('view',), buckets=(0.1, 1))
+        self.hits = Counter(self.registry, 'test_total', 'Hits.', ('view',))
+
+    def test_threads_record_into_shards_summed_on_scrape(self):
+        def work():
+            for value in (0.05, 0.1, 0.5, 3):
+                self.latency.observe(value, 'list')
+            self.hits.inc('list', amount=2)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        text = self.registry.expose()
+        self.assertIn('# TYPE test_seconds histogram', text)
+        self.assertIn('test_seconds_bucket{view="list",le="0.1"} 8', text)
+        self.assertIn('test_seconds_bucket{view="list",le="1"} 12', text)
+        self.assertIn('test_seconds_bucket{view="list",le="+Inf"} 16', text)
+        self.assertIn('test_seconds_count{view="list"} 16', text)
+        self.assertIn('test_seconds_sum{view="list"} 14.6', text)
+        self.assertIn('test_total{view="list"} 8', text)
+
+    def test_exited_threads_are_folded_into_the_base_shard(self):
+        for _ in range(3):
+            threads = [threading.Thread(target=self.hits.inc, args=('list',)) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertIn('test_total{view="list"} 30', self.registry.expose())
+        self.assertEqual(self.registry._shards, {})
+        self.hits.inc('list')
+        self.assertEqual(len(self.registry._shards), 1)
+        self.assertIn('test_total{view="list"} 31', self.registry.expose())
+
+    def test_label_values_are_escaped(self):
+        self.hits.inc('a"b\\c')
+        self.assertIn('test_total{view="a\\"b\\\\c"} 1', self.registry.expose())
+
+    def test_worker_files_are_added_up(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_MULTIPROC_DIR=directory):
+            self.hits.inc('list')
+            with open(os.path.join(directory, 'metrics_99999.json'), 'w') as handle:
+                json.dump([['test_total', ['list'], [4]], ['unknown_metric', [], [1]]], handle)
+            text = self.registry.expose()
+            self.assertIn(f'metrics_{os.getpid()}.json', os.listdir(directory))
+        self.assertIn('test_total{view="list"} 5', text)
+        self.assertNotIn('unknown_metric', text)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class MetricsEndpointTests(TestCase):
+    def test_requests_are_measured_per_view_and_status(self):
+        self.client.get(reverse('phonebook-list'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn(
+            'phonebook_http_request_duration_seconds_count{view="phonebook-list",method="GET",status="200"}',
+            response.content.decode(),
+        )
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_is_required_when_configured(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+
+class ULIDTests(SimpleTestCase):
+    def test_ids_increase_within_a_millisecond(self):
+        generator = ULIDGenerator()
+        ids = [generator.new() for _ in range(2000)] + generator.new_many(2000)
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertTrue(all(len(pk) == 26 and set(pk) <= set(ENCODING) for pk in ids))
+
+    def test_unique_across_threads(self):
+        ids = []
+        threads = [threading.Thread(target=lambda: ids.extend(new_ulid() for _ in range(1000))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(ids)), 4000)
+
+    def test_counter_overflow_moves_to_the_next_millisecond(self):
+        generator = ULIDGenerator()
+        first = generator.new()
+        generator._last_ms += 10  # Ahead of the clock, so the counter is used.
+        generator._last_random = (1 << 80) - 1
+        second = generator.new()
+        self.assertGreater(second, first)
+        self.assertEqual(generator._last_ms, int(first[:10].translate(DECODE), 32) + 11)
+
+    def test_reset_after_fork_starts_a_new_sequence(self):
+        generator = ULIDGenerator()
+        generator.new()
+        generator.reset()
+        self.assertEqual((generator._last_ms, generator._last_random), (0, 0))
+        self.assertEqual(len(generator.new()), 26)
+
+
+class BaseModelIdTests(TestCase):
+    def test_bulk_create_assigns_ordered_ids(self):
+        rows = CommonSettings.objects.bulk_create(
+            CommonSettings(key=f'setting-{i}', value=str(i)) for i in range(50)
+        )
+        ids = [row.pk for row in rows]
+        self.assertTrue(all(ids))
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(
+            list(CommonSettings.objects.order_by('pk').values_list('key', flat=True)),
+            [f'setting-{i}' for i in range(50)],
+        )
+
+    def test_save_assigns_an_id_after_bulk_rows(self):
+        bulk = CommonSettings.objects.bulk_create([CommonSettings(key='a', value='1')])[0]
+        single = CommonSettings.objects.create(key='b', value='2')
+        self.assertGreater(single.pk, bulk.pk)
+
+
+class SoftDeleteTests(TestCase):
+    def setUp(self):
+        CommonSettings.objects.bulk_create(CommonSettings(key=f'setting-{i}', value=str(i)) for i in range(5))
+
+    def test_queryset_soft_delete_and_restore_use_one_update(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(CommonSettings.objects.filter(key__in=['setting-0', 'setting-1']).soft_delete(), 2)
+        self.assertEqual(CommonSettings.objects.count(), 3)
+        self.assertEqual(CommonSettings.all_objects.deleted().count(), 2)
+        self.assertTrue(all(row.deleted_at for row in CommonSettings.all_objects.deleted()))
+        with self.assertNumQueries(1):
+            self.assertEqual(CommonSettings.all_objects.restore(), 2)
+        self.assertEqual(CommonSettings.objects.count(), 5)
+        self.assertFalse(CommonSettings.all_objects.filter(deleted_at__isnull=False).exists())
+
+    def test_instance_soft_delete_only_writes_its_fields(self):
+        setting = CommonSettings.objects.get(key='setting-0')
+        setting.value = 'unsaved'
+        setting.soft_delete()
+        self.assertFalse(CommonSettings.objects.filter(key='setting-0').exists())
+        stored = CommonSettings.all_objects.get(key='setting-0')
+        self.assertTrue(stored.is_deleted)
+        self.assertEqual(stored.value, '0')
+        stored.restore()
+        self.assertTrue(CommonSettings.objects.filter(key='setting-0').exists())
+
+    def test_objects_hides_soft_deleted_rows(self):
+        CommonSettings.objects.filter(key='setting-4').soft_delete()
+        self.assertNotIn('setting-4', CommonSettings.objects.values_list('key', flat=True))
+        self.assertIn('setting-4', CommonSettings.all_objects.values_list('key', flat=True))
+        self.assertIs(CommonSettings._default_manager, CommonSettings.all_objects)
+        # objects never returns deleted rows, so restoring through it is a no-op.
+        self.assertEqual(CommonSettings.objects.restore(), 0)
+
+    def test_unique_checks_see_soft_deleted_rows(self):
+        CommonSettings.objects.filter(key='setting-0').soft_delete()
+        form_class = modelform_factory(CommonSettings, fields=['key', 'value'])
+        form = form_class(data={'key': 'setting-0', 'value': 'new'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('key', form.errors)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, COMMON_SETTINGS_CHECK_INTERVAL=0)
+class SettingsRegistryTests(TestCase):
+    def setUp(self):
+        CommonSettings.objects.create(key='feature.search', value='on', is_public=True)
+        CommonSettings.objects.create(key='secret', value='hidden')
+
+    def test_lookups_are_served_without_queries(self):
+        registry = SettingsRegistry()
+        registry.snapshot()
+        with self.assertNumQueries(0):
+            self.assertEqual(registry.get('feature.search'), 'on')
+            self.assertIsNone(registry.get('missing'))
+            self.assertEqual(registry.snapshot().public(), {'feature.search': 'on'})
+        with self.assertRaises(TypeError):
+            registry.snapshot().values['secret'] = 'changed'
+
+    def test_writes_refresh_other_workers(self):
+        worker = SettingsRegistry()
+        self.assertEqual(worker.get('secret'), 'hidden')
+        version = get_settings_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            CommonSettings.objects.filter(key='secret').update(value='rotated')
+        self.assertGreater(get_settings_version(), version)
+        self.assertEqual(worker.get('secret'), 'rotated')
+        with self.captureOnCommitCallbacks(execute=True):
+            CommonSettings.objects.filter(key='secret').soft_delete()
+        self.assertNotIn('secret', worker)
+
+    @override_settings(COMMON_SETTINGS_CHECK_INTERVAL=60)
+    def test_version_is_checked_once_per_interval(self):
+        worker = SettingsRegistry()
+        worker.snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            CommonSettings.objects.create(key='new', value='1')
+        self.assertIsNone(worker.get('new'))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_polls_the_database_without_a_cache(self):
+        worker = SettingsRegistry()
+        worker.snapshot()
+        CommonSettings.objects.create(key='new', value='1')
+        with self.assertNumQueries(0):
+            self.assertIsNone(worker.get('new'))
+        with override_settings(COMMON_SETTINGS_POLL_INTERVAL=0):
+            self.assertEqual(worker.get('new'), '1')
+
+
+class SettingsSearchTests(TestCase):
+    def setUp(self):
+        CommonSettings.objects.create(key='mail.sender', value='noreply@example.com', description='Address outgoing mail is sent from')
+        CommonSettings.objects.create(key='signup.open', value='true', description='Allow mail signups')
+        CommonSettings.objects.create(key='theme', value='dark', description='Colour scheme')
+
+    def search(self, value):
+        filterset = CommonSettingsFilterSet(data={'search': value}, queryset=CommonSettings.objects.all())
+        return list(filterset.qs.values_list('key', flat=True))
+
+    def test_matches_substrings_of_key_value_and_description(self):
+        self.assertEqual(sorted(self.search('MAIL')), ['mail.sender', 'signup.open'])
+        self.assertEqual(self.search('example.com'), ['mail.sender'])
+        self.assertEqual(self.search('colour'), ['theme'])
+        # Shorter than a trigram: served by plain lookups
+        self.assertEqual(self.search('da'), ['theme'])
+
+    def test_uses_the_search_index_and_orders_by_relevance(self):
+        backend = get_search_backend(SETTINGS_SEARCH)
+        if connection.vendor == 'sqlite':
+            self.assertTrue(backend.is_available())
+        self.assertEqual(self.search('mail')[0], 'mail.sender')
+
+    def test_soft_deleted_rows_are_not_found(self):
+        CommonSettings.objects.filter(key='theme').soft_delete()
+        self.assertEqual(self.search('dark'), [])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PermissionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(name='editors')
+        self.permission = Permission.objects.get(codename='change_commonsettings')
+        self.user = User.objects.create_user('editor', password='secret')
+
+    def fresh_user(self):
+        # A new object, as the next request would load
+        return User.objects.get(pk=self.user.pk)
+
+    def test_resolved_once_per_request_and_then_from_the_cache(self):
+        self.user.groups.add(self.group)
+        user = self.fresh_user()
+        with self.assertNumQueries(3):  # groups, user and group permissions
+            self.assertTrue(user_in_group(user, 'editors'))
+            self.assertFalse(user_in_group(user, 'admins'))
+            self.assertFalse(user_has_permission(user, 'common.change_commonsettings'))
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user_in_group(user, 'editors'))
+
+    def test_membership_and_grant_changes_invalidate(self):
+        self.assertFalse(user_in_group(self.fresh_user(), 'editors'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(self.group)
+        self.assertTrue(user_in_group(self.fresh_user(), 'editors'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.permissions.add(self.permission)
+        self.assertTrue(user_has_permission(self.fresh_user(), 'common.change_commonsettings'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.delete()
+        self.assertFalse(user_has_permission(self.fresh_user(), 'common.change_commonsettings'))
+
+    def test_has_group_permission_uses_the_cache(self):
+        self.user.groups.add(self.group)
+        request = Request(APIRequestFactory().get('/'))
+        request.user = self.fresh_user()
+        view = type('View', (), {'required_groups': ['admins', 'editors']})()
+        self.assertTrue(HasGroupPermission().has_permission(request, view))
+        with self.assertNumQueries(0):
+            self.assertTrue(HasGroupPermission().has_permission(request, view))
+
+    def test_dynamic_permission_reuses_permission_instances(self):
+        created = []
+
+        class Counting(ReadOnlyPermission):
+            def __init__(self):
+                created.append(self)
+
+        view = type('View', (), {'action': 'list', 'permission_classes_by_action': {'list': [Counting]}})()
+        request = Request(APIRequestFactory().get('/'))
+        for _ in range(3):
+            self.assertTrue(DynamicPermission().has_permission(request, view))
+        self.assertEqual(len(created), 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CachedAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('reader', password='secret')
+        self.access = str(RefreshToken.for_user(self.user).access_token)
+
+    def authenticate(self):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        return CachedJWTAuthentication().authenticate(request)[0]
+
+    def test_user_is_served_from_the_cache(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authenticate(), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(), self.user)
+
+    def test_saving_the_user_invalidates_the_cached_copy(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_rotated_refresh_token_is_rejected_from_the_cache(self):
+        refresh = str(CachedRefreshToken.for_user(self.user))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('token_refresh'), {'refresh': refresh})
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('token_refresh'), {'refresh': refresh})
+        self.assertEqual(response.status_code, 401)
+
+    def test_blacklist_falls_back_to_the_database(self):
+        token = CachedRefreshToken.for_user(self.user)
+        token.blacklist()  # on_commit never runs here, so the cache has no entry
+        with self.assertRaises(TokenError):
+            CachedRefreshToken(str(token))
+        with self.assertNumQueries(0), self.assertRaises(TokenError):
+            CachedRefreshToken(str(token))
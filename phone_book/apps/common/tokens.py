@@ -0,0 +1,70 @@
+"""
+Refresh tokens whose blacklist check is served from the shared cache.
+
+Every blacklisted ``jti`` has a cache entry until the token expires. Blacklisting
+a token, or removing it from ``token_blacklist``, updates the entry once the
+transaction commits (see ``signals``). A missing entry, e.g. after an eviction,
+falls back to the database and caches its answer with ``cache.add`` so it can
+never overwrite a newer blacklisting.
+"""
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+logger = logging.getLogger(__name__)
+
+
+def _blacklist_key(jti):
+    return f"auth:blacklisted:{jti}"
+
+
+def _timeout(expires_at):
+    # Keep the answer for as long as the token could still be presented.
+    return max(int(expires_at - time.time()), 1)
+
+
+def is_blacklisted(jti, expires_at):
+    """Return True if the token ``jti``, expiring at Unix time ``expires_at``, is blacklisted."""
+    key = _blacklist_key(jti)
+    try:
+        blacklisted = cache.get(key)
+    except Exception:
+        logger.warning("Token blacklist cache read failed for %s", key, exc_info=True)
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+    if blacklisted is None:
+        blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        try:
+            cache.add(key, blacklisted, _timeout(expires_at))
+        except Exception:
+            logger.warning("Token blacklist cache write failed for %s", key, exc_info=True)
+    return blacklisted
+
+
+def _set_blacklisted(jti, expires_at, blacklisted):
+    try:
+        cache.set(_blacklist_key(jti), blacklisted, _timeout(expires_at))
+    except Exception:
+        logger.warning("Token blacklist cache write failed for %s", jti, exc_info=True)
+
+
+def sync_blacklisted(jti, expires_at, blacklisted=True):
+    """Record a change to ``token_blacklist`` once the current transaction commits."""
+    transaction.on_commit(lambda: _set_blacklisted(jti, expires_at, blacklisted))
+
+
+class CachedRefreshToken(RefreshToken):
+    def check_blacklist(self):
+        if is_blacklisted(self.payload[api_settings.JTI_CLAIM], self.payload['exp']):
+            raise TokenError(_("Token is blacklisted"))
+
+
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = CachedRefreshToken
@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import MetricsView, SingleFlightStatsView
+
+urlpatterns = [
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    path('stats/singleflight/', SingleFlightStatsView.as_view(), name='singleflight-stats'),
+]
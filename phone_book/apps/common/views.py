@@ -1,3 +1,34 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views import View
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from .metrics import CONTENT_TYPE, registry
+from .singleflight import get_singleflight_stats
+
+
+class SingleFlightStatsView(APIView):
+    """
+    Query coalescing counters of the process serving the request; ``saved``
+    is the number of executions avoided per group.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_singleflight_stats())
+
+
+class MetricsView(View):
+    """
+    Prometheus scrape endpoint. When ``METRICS_TOKEN`` is set, scrapers must
+    send it as a bearer token.
+    """
+
+    def get(self, request, *args, **kwargs):
+        token = getattr(settings, 'METRICS_TOKEN', '')
+        if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponse(status=401, content_type='text/plain')
+        return HttpResponse(registry.expose(), content_type=CONTENT_TYPE)
@@ -1,5 +1,10 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 class PhoneBookConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'phone_book.apps.phone_book'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        post_migrate.connect(signals.repair_contact_search_index, sender=self)
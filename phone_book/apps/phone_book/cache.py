@@ -0,0 +1,125 @@
+"""
+Shared-cache helpers for contact reads.
+
+Cached entries embed the current contacts generation in their key. Every write
+to the contacts table bumps the generation, so invalidation is a single
+``INCR`` and stale entries are never read again; they simply expire.
+
+The generation doubles as the version stamp for conditional GETs, together
+with the time of the last write (see ``conditional``).
+
+Cache failures are logged and treated as misses so an unavailable Redis never
+takes the read path down with it.
+"""
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'phonebook:generation'
+MODIFIED_KEY = 'phonebook:modified'
+
+
+def normalize_query(query):
+    """Collapse whitespace and case so equivalent queries share one entry."""
+    return ' '.join(query.split()).lower()
+
+
+def _initial_generation():
+    # Seed from the clock so a lost counter never repeats an old generation.
+    return int(time.time() * 1000)
+
+
+def get_generation():
+    """Return the current contacts generation, or None if the cache is down."""
+    try:
+        generation = cache.get(GENERATION_KEY)
+        if generation is None:
+            cache.add(GENERATION_KEY, _initial_generation(), timeout=None)
+            # Unknown history: treat the table as modified now.
+            cache.add(MODIFIED_KEY, time.time(), timeout=None)
+            generation = cache.get(GENERATION_KEY)
+        return generation
+    except Exception:
+        logger.warning("Could not read the contacts cache generation", exc_info=True)
+        return None
+
+
+def bump_generation():
+    """Invalidate every generation-keyed contact entry."""
+    try:
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.add(GENERATION_KEY, _initial_generation(), timeout=None)
+        cache.set(MODIFIED_KEY, time.time(), timeout=None)
+    except Exception:
+        logger.warning("Could not bump the contacts cache generation", exc_info=True)
+
+
+def get_version():
+    """
+    Return ``(generation, last_modified)`` for the contacts table in one cache
+    round trip; ``last_modified`` is a Unix timestamp. Both are None if the
+    cache is down.
+    """
+    try:
+        values = cache.get_many([GENERATION_KEY, MODIFIED_KEY])
+    except Exception:
+        logger.warning("Could not read the contacts version", exc_info=True)
+        return None, None
+    if GENERATION_KEY not in values:
+        return get_generation(), cache_get(MODIFIED_KEY)
+    return values[GENERATION_KEY], values.get(MODIFIED_KEY)
+
+
+def suggestion_cache_key(query):
+    """Return the cache key for a normalized suggestion query, or None."""
+    generation = get_generation()
+    if generation is None:
+        return None
+    digest = hashlib.md5(query.encode('utf-8')).hexdigest()
+    return f"phonebook:suggest:{generation}:{digest}"
+
+
+def cache_get(key):
+    try:
+        return cache.get(key)
+    except Exception:
+        logger.warning("Contacts cache read failed for %s", key, exc_info=True)
+        return None
+
+
+def cache_set(key, value, timeout=None):
+    if timeout is None:
+        timeout = getattr(settings, 'PHONEBOOK_SUGGESTION_CACHE_TIMEOUT', 60)
+    try:
+        cache.set(key, value, timeout)
+    except Exception:
+        logger.warning("Contacts cache write failed for %s", key, exc_info=True)
+
+
+def cache_get_many(keys):
+    try:
+        return cache.get_many(keys)
+    except Exception:
+        logger.warning("Contacts cache read failed for %d keys", len(keys), exc_info=True)
+        return {}
+
+
+def cache_set_many(values, timeout):
+    try:
+        cache.set_many(values, timeout)
+    except Exception:
+        logger.warning("Contacts cache write failed for %d keys", len(values), exc_info=True)
+
+
+def cache_delete_many(keys):
+    try:
+        cache.delete_many(keys)
+    except Exception:
+        logger.warning("Contacts cache delete failed for %d keys", len(keys), exc_info=True)
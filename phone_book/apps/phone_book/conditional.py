@@ -0,0 +1,93 @@
+"""
+Conditional GET support for contact reads.
+
+ETags and ``Last-Modified`` come from the contacts version stamp in the
+shared cache (see ``cache.get_version``), so a matching ``If-None-Match``
+is answered with 304 before the view queries the contacts table or renders
+a template.
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .cache import get_version
+
+
+def get_request_version(request):
+    """``get_version()``, looked up once per request."""
+    version = getattr(request, '_contacts_version', None)
+    if version is None:
+        version = request._contacts_version = get_version()
+    return version
+
+
+def contacts_etag(request, *args, **kwargs):
+    """
+    Weak ETag for the current contacts generation and this exact request:
+    the path and query string, and the user, whom pages may greet by name.
+    """
+    generation, _ = get_request_version(request)
+    if generation is None:
+        return None
+    user = getattr(request, 'user', None)
+    variant = f"{generation}|{request.get_full_path()}|{getattr(user, 'pk', None)}"
+    return 'W/"%s"' % hashlib.md5(variant.encode('utf-8')).hexdigest()
+
+
+def contacts_last_modified(request, *args, **kwargs):
+    """
+    Time of the last contact write. Only used by clients that do not send
+    ``If-None-Match``; it has one-second resolution, the ETag does not.
+    """
+    _, modified = get_request_version(request)
+    if modified is None:
+        return None
+    return datetime.fromtimestamp(modified, tz=timezone.utc)
+
+
+def _resolve_request_state(request):
+    get_request_version(request)
+    getattr(getattr(request, 'user', None), 'pk', None)
+
+
+def conditional_on_contacts(view_func):
+    """
+    Answer conditional GETs for ``view_func`` from the contacts version stamp.
+
+    Responses are marked ``private, no-cache`` so browsers keep them but
+    revalidate on every use instead of guessing a freshness lifetime. Any
+    other status, such as the empty 204 of a superseded suggestion request,
+    does not represent the contacts: it loses its validators and is marked
+    ``no-store``.
+    """
+    conditional_view = condition(etag_func=contacts_etag, last_modified_func=contacts_last_modified)(view_func)
+
+    def finalize(request, response):
+        if request.method not in ('GET', 'HEAD'):
+            return response
+        if response.status_code in (200, 304):
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            del response['ETag']
+            del response['Last-Modified']
+            patch_cache_control(response, no_store=True)
+        return response
+
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            # The ETag functions run synchronously; load the lazy user (a
+            # database query) and the version stamp before they do.
+            await sync_to_async(_resolve_request_state)(request)
+            return finalize(request, await conditional_view(request, *args, **kwargs))
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        return finalize(request, conditional_view(request, *args, **kwargs))
+    return wrapper
@@ -0,0 +1,92 @@
+"""
+Server-side debouncing for per-keystroke requests.
+
+Requests are grouped into channels (one per browser tab or session). A
+request waits ``delay`` seconds before doing any work and then only proceeds
+if no newer request arrived on its channel in the meantime; the check uses a
+counter in the shared cache, so it also holds across ASGI workers. Work still
+running when a newer request arrives on the same worker is cancelled, and
+Django cancels it too when the client disconnects.
+"""
+import asyncio
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+TOKEN_TIMEOUT = 60
+
+
+class Superseded(Exception):
+    """Raised when a newer request on the same channel replaced this one."""
+
+
+class LatestRequestGate:
+    """
+    Run at most one piece of work per channel, favouring the latest request.
+
+    Args:
+        prefix: Namespace for the per-channel counters in the shared cache.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self._tasks = {}
+
+    def _key(self, channel):
+        return f"{self.prefix}:{channel}"
+
+    async def claim(self, channel):
+        """Register a new request on ``channel`` and return its token."""
+        key = self._key(channel)
+        try:
+            try:
+                return await cache.aincr(key)
+            except ValueError:
+                await cache.aadd(key, 0, TOKEN_TIMEOUT)
+                return await cache.aincr(key)
+        except Exception:
+            logger.warning("Could not claim a request token for %s", key, exc_info=True)
+            return None
+
+    async def is_latest(self, channel, token):
+        if token is None:
+            return True
+        try:
+            return await cache.aget(self._key(channel)) == token
+        except Exception:
+            logger.warning("Could not read the request token for %s", channel, exc_info=True)
+            return True
+
+    async def run(self, channel, delay, func, *args):
+        """
+        Await ``func(*args)`` after ``delay`` seconds unless a newer request on
+        ``channel`` supersedes it first, in which case ``Superseded`` is raised.
+        Without a channel the work runs immediately.
+        """
+        if not channel:
+            return await func(*args)
+        token = await self.claim(channel)
+        loop = asyncio.get_running_loop()
+        previous = self._tasks.get(channel)
+        if previous is not None and not previous.done() and previous.get_loop() is loop:
+            previous.cancel()
+        task = loop.create_task(self._debounced(channel, token, delay, func, args))
+        self._tasks[channel] = task
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                raise  # The client went away.
+            raise Superseded(channel)
+        finally:
+            if self._tasks.get(channel) is task:
+                del self._tasks[channel]
+
+    async def _debounced(self, channel, token, delay, func, args):
+        if delay:
+            await asyncio.sleep(delay)
+        if not await self.is_latest(channel, token):
+            raise Superseded(channel)
+        return await func(*args)
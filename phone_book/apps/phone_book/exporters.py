@@ -0,0 +1,86 @@
+"""
+Streaming export of contacts as CSV, vCard or NDJSON.
+
+Rows are read with ``QuerySet.iterator(chunk_size=...)``, which uses a
+server-side cursor on PostgreSQL, and rendered into text chunks lazily, so an
+export starts sending bytes immediately and memory stays flat regardless of
+how many contacts there are.
+"""
+import csv
+import json
+
+from django.conf import settings
+
+EXPORT_FIELDS = ('name', 'phone_number', 'email')
+# Rows rendered into each chunk handed to the WSGI/ASGI server.
+ROWS_PER_CHUNK = 500
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the value instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _chunked(lines):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= ROWS_PER_CHUNK:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def _csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for name, phone_number, email in rows:
+        yield writer.writerow((name, phone_number, email or ''))
+
+
+def _escape_vcard(value):
+    return (
+        value.replace('\\', '\\\\').replace(',', '\\,')
+        .replace(';', '\\;').replace('\n', '\\n')
+    )
+
+
+def _vcard_lines(rows):
+    for name, phone_number, email in rows:
+        card = [
+            'BEGIN:VCARD',
+            'VERSION:4.0',
+            f"FN:{_escape_vcard(name)}",
+            f"TEL:{_escape_vcard(phone_number)}",
+        ]
+        if email:
+            card.append(f"EMAIL:{_escape_vcard(email)}")
+        card.append('END:VCARD')
+        yield '\r\n'.join(card) + '\r\n'
+
+
+def _ndjson_lines(rows):
+    for name, phone_number, email in rows:
+        yield json.dumps({'name': name, 'phone_number': phone_number, 'email': email}) + '\n'
+
+
+# format -> (content type, file extension, line renderer)
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv', _csv_lines),
+    'vcard': ('text/vcard; charset=utf-8', 'vcf', _vcard_lines),
+    'ndjson': ('application/x-ndjson', 'ndjson', _ndjson_lines),
+}
+
+
+def export_contacts(queryset, format_name, chunk_size=None):
+    """
+    Return an iterator of text chunks rendering ``queryset`` in ``format_name``.
+    """
+    if chunk_size is None:
+        chunk_size = getattr(settings, 'PHONEBOOK_EXPORT_CHUNK_SIZE', 2000)
+    render = FORMATS[format_name][2]
+    rows = queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    return _chunked(render(rows))
@@ -0,0 +1,38 @@
+from django_filters import rest_framework as filters
+
+from phone_book.apps.common.filters import BaseFilterSet
+from .models import PhoneBook
+from .search import search_contacts
+from .utils import normalize_phone_number
+
+
+class PhoneBookFilterSet(BaseFilterSet):
+    """
+    Filter set for the PhoneBook API.
+    """
+    # PhoneBook has no audit timestamps.
+    created_at_gte = None
+    created_at_lte = None
+    updated_at_gte = None
+    updated_at_lte = None
+
+    name = filters.CharFilter(field_name="name", lookup_expr='icontains', label="Name contains")
+    email = filters.CharFilter(field_name="email", lookup_expr='iexact', label="Email")
+    phone_number = filters.CharFilter(method='filter_phone_number', label="Phone number (any format)")
+    has_email = filters.BooleanFilter(field_name="email", lookup_expr='isnull', exclude=True, label="Has email")
+
+    class Meta:
+        model = PhoneBook
+        fields = ['name', 'email', 'phone_number', 'has_email']
+
+    def filter_search(self, queryset, name, value):
+        """
+        Search names and phone numbers through the database search backend.
+        """
+        return search_contacts(queryset, value)
+
+    def filter_phone_number(self, queryset, name, value):
+        """
+        Match the normalized number so formatting differences do not matter.
+        """
+        return queryset.filter(phone_number_normalized=normalize_phone_number(value))
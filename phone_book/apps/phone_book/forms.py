@@ -10,3 +10,13 @@ class PhoneBookForm(forms.ModelForm):
             'phone_number': forms.TextInput(attrs={'class': 'form-control'}),
             'email': forms.EmailInput(attrs={'class': 'form-control'}),
         }
+
+
+class PhoneBookImportForm(PhoneBookForm):
+    """
+    PhoneBookForm without the per-row uniqueness queries; bulk imports check
+    uniqueness once per batch instead.
+    """
+
+    def validate_unique(self):
+        pass
@@ -0,0 +1,58 @@
+"""
+Cached HTML fragments for the rows of ``list.html``.
+
+A row only depends on the contact's id and displayed fields, so each
+fragment is keyed on the id plus a digest of those fields: editing a contact
+changes its key and the stale fragment is never read again. Rows render
+without the request, so every visitor shares the same entries.
+"""
+import hashlib
+
+from django.conf import settings
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from .cache import cache_delete_many, cache_get_many, cache_set_many
+
+ROW_TEMPLATE = 'phone_book/_contact_row.html'
+# Bump when the row template changes to retire every cached fragment.
+ROW_FRAGMENT_VERSION = 1
+ROW_FIELDS = ('name', 'phone_number', 'email')
+
+
+def row_cache_key(contact):
+    """Cache key for the rendered row of ``contact``."""
+    digest = hashlib.md5(
+        '\x00'.join(str(getattr(contact, field) or '') for field in ROW_FIELDS).encode('utf-8')
+    ).hexdigest()
+    return f"phonebook:row:{ROW_FRAGMENT_VERSION}:{contact.pk}:{digest}"
+
+
+def render_contact_rows(contacts):
+    """
+    Return the rendered ``<tr>`` of every contact, in order, fetching cached
+    fragments with one ``get_many`` and storing new ones with one ``set_many``.
+    """
+    contacts = list(contacts)
+    timeout = getattr(settings, 'PHONEBOOK_ROW_CACHE_TIMEOUT', 3600)
+    keys = [row_cache_key(contact) for contact in contacts]
+    cached = cache_get_many(keys) if timeout else {}
+    missing = {}
+    template = None
+    rows = []
+    for key, contact in zip(keys, contacts):
+        row = cached.get(key)
+        if row is None:
+            template = template or get_template(ROW_TEMPLATE)
+            row = missing[key] = template.render({'contact': contact})
+        rows.append(mark_safe(row))
+    if missing and timeout:
+        cache_set_many(missing, timeout)
+    return rows
+
+
+def drop_row_fragments(contacts):
+    """Remove the cached rows of deleted contacts."""
+    keys = [row_cache_key(contact) for contact in contacts]
+    if keys:
+        cache_delete_many(keys)
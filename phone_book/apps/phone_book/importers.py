@@ -0,0 +1,421 @@
+"""
+Streaming bulk import of contacts from CSV, vCard and NDJSON sources.
+
+Input is parsed one record at a time, validated with the ``PhoneBookForm``
+field rules and written with ``bulk_create``/``bulk_update`` in fixed-size
+batches. Uniqueness is checked once per batch with a single query instead of
+three queries per row, so memory use and query count depend on the batch size
+rather than on the size of the file.
+"""
+import codecs
+import csv
+import json
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .forms import PhoneBookImportForm
+from .models import PhoneBook
+from .utils import normalize_phone_number
+
+POLICY_SKIP = 'skip'
+POLICY_UPDATE = 'update'
+POLICY_FAIL = 'fail'
+POLICIES = (POLICY_SKIP, POLICY_UPDATE, POLICY_FAIL)
+
+UNIQUE_FIELDS = ('name', 'phone_number', 'email')
+IMPORT_FIELDS = ('name', 'phone_number', 'email')
+FIELD_ALIASES = {
+    'phone': 'phone_number',
+    'number': 'phone_number',
+    'tel': 'phone_number',
+    'full_name': 'name',
+    'fn': 'name',
+}
+MAX_REPORTED_ERRORS = 100
+
+ParsedRow = namedtuple('ParsedRow', ['line', 'data', 'error'])
+
+
+class ContactImportError(Exception):
+    """Raised when an import cannot continue, e.g. a conflict under the 'fail' policy."""
+
+    def __init__(self, message, line=None):
+        super().__init__(message)
+        self.line = line
+
+
+def _normalize_keys(record):
+    data = {}
+    for key, value in record.items():
+        if key is None:
+            continue
+        key = key.strip().lower().replace(' ', '_')
+        key = FIELD_ALIASES.get(key, key)
+        if key in IMPORT_FIELDS and key not in data:
+            data[key] = value.strip() if isinstance(value, str) else value
+    return data
+
+
+def iter_csv(lines):
+    """Yield rows from CSV text with a header line naming the columns."""
+    reader = csv.DictReader(lines)
+    for record in reader:
+        yield ParsedRow(reader.line_num, _normalize_keys(record), None)
+
+
+def iter_ndjson(lines):
+    """Yield rows from newline-delimited JSON objects."""
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield ParsedRow(line_number, None, f"Invalid JSON: {exc}")
+            continue
+        if not isinstance(record, dict):
+            yield ParsedRow(line_number, None, "Expected a JSON object.")
+            continue
+        yield ParsedRow(line_number, _normalize_keys(record), None)
+
+
+def _unfold(lines):
+    """Join RFC 6350 folded continuation lines, yielding (line_number, line)."""
+    pending, pending_line = None, 0
+    for line_number, line in enumerate(lines, start=1):
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and pending is not None:
+            pending += line[1:]
+            continue
+        if pending is not None:
+            yield pending_line, pending
+        pending, pending_line = line, line_number
+    if pending is not None:
+        yield pending_line, pending
+
+
+def _unescape_vcard(value):
+    return (
+        value.replace('\\n', '\n').replace('\\N', '\n')
+        .replace('\\,', ',').replace('\\;', ';').replace('\\\\', '\\')
+    )
+
+
+def iter_vcard(lines):
+    """Yield one row per vCard, taking FN (or N), the first TEL and the first EMAIL."""
+    card, card_line = None, 0
+    for line_number, line in _unfold(lines):
+        if not line.strip():
+            continue
+        prop, _, value = line.partition(':')
+        # Drop parameters (TEL;TYPE=CELL) and group prefixes (item1.EMAIL).
+        name = prop.split(';', 1)[0].rsplit('.', 1)[-1].upper()
+        if name == 'BEGIN' and value.strip().upper() == 'VCARD':
+            card, card_line = {}, line_number
+        elif name == 'END' and value.strip().upper() == 'VCARD':
+            if card is not None:
+                if 'name' not in card and 'n' in card:
+                    parts = [p for p in card['n'].split(';')[:2] if p]
+                    card['name'] = ' '.join(reversed(parts))
+                card.pop('n', None)
+                yield ParsedRow(card_line, card, None)
+            card = None
+        elif card is not None:
+            value = _unescape_vcard(value.strip())
+            if name == 'FN':
+                card.setdefault('name', value)
+            elif name == 'N':
+                card.setdefault('n', value)
+            elif name == 'TEL':
+                card.setdefault('phone_number', value)
+            elif name == 'EMAIL':
+                card.setdefault('email', value)
+
+
+PARSERS = {
+    'csv': iter_csv,
+    'vcard': iter_vcard,
+    'ndjson': iter_ndjson,
+}
+EXTENSIONS = {
+    '.csv': 'csv',
+    '.vcf': 'vcard',
+    '.vcard': 'vcard',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+
+
+def detect_format(filename):
+    """Guess the import format from a file name, or return None."""
+    filename = (filename or '').lower()
+    for extension, format_name in EXTENSIONS.items():
+        if filename.endswith(extension):
+            return format_name
+    return None
+
+
+def decode_lines(binary_lines):
+    """
+    Incrementally decode an iterable of UTF-8 byte lines, such as an open
+    file or an ``UploadedFile``, dropping any byte-order mark.
+    """
+    return codecs.iterdecode(binary_lines, 'utf-8-sig')
+
+
+def parse(format_name, lines):
+    """Return an iterator of ``ParsedRow`` for ``lines`` in ``format_name``."""
+    try:
+        parser = PARSERS[format_name]
+    except KeyError:
+        raise ContactImportError(f"Unsupported format {format_name!r}; expected one of {', '.join(PARSERS)}.")
+    return parser(lines)
+
+
+class ImportResult:
+    """
+    Running totals for an import. Only the first ``MAX_REPORTED_ERRORS``
+    rejected rows are kept, so a bad file cannot grow memory without bound.
+    """
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.rejected = 0
+        self.errors = []
+        self.started = time.monotonic()
+
+    @property
+    def processed(self):
+        return self.created + self.updated + self.skipped + self.rejected
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def reject(self, line, errors):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        elapsed = self.elapsed
+        return {
+            'processed': self.processed,
+            'created': self.created,
+            'updated': self.updated,
+            'skipped': self.skipped,
+            'rejected': self.rejected,
+            'errors': self.errors,
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(self.processed / elapsed, 1) if elapsed else None,
+        }
+
+
+class ContactImporter:
+    """
+    Validate and write parsed rows in batches.
+
+    Args:
+        policy: What to do with a row whose name, phone number or email is
+            already taken: 'skip' it, 'update' the existing contact, or 'fail'
+            the whole import (which then runs in a single transaction).
+        batch_size: Rows validated and written per round trip.
+        progress: Optional callable invoked with the ``ImportResult`` after
+            every batch.
+
+    A contact stored by another request between the conflict lookup and the
+    write makes the batch fail. Under 'skip' the batch is resolved and
+    written again; other policies raise ``ContactImportError`` for the line.
+    """
+    # Attempts per batch under the 'skip' policy.
+    max_attempts = 3
+
+    def __init__(self, policy=POLICY_SKIP, batch_size=None, progress=None):
+        if policy not in POLICIES:
+            raise ContactImportError(f"Unknown conflict policy {policy!r}; expected one of {', '.join(POLICIES)}.")
+        self.policy = policy
+        self.batch_size = batch_size or getattr(settings, 'PHONEBOOK_IMPORT_BATCH_SIZE', 1000)
+        self.progress = progress
+
+    def run(self, rows):
+        """Import an iterable of ``ParsedRow`` and return the ``ImportResult``."""
+        result = ImportResult()
+        if self.policy == POLICY_FAIL:
+            with transaction.atomic():
+                self._run(rows, result)
+        else:
+            self._run(rows, result)
+        return result
+
+    def _run(self, rows, result):
+        batch = []
+        for row in rows:
+            contact = self.validate(row, result)
+            if contact is None:
+                continue
+            batch.append((row.line, contact))
+            if len(batch) >= self.batch_size:
+                self.write_batch(batch, result)
+                batch = []
+        if batch:
+            self.write_batch(batch, result)
+
+    def validate(self, row, result):
+        """Return an unsaved PhoneBook for a valid row, recording rejects."""
+        if row.error:
+            result.reject(row.line, {'__all__': [row.error]})
+            return None
+        form = PhoneBookImportForm(data=row.data)
+        if not form.is_valid():
+            result.reject(row.line, {field: list(errors) for field, errors in form.errors.items()})
+            return None
+        contact = form.instance
+        contact.phone_number_normalized = normalize_phone_number(contact.phone_number)
+        return contact
+
+    def write_batch(self, batch, result):
+        from .signals import notify_contacts_changed
+
+        for attempt in range(1, self.max_attempts + 1):
+            # resolve_conflicts counts skips and rejects; a failed write undoes them.
+            skipped, rejected, reported = result.skipped, result.rejected, len(result.errors)
+            planned = []
+            try:
+                with transaction.atomic():
+                    to_create, to_update = self.resolve_conflicts(batch, result)
+                    planned = to_create + to_update
+                    if to_create:
+                        PhoneBook.objects.bulk_create(to_create, batch_size=self.batch_size)
+                    if to_update:
+                        PhoneBook.objects.bulk_update(
+                            to_update, ['name', 'phone_number', 'phone_number_normalized', 'email'],
+                            batch_size=self.batch_size,
+                        )
+                break
+            except IntegrityError as exc:
+                result.skipped, result.rejected = skipped, rejected
+                del result.errors[reported:]
+                if self.policy != POLICY_SKIP or attempt == self.max_attempts:
+                    raise self.conflict_error(batch, planned) from exc
+        result.created += len(to_create)
+        result.updated += len(to_update)
+        if to_create or to_update:
+            notify_contacts_changed()
+        if self.progress is not None:
+            self.progress(result)
+
+    def resolve_conflicts(self, batch, result):
+        """
+        Split a batch into contacts to insert and existing contacts to update,
+        applying the conflict policy to rows that collide with stored contacts
+        or with earlier rows of the same batch.
+        """
+        existing = find_existing_contacts(contact for _, contact in batch)
+        pending = {}  # (field, value) -> index into ``planned``
+        planned = []  # [line, contact, is_update]
+        for line, contact in batch:
+            keys = unique_keys(contact)
+            targets = {existing[key].pk: existing[key] for key in keys if key in existing}
+            clashes = {pending[key] for key in keys if key in pending}
+            if not targets and not clashes:
+                self._plan(planned, pending, line, contact, keys, is_update=False)
+                continue
+            if self.policy == POLICY_FAIL:
+                field = next(key[0] for key in keys if key in existing or key in pending)
+                raise ContactImportError(f"Line {line}: a contact with this {field} already exists.", line=line)
+            if self.policy == POLICY_SKIP:
+                result.skipped += 1
+                continue
+            ambiguous = len(targets) > 1 or len(clashes) > 1
+            if not ambiguous and targets and clashes:
+                ambiguous = not self._same_target(planned, clashes, targets)
+            if ambiguous:
+                result.reject(line, {'__all__': ["Matches more than one existing contact."]})
+                continue
+            if clashes:
+                # A later row for the same contact supersedes the earlier one.
+                index = clashes.pop()
+                _, earlier, is_update = planned[index]
+                for key in unique_keys(earlier):
+                    pending.pop(key, None)
+                planned[index] = None
+                contact.pk = earlier.pk
+                result.skipped += 1
+                self._plan(planned, pending, line, contact, keys, is_update=is_update)
+                continue
+            contact.pk = next(iter(targets))
+            self._plan(planned, pending, line, contact, keys, is_update=True)
+        to_create = [entry[1] for entry in planned if entry and not entry[2]]
+        to_update = [entry[1] for entry in planned if entry and entry[2]]
+        return to_create, to_update
+
+    @staticmethod
+    def conflict_error(batch, planned):
+        """
+        Return a ``ContactImportError`` for the first planned row whose value
+        another request stored after ``resolve_conflicts`` looked it up.
+        """
+        written = {id(contact) for contact in planned}
+        rows = [(line, contact) for line, contact in batch if id(contact) in written]
+        existing = find_existing_contacts(contact for _, contact in rows)
+        for line, contact in rows:
+            for key in unique_keys(contact):
+                if key in existing and existing[key].pk != contact.pk:
+                    return ContactImportError(
+                        f"Line {line}: a contact with this {key[0]} was just added by another request.", line=line,
+                    )
+        line = batch[0][0]
+        return ContactImportError(
+            f"Lines {line}-{batch[-1][0]}: another request changed these contacts; retry.", line=line,
+        )
+
+    @staticmethod
+    def _same_target(planned, clashes, targets):
+        earlier = planned[next(iter(clashes))]
+        return earlier is not None and earlier[2] and earlier[1].pk in targets
+
+    @staticmethod
+    def _plan(planned, pending, line, contact, keys, is_update):
+        for key in keys:
+            pending[key] = len(planned)
+        planned.append([line, contact, is_update])
+
+
+def unique_keys(contact):
+    """Return the (field, value) pairs that must be unique for ``contact``."""
+    keys = []
+    for field in UNIQUE_FIELDS:
+        value = getattr(contact, field)
+        if value not in (None, ''):
+            keys.append((field, value))
+    return keys
+
+
+def find_existing_contacts(contacts):
+    """
+    Map every (field, value) unique key of ``contacts`` that is already taken
+    to the stored contact holding it, using one query.
+    """
+    values = {field: set() for field in UNIQUE_FIELDS}
+    for contact in contacts:
+        for field, value in unique_keys(contact):
+            values[field].add(value)
+    condition = Q()
+    for field, field_values in values.items():
+        if field_values:
+            condition |= Q(**{f"{field}__in": field_values})
+    if not condition:
+        return {}
+    existing = {}
+    for contact in PhoneBook.objects.filter(condition).only(*UNIQUE_FIELDS):
+        for key in unique_keys(contact):
+            if key[1] in values[key[0]]:
+                existing[key] = contact
+    return existing
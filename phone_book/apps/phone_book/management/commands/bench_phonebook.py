@@ -0,0 +1,256 @@
+import json
+import platform
+import random
+import re
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from phone_book.apps.common.loadgen import run_load
+from phone_book.apps.phone_book.models import PhoneBook
+from phone_book.apps.phone_book.seeding import seed_contacts, seeded_count
+from phone_book.apps.phone_book.signals import batched_contact_notifications, notify_contacts_changed
+from phone_book.apps.phone_book.utils import normalize_phone_number
+
+SCENARIOS = ('list', 'search', 'suggest', 'create', 'delete')
+BENCH_USERNAME = 'bench'
+COUNT_SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+
+
+def parse_count(value):
+    """Parse a row count such as ``10000``, ``10k`` or ``5M``."""
+    match = re.fullmatch(r'(\d+)([kKmM]?)', value.strip())
+    if not match:
+        raise ValueError(f"Invalid count {value!r}; expected e.g. 10000, 10k or 5M.")
+    number, suffix = match.groups()
+    return int(number) * COUNT_SUFFIXES.get(suffix.lower(), 1)
+
+
+class InProcessTransport:
+    """Send requests through Django's handler in this process, without a socket."""
+
+    def __init__(self, token):
+        self.token = token
+        self.host = next(
+            (host.lstrip('.') for host in settings.ALLOWED_HOSTS if host not in ('*', '')), 'localhost'
+        )
+
+    def client(self):
+        client = APIClient(raise_request_exception=False, HTTP_HOST=self.host)
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        return client
+
+    def send(self, client, method, path, params=None, data=None):
+        if method == 'GET':
+            return client.get(path, params).status_code
+        return getattr(client, method.lower())(path, data, format='json').status_code
+
+
+class HTTPTransport:
+    """Send requests to a running server, e.g. gunicorn or uvicorn."""
+
+    def __init__(self, token, base_url):
+        self.token = token
+        self.base_url = base_url.rstrip('/')
+
+    def client(self):
+        return None
+
+    def send(self, client, method, path, params=None, data=None):
+        url = self.base_url + path
+        if params:
+            url += '?' + urllib.parse.urlencode(params)
+        body = json.dumps(data).encode() if data is not None else None
+        request = urllib.request.Request(url, data=body, method=method, headers={
+            'Authorization': f'Bearer {self.token}',
+            'Content-Type': 'application/json',
+        })
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as exc:
+            return exc.code
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the phone book endpoints and report throughput and latency "
+        "percentiles as JSON. Seeds benchmark contacts into the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--contacts', default='10k',
+                            help="Generated contacts to have in the database before running, "
+                                 "e.g. 10k, 1M or 5M (default: 10k); see seed_contacts.")
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                            help=f"Comma-separated scenarios to run (default: {','.join(SCENARIOS)}).")
+        parser.add_argument('--requests', type=int, default=500, help="Timed requests per scenario.")
+        parser.add_argument('--concurrency', type=int, default=8, help="Concurrent workers per scenario.")
+        parser.add_argument('--warmup', type=int, default=5, help="Untimed requests per worker before timing.")
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Seed of the generated contacts; see seed_contacts.")
+        parser.add_argument('--search-seed', type=int, default=0,
+                            help="Seed of the choice of search terms.")
+        parser.add_argument('--base-url',
+                            help="Benchmark a running server (which must use the same database) "
+                                 "instead of calling Django in-process.")
+        parser.add_argument('--output', default='-', help="File for the JSON report (default: standard output).")
+
+    def handle(self, *args, **options):
+        try:
+            contacts = parse_count(options['contacts'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}.")
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError("--requests and --concurrency must be positive.")
+
+        started = time.perf_counter()
+        # Generated contacts depend only on the seed, so earlier runs are reused.
+        try:
+            added = seed_contacts(max(contacts - seeded_count(), 0), seed=options['seed'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stderr.write(f"Seeded {added} contacts in {time.perf_counter() - started:.1f}s.")
+
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+        token = str(RefreshToken.for_user(user).access_token)
+        transport = HTTPTransport(token, options['base_url']) if options['base_url'] else InProcessTransport(token)
+        self.terms = self.search_terms(options['search_seed'])
+        self.run_id = f'{int(time.time()) % 10_000:04d}'
+
+        results = {}
+        for name in scenarios:
+            self.stderr.write(f"Running {name}...")
+            results[name] = getattr(self, f'run_{name}')(transport, options)
+        report = {
+            'meta': self.describe(contacts, options),
+            'scenarios': results,
+        }
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output'] == '-':
+            self.stdout.write(output)
+        else:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+            self.stderr.write(f"Wrote {options['output']}.")
+
+    def search_terms(self, seed, sample_size=1000):
+        """Deterministic name prefixes that match stored contacts."""
+        names = list(PhoneBook.objects.order_by('id').values_list('name', flat=True)[:sample_size])
+        if not names:
+            return ['a']
+        rng = random.Random(seed)
+        terms = []
+        for name in rng.choices(names, k=100):
+            word = rng.choice([word for word in name.split() if len(word) >= 3] or [name])
+            terms.append(word[:rng.randint(3, 6)])
+        return terms
+
+    def describe(self, contacts, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+                cwd=settings.BASE_DIR,
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            commit = None
+        return {
+            'commit': commit,
+            'contacts': contacts,
+            'total_contacts': PhoneBook.objects.count(),
+            'database': connection.vendor,
+            'target': options['base_url'] or 'in-process',
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'warmup': options['warmup'],
+            'seed': options['seed'],
+            'search_seed': options['search_seed'],
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        }
+
+    def load(self, transport, options, request):
+        """Run ``request(client, number)`` (which returns a status) under load."""
+
+        def make_worker():
+            client = transport.client()
+            return lambda number: request(client, number) < 400
+
+        return run_load(make_worker, options['requests'], options['concurrency'], options['warmup'])
+
+    def term(self, number):
+        return self.terms[number % len(self.terms)]
+
+    def run_list(self, transport, options):
+        path = reverse('phonebook-list')
+        return self.load(transport, options, lambda client, n: transport.send(client, 'GET', path))
+
+    def run_search(self, transport, options):
+        path = reverse('phonebook-list')
+        return self.load(transport, options, lambda client, n: transport.send(client, 'GET', path, {'q': self.term(n)}))
+
+    def run_suggest(self, transport, options):
+        path = reverse('phonebook-search-suggestions')
+        return self.load(transport, options, lambda client, n: transport.send(client, 'GET', path, {'q': self.term(n)}))
+
+    def run_create(self, transport, options):
+        path = reverse('phonebook-api-list')
+        prefix = f'bench-create-{self.run_id}-'
+
+        def create(client, n):
+            return transport.send(client, 'POST', path, data={
+                'name': f'{prefix}{n}',
+                'phone_number': f'+9{self.run_id}{n:08d}',
+                'email': f'{prefix}{n}@example.com',
+            })
+
+        try:
+            return self.load(transport, options, create)
+        finally:
+            self.cleanup(prefix)
+
+    def run_delete(self, transport, options):
+        prefix = f'bench-delete-{self.run_id}-'
+        total = options['requests'] + options['warmup'] * options['concurrency']
+        PhoneBook.objects.bulk_create(
+            PhoneBook(
+                name=f'{prefix}{n}',
+                phone_number=f'+8{self.run_id}{n:08d}',
+                phone_number_normalized=normalize_phone_number(f'+8{self.run_id}{n:08d}'),
+            )
+            for n in range(total)
+        )
+        notify_contacts_changed()
+        ids = iter(list(PhoneBook.objects.filter(name__startswith=prefix).values_list('id', flat=True)))
+        lock = threading.Lock()
+
+        def delete(client, n):
+            with lock:
+                pk = next(ids)
+            return transport.send(client, 'DELETE', reverse('phonebook-api-detail', args=[pk]))
+
+        try:
+            return self.load(transport, options, delete)
+        finally:
+            self.cleanup(prefix)
+
+    def cleanup(self, prefix):
+        with batched_contact_notifications():
+            PhoneBook.objects.filter(name__startswith=prefix).delete()
@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from phone_book.apps.phone_book.importers import (
+    POLICIES, POLICY_SKIP, PARSERS, ContactImporter, ContactImportError, decode_lines, detect_format, parse,
+)
+
+
+class Command(BaseCommand):
+    help = "Stream contacts from a CSV, vCard or NDJSON file into the phone book."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for standard input.")
+        parser.add_argument('--format', choices=sorted(PARSERS), help="Input format (default: from the file extension).")
+        parser.add_argument('--policy', choices=POLICIES, default=POLICY_SKIP,
+                            help="How to handle contacts that already exist (default: skip).")
+        parser.add_argument('--batch-size', type=int, help="Rows validated and written per batch.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format_name = options['format'] or detect_format(path)
+        if format_name is None:
+            raise CommandError("Could not infer the format from the file name; pass --format.")
+
+        def report(result):
+            self.stdout.write(f"{result.processed} rows processed ({result.rejected} rejected)...")
+
+        importer = ContactImporter(policy=options['policy'], batch_size=options['batch_size'], progress=report)
+        try:
+            if path == '-':
+                result = importer.run(parse(format_name, decode_lines(sys.stdin.buffer)))
+            else:
+                with open(path, 'rb') as handle:
+                    result = importer.run(parse(format_name, decode_lines(handle)))
+        except (OSError, ContactImportError) as exc:
+            raise CommandError(str(exc))
+
+        summary = result.as_dict()
+        for error in summary['errors']:
+            self.stderr.write(f"Line {error['line']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            "Imported {processed} rows: {created} created, {updated} updated, {skipped} skipped, "
+            "{rejected} rejected in {elapsed_seconds}s.".format(**summary)
+        ))
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from phone_book.apps.common.search import install_search_index, uninstall_search_index
+from phone_book.apps.phone_book.search import CONTACT_SEARCH
+
+
+def install(apps, schema_editor):
+    install_search_index(schema_editor, CONTACT_SEARCH)
+
+
+def uninstall(apps, schema_editor):
+    uninstall_search_index(schema_editor, CONTACT_SEARCH)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('phone_book', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
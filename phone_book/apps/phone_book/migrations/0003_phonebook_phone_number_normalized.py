@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+from phone_book.apps.phone_book.utils import normalize_phone_number
+
+BATCH_SIZE = 2000
+# Column width when this migration runs; 0004 widens it and refills cut values
+COLUMN_LENGTH = 20
+
+
+def backfill_normalized_numbers(apps, schema_editor):
+    PhoneBook = apps.get_model('phone_book', 'PhoneBook')
+    batch = []
+    for contact in PhoneBook.objects.only('id', 'phone_number').iterator(chunk_size=BATCH_SIZE):
+        contact.phone_number_normalized = normalize_phone_number(contact.phone_number)[:COLUMN_LENGTH]
+        batch.append(contact)
+        if len(batch) >= BATCH_SIZE:
+            PhoneBook.objects.bulk_update(batch, ['phone_number_normalized'])
+            batch = []
+    if batch:
+        PhoneBook.objects.bulk_update(batch, ['phone_number_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('phone_book', '0002_contact_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='phonebook',
+            name='phone_number_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=20),
+        ),
+        migrations.RunPython(backfill_normalized_numbers, migrations.RunPython.noop),
+    ]
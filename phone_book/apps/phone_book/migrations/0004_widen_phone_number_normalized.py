@@ -0,0 +1,40 @@
+from django.db import migrations, models
+from django.db.models.functions import Length
+
+from phone_book.apps.phone_book.utils import normalize_phone_number
+
+BATCH_SIZE = 2000
+PREVIOUS_LENGTH = 20
+
+
+def refill_cut_numbers(apps, schema_editor):
+    # Only values that filled the old column can have been cut short.
+    PhoneBook = apps.get_model('phone_book', 'PhoneBook')
+    batch = []
+    contacts = PhoneBook.objects.annotate(
+        normalized_length=Length('phone_number_normalized'),
+    ).filter(normalized_length__gte=PREVIOUS_LENGTH).only('id', 'phone_number')
+    for contact in contacts.iterator(chunk_size=BATCH_SIZE):
+        contact.phone_number_normalized = normalize_phone_number(contact.phone_number)
+        batch.append(contact)
+        if len(batch) >= BATCH_SIZE:
+            PhoneBook.objects.bulk_update(batch, ['phone_number_normalized'])
+            batch = []
+    if batch:
+        PhoneBook.objects.bulk_update(batch, ['phone_number_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('phone_book', '0003_phonebook_phone_number_normalized'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='phonebook',
+            name='phone_number_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=32),
+        ),
+        migrations.RunPython(refill_cut_numbers, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,19 @@
 from django.db import models
 
+from .utils import MAX_NORMALIZED_LENGTH, normalize_phone_number
+
 class PhoneBook(models.Model):
 	name = models.CharField(max_length=255, unique=True)
 	phone_number = models.CharField(max_length=20, unique=True)
+	phone_number_normalized = models.CharField(max_length=MAX_NORMALIZED_LENGTH, db_index=True, editable=False, blank=True, default='')
 	email = models.EmailField(max_length=255, unique=True, blank=True, null=True)
 
 	def __str__(self):
 		return f"{self.name} ({self.phone_number})"
+
+	def save(self, *args, **kwargs):
+		self.phone_number_normalized = normalize_phone_number(self.phone_number)
+		update_fields = kwargs.get('update_fields')
+		if update_fields is not None and 'phone_number' in update_fields:
+			kwargs['update_fields'] = {*update_fields, 'phone_number_normalized'}
+		super().save(*args, **kwargs)
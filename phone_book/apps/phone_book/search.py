@@ -0,0 +1,15 @@
+"""
+Database search over contacts, routed through the configured search backend.
+"""
+from phone_book.apps.common.search import SearchSpec, get_search_backend
+
+CONTACT_SEARCH = SearchSpec(table='phone_book_phonebook', fields=('name', 'phone_number'))
+
+
+def search_contacts(queryset, query, ranked=False):
+    """
+    Filter a PhoneBook queryset by name or phone number substring.
+
+    When ``ranked`` is true the rows are ordered by relevance, then name.
+    """
+    return get_search_backend(CONTACT_SEARCH, using=queryset.db).search(queryset, query, ranked=ranked)
@@ -0,0 +1,171 @@
+"""
+In-process trigram index over PhoneBook names and phone numbers.
+
+The index keeps every contact in ``(name, id)`` order and maps each trigram
+to the ranks of the contacts containing it, so a suggestion lookup only has
+to walk the shortest posting list and stop after ``limit`` matches instead of
+scanning and sorting the whole table.
+"""
+import logging
+import threading
+import time
+from array import array
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+NGRAM_SIZE = 3
+
+
+def _ngrams(text):
+    """Return the set of trigrams contained in ``text``."""
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class _Snapshot:
+    """
+    Immutable view of the contacts table at build time.
+    """
+    __slots__ = ('ids', 'names', 'phone_numbers', 'emails', 'haystacks', 'postings', 'built_at')
+
+    def __init__(self, rows):
+        self.ids = array('q')
+        self.names = []
+        self.phone_numbers = []
+        self.emails = []
+        self.haystacks = []
+        self.postings = {}
+        for rank, (pk, name, phone_number, email) in enumerate(rows):
+            self.ids.append(pk)
+            self.names.append(name)
+            self.phone_numbers.append(phone_number)
+            self.emails.append(email)
+            name, phone_number = name.lower(), phone_number.lower()
+            # The NUL separator keeps substring checks from matching across fields.
+            self.haystacks.append(f"{name}\x00{phone_number}")
+            for gram in _ngrams(name) | _ngrams(phone_number):
+                posting = self.postings.get(gram)
+                if posting is None:
+                    posting = self.postings[gram] = array('i')
+                posting.append(rank)
+        self.built_at = time.monotonic()
+
+    def candidates(self, needle):
+        """Yield contact ranks, in name order, that may contain ``needle``."""
+        if len(needle) < NGRAM_SIZE:
+            return range(len(self.haystacks))
+        shortest = None
+        for gram in _ngrams(needle):
+            posting = self.postings.get(gram)
+            if posting is None:
+                return ()
+            if shortest is None or len(posting) < len(shortest):
+                shortest = posting
+        return shortest
+
+    def search(self, query, limit):
+        needle = query.lower()
+        haystacks = self.haystacks
+        results = []
+        for rank in self.candidates(needle):
+            if needle in haystacks[rank]:
+                results.append({
+                    'id': self.ids[rank],
+                    'name': self.names[rank],
+                    'phone_number': self.phone_numbers[rank],
+                    'email': self.emails[rank],
+                })
+                if len(results) >= limit:
+                    break
+        return results
+
+
+class ContactSearchIndex:
+    """
+    Lazily built, process-local search index for contact suggestions.
+
+    ``search`` returns ``None`` whenever the index is disabled or cold so the
+    caller can fall back to the database. Builds happen on a background thread;
+    local writes mark the snapshot stale and entries older than
+    ``PHONEBOOK_SEARCH_INDEX_TTL`` seconds are refreshed to pick up writes made
+    by other worker processes.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._generation = 0
+        self._built_generation = -1
+        self._building = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'PHONEBOOK_SEARCH_INDEX', False)
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'PHONEBOOK_SEARCH_INDEX_TTL', 300)
+
+    @property
+    def is_warm(self):
+        return self._snapshot is not None and self._built_generation == self._generation
+
+    def search(self, query, limit=10):
+        """
+        Return up to ``limit`` suggestion dicts ordered by name, or ``None`` if
+        the index cannot answer yet.
+        """
+        if not self.enabled:
+            return None
+        snapshot = self._snapshot
+        if not self.is_warm:
+            self._schedule_build()
+            return None
+        if time.monotonic() - snapshot.built_at > self.ttl:
+            # Keep serving the expired snapshot while a fresh one is built.
+            self._schedule_build()
+        return snapshot.search(query, limit)
+
+    def invalidate(self):
+        """Mark the current snapshot stale after a write to the contacts table."""
+        with self._lock:
+            self._generation += 1
+
+    def rebuild(self):
+        """Build a fresh snapshot synchronously on the calling thread."""
+        from .models import PhoneBook
+
+        generation = self._generation
+        started = time.monotonic()
+        rows = PhoneBook.objects.order_by('name', 'id').values_list(
+            'id', 'name', 'phone_number', 'email'
+        ).iterator(chunk_size=5000)
+        snapshot = _Snapshot(rows)
+        with self._lock:
+            self._snapshot = snapshot
+            self._built_generation = generation
+        logger.info(
+            "Built contact search index with %d entries in %.2fs",
+            len(snapshot.haystacks), time.monotonic() - started,
+        )
+
+    def _schedule_build(self):
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        threading.Thread(target=self._build_in_background, name='contact-search-index', daemon=True).start()
+
+    def _build_in_background(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception("Failed to build contact search index")
+        finally:
+            self._building = False
+            connection.close()
+
+
+contact_search_index = ContactSearchIndex()
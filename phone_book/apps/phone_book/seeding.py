@@ -0,0 +1,249 @@
+"""
+Fast, deterministic generation of synthetic contacts.
+
+Row ``n`` of a given seed is always the same contact, and no two rows share a
+name, phone number or email, whether they come from the same seed or not:
+names are a mixed-radix encoding of ``n`` over shuffled name tables, tagged
+with the seed; phone numbers an affine permutation of the 10-digit space,
+where each seed owns a block of ``SEED_CAPACITY`` indexes; and emails embed
+``n`` under a per-seed domain. Seeding can therefore resume where an earlier
+run of the same seed stopped (``start``), and data of several seeds can share
+a database.
+
+Rows are produced a batch at a time as plain tuples and written without model
+instances: with ``COPY`` on PostgreSQL and ``executemany`` elsewhere, which
+is the statement ``bulk_create`` issues minus its per-object overhead. The
+search index is suspended for the load and rebuilt once at the end instead
+of being updated row by row.
+"""
+import io
+import random
+import string
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Length, StrIndex, Substr
+
+from phone_book.apps.common.search import resume_search_index, suspend_search_index
+from .models import PhoneBook
+from .search import CONTACT_SEARCH
+
+SEED_EMAIL_DOMAIN = 'seed.example.com'
+DEFAULT_BATCH_SIZE = 10000
+PHONE_SPACE = 10 ** 10
+# Coprime with PHONE_SPACE, so i -> (i * PHONE_MULTIPLIER + PHONE_OFFSET) % PHONE_SPACE
+# is a bijection and phone numbers never repeat.
+PHONE_MULTIPLIER = 7_919_370_943
+PHONE_OFFSET = 4_207_331_569
+SEED_COUNT = 100
+# Rows per seed: seed ``s`` uses phone indexes ``s * SEED_CAPACITY + n``.
+SEED_CAPACITY = PHONE_SPACE // SEED_COUNT
+
+FIRST_NAMES = (
+    'James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+    'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen',
+    'Christopher', 'Lisa', 'Daniel', 'Nancy', 'Matthew', 'Betty', 'Anthony', 'Sandra', 'Mark', 'Margaret',
+    'Donald', 'Ashley', 'Steven', 'Kimberly', 'Andrew', 'Emily', 'Paul', 'Donna', 'Joshua', 'Michelle',
+    'Kenneth', 'Carol', 'Kevin', 'Amanda', 'Brian', 'Melissa', 'George', 'Deborah', 'Timothy', 'Stephanie',
+    'Chinedu', 'Ngozi', 'Emeka', 'Adaeze', 'Tunde', 'Funmilayo', 'Kwame', 'Amara', 'Obinna', 'Zainab',
+    'Hiroshi', 'Yuki', 'Wei', 'Mei', 'Arjun', 'Priya', 'Rahul', 'Ananya', 'Omar', 'Fatima',
+    'Luis', 'Sofia', 'Carlos', 'Valentina', 'Mateo', 'Camila', 'Lukas', 'Emma', 'Noah', 'Mia',
+)
+LAST_NAMES = (
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+    'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+    'Lee', 'Perez', 'Thompson', 'White', 'Harris', 'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson',
+    'Walker', 'Young', 'Allen', 'King', 'Wright', 'Scott', 'Torres', 'Nguyen', 'Hill', 'Flores',
+    'Okafor', 'Nwosu', 'Adeyemi', 'Okonkwo', 'Mensah', 'Eze', 'Balogun', 'Abubakar', 'Okeke', 'Obi',
+    'Tanaka', 'Suzuki', 'Wang', 'Zhang', 'Sharma', 'Patel', 'Khan', 'Ali', 'Kim', 'Park',
+    'Silva', 'Santos', 'Costa', 'Rossi', 'Muller', 'Schmidt', 'Novak', 'Ivanov', 'Dubois', 'Jansen',
+)
+INITIALS = string.ascii_uppercase
+
+
+def seed_email_domain(seed):
+    return f's{seed}.{SEED_EMAIL_DOMAIN}'
+
+
+class ContactGenerator:
+    """
+    Deterministic source of unique synthetic contact rows for one seed,
+    between 0 and ``SEED_COUNT - 1``.
+    """
+
+    def __init__(self, seed=0):
+        if not 0 <= seed < SEED_COUNT:
+            raise ValueError(f"The seed must be between 0 and {SEED_COUNT - 1}.")
+        self.seed = seed
+        self.email_domain = seed_email_domain(seed)
+        rng = random.Random(seed)
+        self.first_names = list(FIRST_NAMES)
+        self.last_names = list(LAST_NAMES)
+        self.initials = list(INITIALS)
+        rng.shuffle(self.first_names)
+        rng.shuffle(self.last_names)
+        rng.shuffle(self.initials)
+
+    def batch(self, start, stop):
+        """
+        Return rows ``start``..``stop - 1`` as
+        ``(name, phone_number, phone_number_normalized, email)`` tuples.
+        """
+        if not 0 <= start <= stop <= SEED_CAPACITY:
+            raise ValueError(f"Rows must be between 0 and {SEED_CAPACITY} for one seed.")
+        firsts, lasts, initials = self.first_names, self.last_names, self.initials
+        n_first, n_last, n_initials = len(firsts), len(lasts), len(initials)
+        block = n_first * n_last * n_initials
+        # Seed 0 keeps untagged names; a tag never looks like a lap number.
+        tag = f' s{self.seed}' if self.seed else ''
+        base, domain = self.seed * SEED_CAPACITY, self.email_domain
+        rows = []
+        append = rows.append
+        for n in range(start, stop):
+            first = firsts[n % n_first]
+            last = lasts[n // n_first % n_last]
+            initial = initials[n // (n_first * n_last) % n_initials]
+            lap = n // block
+            name = f'{first} {initial}. {last} {lap + 1}' if lap else f'{first} {initial}. {last}'
+            digits = f'{((base + n) * PHONE_MULTIPLIER + PHONE_OFFSET) % PHONE_SPACE:010d}'
+            append((
+                name + tag,
+                f'+1 {digits[:3]}-{digits[3:6]}-{digits[6:]}',
+                f'1{digits}',
+                f'{first}.{last}.{n:x}@{domain}'.lower(),
+            ))
+        return rows
+
+
+def _seeded(seed=None):
+    if seed is None:
+        return PhoneBook.objects.filter(email__endswith=f'.{SEED_EMAIL_DOMAIN}')
+    return PhoneBook.objects.filter(email__endswith=f'@{seed_email_domain(seed)}')
+
+
+def seeded_count(seed=None):
+    """Number of contacts created by earlier seeding runs, of ``seed`` or of any seed."""
+    return _seeded(seed).count()
+
+
+def next_seed_index(seed=0):
+    """
+    Index after the highest one seeded so far with ``seed``, or 0.
+
+    Counting rows would go back over existing ones once any seeded contact
+    has been deleted. The index is the hex number between the second '.' and
+    the '@' of the email (names contain no dots); without leading zeros, a
+    longer hex string is a larger number and equal lengths compare as text.
+    """
+    after_first_dot = Substr('email', StrIndex('email', Value('.')) + 1)
+    after_second_dot = Substr(after_first_dot, StrIndex(after_first_dot, Value('.')) + 1)
+    index = Substr(after_second_dot, 1, StrIndex(after_second_dot, Value('@')) - 1)
+    highest = _seeded(seed).annotate(seed_index=index).order_by(
+        Length('seed_index').desc(), F('seed_index').desc(),
+    ).values_list('seed_index', flat=True).first()
+    return int(highest, 16) + 1 if highest else 0
+
+
+def _columns():
+    fields = ('name', 'phone_number', 'phone_number_normalized', 'email')
+    return [PhoneBook._meta.get_field(field).column for field in fields]
+
+
+def write_copy(rows):
+    """Stream rows into PostgreSQL with ``COPY ... FROM STDIN``."""
+    buffer = io.StringIO()
+    # Generated values never contain tabs, newlines or backslashes.
+    buffer.writelines('\t'.join(row) + '\n' for row in rows)
+    buffer.seek(0)
+    qn = connection.ops.quote_name
+    sql = (
+        f"COPY {qn(PhoneBook._meta.db_table)} ({', '.join(qn(column) for column in _columns())}) "
+        f"FROM STDIN"
+    )
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, 'copy_expert'):  # psycopg2
+            raw.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def write_executemany(rows):
+    """Insert rows with one prepared ``INSERT`` executed for the whole batch."""
+    qn = connection.ops.quote_name
+    sql = (
+        f"INSERT INTO {qn(PhoneBook._meta.db_table)} ({', '.join(qn(column) for column in _columns())}) "
+        f"VALUES (%s, %s, %s, %s)"
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def write_orm(rows):
+    """Portable fallback through ``bulk_create``."""
+    PhoneBook.objects.bulk_create(
+        PhoneBook(name=name, phone_number=phone, phone_number_normalized=normalized, email=email)
+        for name, phone, normalized, email in rows
+    )
+
+
+WRITERS = {
+    'copy': write_copy,
+    'executemany': write_executemany,
+    'orm': write_orm,
+}
+
+
+def default_method():
+    return 'copy' if connection.vendor == 'postgresql' else 'executemany'
+
+
+@contextmanager
+def search_index_suspended(enabled=True):
+    # Schema changes cannot join an enclosing transaction on every backend.
+    # If the process dies before ``resume``, the next ``migrate`` repairs the
+    # index (see ``signals.repair_contact_search_index``).
+    if not enabled or connection.in_atomic_block:
+        yield
+        return
+    suspend_search_index(connection, CONTACT_SEARCH)
+    try:
+        yield
+    finally:
+        resume_search_index(connection, CONTACT_SEARCH)
+
+
+def seed_contacts(count, seed=0, start=None, batch_size=DEFAULT_BATCH_SIZE, method=None, progress=None,
+                  defer_search_index=True):
+    """
+    Write ``count`` generated contacts and return the number written.
+
+    ``start`` defaults to just after the highest index seeded so far with
+    ``seed``, so repeated runs keep adding new, non-colliding rows. Each batch
+    is its own transaction. ``progress`` is called with the running total
+    after every batch.
+    """
+    from .signals import notify_contacts_changed
+
+    writer = WRITERS[method or default_method()]
+    generator = ContactGenerator(seed)
+    if start is None:
+        start = next_seed_index(seed)
+    written = 0
+    if count <= 0:
+        return written
+    if start + count > SEED_CAPACITY:
+        # Checked up front: a batch failing halfway would leave earlier ones committed.
+        raise ValueError(f"A seed has room for {SEED_CAPACITY} contacts.")
+    with search_index_suspended(defer_search_index):
+        for batch_start in range(start, start + count, batch_size):
+            rows = generator.batch(batch_start, min(batch_start + batch_size, start + count))
+            with transaction.atomic():
+                writer(rows)
+            written += len(rows)
+            if progress is not None:
+                progress(written)
+    notify_contacts_changed()
+    return written
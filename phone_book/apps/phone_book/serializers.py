@@ -1,7 +1,143 @@
+from django.db import transaction
 from rest_framework import serializers
+from .importers import UNIQUE_FIELDS, find_existing_contacts, unique_keys
 from .models import PhoneBook
+from .utils import normalize_phone_number
 
 class PhoneBookSerializer(serializers.ModelSerializer):
     class Meta:
         model = PhoneBook
         fields = ['id', 'name', 'phone_number', 'email']
+
+    def validate_email(self, value):
+        # Store a missing email as NULL, like PhoneBookForm does, so that blank
+        # emails do not collide on the unique constraint.
+        return value or None
+
+
+class PhoneBookBulkListSerializer(serializers.ListSerializer):
+    """
+    Create or update many contacts with a constant number of queries.
+
+    Uniqueness is checked for the whole batch with one lookup instead of one
+    query per field and row, and rows are written with a single
+    ``bulk_create``/``bulk_update``. For updates, pass the queryset of
+    candidate contacts as ``instance`` and an ``id`` in every item.
+    """
+
+    def to_internal_value(self, data):
+        self._instances = None
+        self._seen_ids = set()
+        if self.instance is not None and isinstance(data, list):
+            ids = [item.get('id') for item in data if isinstance(item, dict)]
+            self._instances = self.instance.in_bulk([pk for pk in ids if isinstance(pk, int)])
+        validated = super().to_internal_value(data)
+        errors = self.find_conflicts([self.build_contact(attrs) for attrs in validated])
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return validated
+
+    def run_child_validation(self, data):
+        pk = data.get('id') if isinstance(data, dict) else None
+        if self._instances is None:
+            if pk is not None:
+                raise serializers.ValidationError({'id': ["Must not be set when creating contacts."]})
+        elif pk not in self._instances:
+            raise serializers.ValidationError({'id': ["No contact with this id."]})
+        elif pk in self._seen_ids:
+            raise serializers.ValidationError({'id': ["Appears more than once in this request."]})
+        else:
+            self._seen_ids.add(pk)
+            self.child.instance = self._instances[pk]
+        try:
+            return self.child.run_validation(data)
+        finally:
+            self.child.instance = None
+
+    def build_contact(self, attrs):
+        """Return the contact ``attrs`` describe, without saving it."""
+        attrs = dict(attrs)
+        pk = attrs.pop('id', None)
+        contact = PhoneBook(**attrs) if pk is None else self._instances[pk]
+        for field, value in attrs.items():
+            setattr(contact, field, value)
+        contact.phone_number_normalized = normalize_phone_number(contact.phone_number)
+        return contact
+
+    def find_conflicts(self, contacts):
+        """
+        Return one error dict per contact for unique values that are already
+        taken, either by a stored contact or by an earlier item of the batch.
+
+        A value may not move between contacts of the same batch, e.g. in a
+        name swap: ``bulk_update`` writes every row in one statement and the
+        unique constraints are checked row by row, so the contact taking the
+        value can be written while the other one still holds it.
+        """
+        existing = find_existing_contacts(contacts)
+        in_batch = {contact.pk: contact for contact in contacts if contact.pk is not None}
+        claimed = {}
+        errors = []
+        for index, contact in enumerate(contacts):
+            item_errors = {}
+            for key in unique_keys(contact):
+                field, value = key
+                holder = existing.get(key)
+                if holder is not None and holder.pk != contact.pk:
+                    if holder.pk in in_batch and getattr(in_batch[holder.pk], field) != value:
+                        item_errors[field] = [
+                            f"Contact {holder.pk} gives up this {field.replace('_', ' ')} in the same request; "
+                            "move it in a separate request."
+                        ]
+                    else:
+                        item_errors[field] = [f"A contact with this {field.replace('_', ' ')} already exists."]
+                    continue
+                if claimed.setdefault(key, index) != index:
+                    item_errors[field] = [f"Duplicates the {field.replace('_', ' ')} of item {claimed[key]}."]
+            errors.append(item_errors)
+        return errors
+
+    def concurrent_conflicts(self):
+        """
+        Re-run ``find_conflicts`` after the write failed with an
+        ``IntegrityError``, to name the values a concurrent request took.
+        """
+        return self.find_conflicts([self.build_contact(attrs) for attrs in self.validated_data])
+
+    def create(self, validated_data):
+        from .signals import notify_contacts_changed
+
+        contacts = [self.build_contact(attrs) for attrs in validated_data]
+        with transaction.atomic():
+            PhoneBook.objects.bulk_create(contacts)
+        notify_contacts_changed()
+        return contacts
+
+    def update(self, instance, validated_data):
+        from .signals import notify_contacts_changed
+
+        contacts = [self.build_contact(attrs) for attrs in validated_data]
+        fields = {field for attrs in validated_data for field in attrs if field != 'id'}
+        if 'phone_number' in fields:
+            fields.add('phone_number_normalized')
+        if fields:
+            with transaction.atomic():
+                PhoneBook.objects.bulk_update(contacts, sorted(fields))
+            notify_contacts_changed()
+        return contacts
+
+
+class PhoneBookBulkSerializer(PhoneBookSerializer):
+    """
+    Item serializer for bulk writes; ``id`` selects the contact to update.
+    """
+    id = serializers.IntegerField(required=False)
+
+    class Meta(PhoneBookSerializer.Meta):
+        list_serializer_class = PhoneBookBulkListSerializer
+        # Checked once for the whole batch by PhoneBookBulkListSerializer.
+        extra_kwargs = {field: {'validators': []} for field in UNIQUE_FIELDS}
+
+
+class PhoneBookBulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
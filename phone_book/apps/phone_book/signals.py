@@ -0,0 +1,82 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from phone_book.apps.common.search import repair_search_index
+from .cache import bump_generation
+from .fragments import drop_row_fragments
+from .models import PhoneBook
+from .search import CONTACT_SEARCH
+from .search_index import contact_search_index
+
+
+def _contacts_changed():
+    contact_search_index.invalidate()
+    bump_generation()
+
+
+def notify_contacts_changed():
+    """
+    Invalidate every derived view of the contacts table once the current
+    transaction commits, so no reader caches pre-commit rows under the new
+    generation.
+
+    Called from the model signals below; code that writes through
+    ``bulk_create``/``update``, which fire no signals, must call it directly.
+    """
+    transaction.on_commit(_contacts_changed)
+
+_batch = threading.local()
+
+
+@contextmanager
+def batched_contact_notifications():
+    """
+    Collapse the per-row notifications and row-fragment deletions done by the
+    signals below into one of each, sent when the outermost block exits, e.g.
+    around ``QuerySet.delete()``.
+    """
+    depth = getattr(_batch, 'depth', 0)
+    _batch.depth = depth + 1
+    if depth == 0:
+        _batch.deleted = []
+    try:
+        yield
+    finally:
+        _batch.depth = depth
+        if depth == 0:
+            drop_row_fragments(_batch.deleted)
+            _batch.deleted = []
+            if getattr(_batch, 'pending', False):
+                _batch.pending = False
+                notify_contacts_changed()
+
+
+@receiver(post_save, sender=PhoneBook)
+@receiver(post_delete, sender=PhoneBook)
+def invalidate_contact_caches(sender, **kwargs):
+    """Drop cached contact reads whenever a contact is saved or deleted."""
+    if getattr(_batch, 'depth', 0):
+        _batch.pending = True
+        return
+    notify_contacts_changed()
+
+
+@receiver(post_delete, sender=PhoneBook)
+def drop_contact_row_fragment(sender, instance, **kwargs):
+    """Free the cached list row of a deleted contact."""
+    if getattr(_batch, 'depth', 0):
+        _batch.deleted.append(instance)
+        return
+    drop_row_fragments([instance])
+
+
+def repair_contact_search_index(sender, using, **kwargs):
+    """
+    Reinstall search structures that a table rebuild or an interrupted
+    seeding run may have dropped.
+    """
+    repair_search_index(connections[using], CONTACT_SEARCH, ('phone_book', '0002_contact_search_index'))
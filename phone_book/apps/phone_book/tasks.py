@@ -0,0 +1,78 @@
+import logging
+import os
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+
+from .importers import POLICY_SKIP, ContactImporter, decode_lines, parse
+
+logger = logging.getLogger(__name__)
+
+PROGRESS = 'PROGRESS'
+
+
+def _owner_key(job_id):
+    return f"phonebook:import-job:{job_id}"
+
+
+def record_job_owner(job_id, user_id):
+    """
+    Remember who submitted the import ``job_id``; only they may read its
+    status. Return False if the cache is down.
+    """
+    try:
+        cache.set(_owner_key(job_id), user_id, getattr(settings, 'PHONEBOOK_IMPORT_JOB_TTL', 86400))
+    except Exception:
+        logger.warning("Could not record the owner of import job %s", job_id, exc_info=True)
+        return False
+    return True
+
+
+def get_job_owner(job_id):
+    """Return the id of the user who submitted ``job_id``, or None if unknown."""
+    try:
+        return cache.get(_owner_key(job_id))
+    except Exception:
+        logger.warning("Could not read the owner of import job %s", job_id, exc_info=True)
+        return None
+
+
+def progress_meta(result):
+    """Summarise an ``ImportResult`` for the Celery result backend."""
+    summary = result.as_dict()
+    return {
+        'rows_done': summary['processed'],
+        'rows_rejected': summary['rejected'],
+        'created': summary['created'],
+        'updated': summary['updated'],
+        'skipped': summary['skipped'],
+        'elapsed_seconds': summary['elapsed_seconds'],
+        'rows_per_second': summary['rows_per_second'],
+    }
+
+
+@shared_task(bind=True)
+def import_contacts_task(self, path, format_name, policy=POLICY_SKIP, batch_size=None, delete_file=True):
+    """
+    Import a staged upload in batches, publishing progress after each batch.
+
+    ``path`` must be readable by the worker (see PHONEBOOK_IMPORT_DIR); it is
+    removed when the job finishes unless ``delete_file`` is False.
+    """
+    def report(result):
+        self.update_state(state=PROGRESS, meta=progress_meta(result))
+
+    try:
+        with open(path, 'rb') as handle:
+            importer = ContactImporter(policy=policy, batch_size=batch_size, progress=report)
+            result = importer.run(parse(format_name, decode_lines(handle)))
+    finally:
+        if delete_file:
+            try:
+                os.remove(path)
+            except OSError:
+                logger.warning("Could not remove staged import %s", path)
+    summary = result.as_dict()
+    summary.update(progress_meta(result))
+    return summary
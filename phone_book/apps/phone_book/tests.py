@@ -1,3 +1,774 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from celery.backends.cache import CacheBackend
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from phone_book.apps.common.pagination import encode_cursor
+
+from .cache import get_generation
+from .debounce import LatestRequestGate, Superseded
+from .fragments import row_cache_key
+from .importers import ContactImporter, ContactImportError, decode_lines, find_existing_contacts, parse
+from .models import PhoneBook
+from .search import search_contacts
+from .serializers import PhoneBookBulkListSerializer
+from .search_index import ContactSearchIndex
+from .seeding import ContactGenerator, next_seed_index, seed_contacts, seeded_count
+from .tasks import import_contacts_task
+from .utils import MAX_NORMALIZED_LENGTH, normalize_phone_number
+from .views import PhoneBookListView, PhoneBookSearchSuggestionsView
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ContactSearchIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        PhoneBook.objects.create(name='Alice Johnson', phone_number='555-0100')
+        PhoneBook.objects.create(name='Bob Allison', phone_number='555-0101')
+        PhoneBook.objects.create(name='Carol King', phone_number='555-0199')
+        self.index = ContactSearchIndex()
+
+    @override_settings(PHONEBOOK_SEARCH_INDEX=True)
+    def test_matches_orm_results_in_name_order(self):
+        self.index.rebuild()
+        for query in ['ali', 'AL', '555-01', '0199', 'zzz']:
+            expected = list(PhoneBook.objects.filter(
+                name__icontains=query
+            ).union(PhoneBook.objects.filter(
+                phone_number__icontains=query
+            )).order_by('name').values_list('name', flat=True))
+            results = self.index.search(query)
+            self.assertEqual([r['name'] for r in results], expected, query)
+
+    @override_settings(PHONEBOOK_SEARCH_INDEX=True)
+    def test_limit_and_invalidation(self):
+        self.index.rebuild()
+        self.assertEqual(len(self.index.search('555', limit=2)), 2)
+        self.index.invalidate()
+        self.assertFalse(self.index.is_warm)
+
+    def test_disabled_index_falls_back(self):
+        self.assertIsNone(self.index.search('ali'))
+        response = self.client.get(reverse('phonebook-search-suggestions'), {'q': 'al'})
+        names = [r['name'] for r in response.json()['response_data']['results']]
+        self.assertEqual(names, ['Alice Johnson', 'Bob Allison'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ContactSearchBackendTests(TestCase):
+    def setUp(self):
+        self.alice = PhoneBook.objects.create(name='Alice Johnson', phone_number='555-0100')
+        PhoneBook.objects.create(name='Johnny Appleseed', phone_number='555-0101')
+        PhoneBook.objects.create(name='Carol King', phone_number='555-0199')
+
+    def names(self, query, ranked=False):
+        return sorted(search_contacts(PhoneBook.objects.all(), query, ranked=ranked).values_list('name', flat=True))
+
+    def test_matches_icontains_semantics(self):
+        for query in ['john', 'JOHN', 'o', '555-01', '0199', 'nobody']:
+            expected = sorted(PhoneBook.objects.filter(
+                Q(name__icontains=query) | Q(phone_number__icontains=query)
+            ).values_list('name', flat=True))
+            self.assertEqual(self.names(query), expected, query)
+            self.assertEqual(self.names(query, ranked=True), expected, query)
+
+    def test_shadow_table_follows_writes(self):
+        self.alice.name = 'Alicia Keys'
+        self.alice.save()
+        self.assertEqual(self.names('john'), ['Johnny Appleseed'])
+        self.assertEqual(self.names('keys'), ['Alicia Keys'])
+        self.alice.delete()
+        self.assertEqual(self.names('keys'), [])
+
+    def test_list_view_search(self):
+        response = self.client.get(reverse('phonebook-list'), {'q': 'john'})
+        self.assertEqual(
+            sorted(c.name for c in response.context['contacts']),
+            ['Alice Johnson', 'Johnny Appleseed'],
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PhoneNumberLookupTests(TestCase):
+    def test_normalize_phone_number(self):
+        self.assertEqual(normalize_phone_number('+1 (555) 010-2000'), '15550102000')
+        self.assertEqual(normalize_phone_number('001 555 010 2000'), '15550102000')
+        self.assertEqual(normalize_phone_number('555-010-2000', default_country_code='1'), '15550102000')
+        self.assertEqual(normalize_phone_number('0803 123 4567', default_country_code='234'), '2348031234567')
+        self.assertEqual(normalize_phone_number('n/a'), '')
+        long_number = normalize_phone_number('0' + '9' * 30, default_country_code='234')
+        self.assertEqual(long_number, ('234' + '9' * 30)[:MAX_NORMALIZED_LENGTH])
+
+    def test_normalized_column_is_kept_in_sync(self):
+        contact = PhoneBook.objects.create(name='Alice', phone_number='+1 (555) 010-2000')
+        self.assertEqual(contact.phone_number_normalized, '15550102000')
+        contact.phone_number = '+1 555 010 3000'
+        contact.save(update_fields=['phone_number'])
+        contact.refresh_from_db()
+        self.assertEqual(contact.phone_number_normalized, '15550103000')
+
+    def test_lookup_exact_and_prefix(self):
+        PhoneBook.objects.create(name='Alice', phone_number='+1 (555) 010-2000')
+        PhoneBook.objects.create(name='Bob', phone_number='+1 555 010 2999')
+        PhoneBook.objects.create(name='Carol', phone_number='+44 20 7946 0000')
+        url = reverse('phonebook-lookup')
+        response = self.client.get(url, {'number': '+15550102000'})
+        self.assertEqual([r['name'] for r in response.json()['response_data']['results']], ['Alice'])
+        response = self.client.get(url, {'number': '+1 555 010 2', 'match': 'prefix'})
+        self.assertEqual([r['name'] for r in response.json()['response_data']['results']], ['Alice', 'Bob'])
+        self.assertEqual(self.client.get(url, {'number': 'abc'}).status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SuggestionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.contact = PhoneBook.objects.create(name='Alice Johnson', phone_number='555-0100')
+        self.url = reverse('phonebook-search-suggestions')
+
+    def suggest(self, query):
+        return [r['name'] for r in self.client.get(self.url, {'q': query}).json()['response_data']['results']]
+
+    def test_equivalent_queries_are_served_from_cache(self):
+        self.assertEqual(self.suggest('alice'), ['Alice Johnson'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.suggest('  ALICE '), ['Alice Johnson'])
+
+    def test_writes_through_views_invalidate(self):
+        self.assertEqual(self.suggest('ali'), ['Alice Johnson'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('phonebook-edit', args=[self.contact.pk]), {
+                'name': 'Alicia Keys', 'phone_number': '555-0100', 'email': '',
+            })
+        self.assertEqual(self.suggest('ali'), ['Alicia Keys'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('phonebook-delete', args=[self.contact.pk]))
+        self.assertEqual(self.suggest('ali'), [])
+
+    def test_invalidation_waits_for_commit(self):
+        generation = get_generation()
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                self.contact.name = 'Alicia Keys'
+                self.contact.save()
+                self.assertEqual(get_generation(), generation)
+            self.assertEqual(get_generation(), generation)
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertNotEqual(get_generation(), generation)
+        self.assertEqual(self.suggest('ali'), ['Alicia Keys'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, PHONEBOOK_SUGGESTION_DEBOUNCE_MS=20)
+class AsyncSuggestionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        PhoneBook.objects.create(name='Alice Johnson', phone_number='555-0100')
+
+    async def test_async_view_uses_async_orm(self):
+        response = await self.async_client.get(
+            reverse('phonebook-search-suggestions'), {'q': 'ali', 'client': 'tab-1'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['name'] for r in response.json()['response_data']['results']], ['Alice Johnson'])
+
+    async def test_newer_request_supersedes_older_one(self):
+        gate, calls = LatestRequestGate('test-gate'), []
+
+        async def work(value):
+            calls.append(value)
+            await asyncio.sleep(0.05)
+            return value
+
+        first = asyncio.ensure_future(gate.run('tab', 0.01, work, 'a'))
+        await asyncio.sleep(0.02)  # 'a' is now running
+        second = asyncio.ensure_future(gate.run('tab', 0.05, work, 'ab'))
+        await asyncio.sleep(0.02)  # 'ab' is still debouncing
+        self.assertEqual(await gate.run('tab', 0.01, work, 'abc'), 'abc')
+        for stale in (first, second):
+            with self.assertRaises(Superseded):
+                await stale
+        self.assertEqual(calls, ['a', 'abc'])
+
+    def test_superseded_response_is_never_cached(self):
+        url = reverse('phonebook-search-suggestions')
+        with mock.patch.object(PhoneBookSearchSuggestionsView.gate, 'run', mock.AsyncMock(side_effect=Superseded)):
+            response = self.client.get(url, {'q': 'ali', 'client': 'tab-1'})
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertEqual(response['Cache-Control'], 'no-store')
+        self.assertTrue(self.client.get(url, {'q': 'ali', 'client': 'tab-1'}).has_header('ETag'))
+
+    async def test_disconnect_cancels_work(self):
+        gate, started = LatestRequestGate('test-gate'), asyncio.Event()
+
+        async def work():
+            started.set()
+            await asyncio.sleep(10)
+
+        request = asyncio.ensure_future(gate.run('tab', 0, work))
+        await started.wait()
+        request.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await request
+        self.assertEqual(gate._tasks, {})
+
+
+def server_timing(response):
+    """Parse a Server-Timing header into {metric: {param: value}}."""
+    metrics = {}
+    for entry in response['Server-Timing'].split(','):
+        name, *params = [part.strip() for part in entry.split(';')]
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+@override_settings(CACHES=LOCMEM_CACHES, SLOW_REQUEST_THRESHOLD_MS=0)
+class RequestInstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        PhoneBook.objects.create(name='Alice Johnson', phone_number='555-0100')
+
+    def test_server_timing_reports_queries_and_templates(self):
+        with CaptureQueriesContext(connection) as queries:
+            with self.assertLogs('phone_book.requests', 'INFO') as logs:
+                response = self.client.get(reverse('phonebook-list'))
+        timing = server_timing(response)
+        self.assertEqual(timing['db']['desc'], f'"{len(queries)} queries"')
+        self.assertGreater(float(timing['tpl']['dur']), 0)
+        self.assertGreaterEqual(float(timing['total']['dur']), float(timing['db']['dur']))
+        record = logs.records[0]
+        self.assertEqual(record.request_stats['view'], 'phonebook-list')
+        self.assertEqual(record.request_stats['queries'], len(queries))
+
+    async def test_async_views_count_queries_on_worker_threads(self):
+        response = await self.async_client.get(reverse('phonebook-search-suggestions'), {'q': 'ali'})
+        self.assertNotEqual(server_timing(response)['db']['desc'], '"0 queries"')
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0.001)
+    def test_slow_requests_are_logged_with_their_sql(self):
+        with self.assertLogs('phone_book.requests', 'WARNING') as logs:
+            self.client.get(reverse('phonebook-lookup'), {'number': '555-0100'})
+        self.assertIn('Slow request', logs.output[0])
+        self.assertIn('phone_book_phonebook', logs.output[0])
+        self.assertNotIn('5550100', logs.output[0])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ListPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        PhoneBook.objects.bulk_create(
+            PhoneBook(name=f'Contact {i:03d}', phone_number=f'555-{i:04d}') for i in range(45)
+        )
+        cls.url = reverse('phonebook-list')
+
+    def test_keyset_pages_walk_forward_and_back(self):
+        seen, cursor, pages = [], None, []
+        while True:
+            params = {'cursor': cursor} if cursor else {}
+            with CaptureQueriesContext(connection) as queries:
+                page = self.client.get(self.url, params).context['page_obj']
+            self.assertFalse(any('COUNT(' in q['sql'] for q in queries))
+            seen += [c.name for c in page]
+            pages.append(page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, sorted(PhoneBook.objects.values_list('name', flat=True)))
+        self.assertEqual([len(p) for p in pages], [20, 20, 5])
+        back = self.client.get(self.url, {'cursor': pages[-1].previous_cursor}).context['page_obj']
+        self.assertEqual(list(back), list(pages[1]))
+        self.assertTrue(back.has_previous())
+
+    def test_page_number_links_keep_working(self):
+        response = self.client.get(self.url, {'page': 2})
+        self.assertEqual(response.context['page_obj'].number, 2)
+        self.assertEqual(list(response.context['page_window']), [1, 2, 3])
+        self.assertEqual(response.context['contacts'][0].name, 'Contact 020')
+
+    def test_invalid_cursor_is_404(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'not-a-cursor'}).status_code, 404)
+        # Well-formed cursors whose values do not fit the ordering fields.
+        for values in (['x', 'abc'], ['x', {}], [None, 1]):
+            cursor = encode_cursor(values, 'next')
+            self.assertEqual(self.client.get(self.url, {'cursor': cursor}).status_code, 404, values)
+
+    def test_searches_go_through_the_single_flight_group(self):
+        flight = PhoneBookListView.search_flight
+        before = flight.stats()['executions']
+        response = self.client.get(self.url, {'q': 'Contact', 'page': 2})
+        page = response.context['page_obj']
+        self.assertEqual((page.paginator.count, page.number, len(page.object_list)), (45, 2, 20))
+        self.assertIsInstance(page.object_list, list)
+        # One shared count and one shared page fetch.
+        self.assertEqual(flight.stats()['executions'] - before, 2)
+
+    def test_searches_share_queries_only_for_the_same_string(self):
+        keys = set()
+        for query in ('contact 1', ' contact 1 ', 'contact  1', 'Contact 1'):
+            response = self.client.get(self.url, {'q': query})
+            keys.add(response.context['paginator'].key)
+        self.assertEqual(len(keys), 3)
+
+
+CSV_SOURCE = b"""name,phone,email
+Alice Johnson,+1 555 010 0100,alice@example.com
+Bob Stone,+1 555 010 0101,
+Bad Row,,not-an-email
+"""
+
+VCARD_SOURCE = b"""BEGIN:VCARD
+VERSION:3.0
+N:Johnson;Alice;;;
+TEL;TYPE=CELL:+1 555 010 0100
+EMAIL:alice@example.com
+END:VCARD
+BEGIN:VCARD
+VERSION:3.0
+FN:Carol
+  King
+item1.TEL:+1 555 010 0199
+END:VCARD
+"""
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        PhoneBook.objects.create(name='Alice', phone_number='555-0100')
+
+    def assert_revalidates(self, url, params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        etag = response['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(any('phone_book_phonebook' in q['sql'] for q in queries))
+        self.assertTemplateNotUsed(response, 'phone_book/list.html')
+
+        other = self.client.get(url, {**params, 'x': '1'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(other.status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            PhoneBook.objects.create(name='Bob', phone_number='555-0101')
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_view(self):
+        self.assert_revalidates(reverse('phonebook-list'), {})
+
+    def test_suggestions(self):
+        self.assert_revalidates(reverse('phonebook-search-suggestions'), {'q': 'al'})
+
+    def test_if_modified_since(self):
+        url = reverse('phonebook-list')
+        last_modified = self.client.get(url)['Last-Modified']
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RowFragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = PhoneBook.objects.create(name='Alice', phone_number='555-0100')
+        self.url = reverse('phonebook-list')
+
+    def test_rows_are_rendered_once_and_shared(self):
+        response = self.client.get(self.url)
+        self.assertTemplateUsed(response, 'phone_book/_contact_row.html')
+        self.assertIsNotNone(cache.get(row_cache_key(self.alice)))
+        self.client.force_login(User.objects.create_user('viewer', password='secret'))
+        response = self.client.get(self.url)
+        self.assertTemplateNotUsed(response, 'phone_book/_contact_row.html')
+        self.assertContains(response, 'Alice')
+
+    def test_edit_and_delete_invalidate_rows(self):
+        self.client.get(self.url)
+        self.client.post(reverse('phonebook-edit', args=[self.alice.pk]), {
+            'name': 'Alicia', 'phone_number': '555-0100', 'email': '',
+        })
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Alicia')
+        self.assertNotContains(response, '>Alice<')
+
+        self.alice.refresh_from_db()
+        self.assertIsNotNone(cache.get(row_cache_key(self.alice)))
+        self.client.post(reverse('phonebook-delete', args=[self.alice.pk]))
+        self.assertIsNone(cache.get(row_cache_key(self.alice)))
+        self.assertContains(self.client.get(self.url), 'No contacts found.')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ContactImportTests(TestCase):
+    def run_import(self, format_name, source, **kwargs):
+        importer = ContactImporter(**kwargs)
+        return importer.run(parse(format_name, decode_lines(io.BytesIO(source))))
+
+    def test_csv_import_validates_rows(self):
+        result = self.run_import('csv', CSV_SOURCE)
+        self.assertEqual((result.created, result.rejected), (2, 1))
+        self.assertEqual(result.errors[0]['line'], 4)
+        bob = PhoneBook.objects.get(name='Bob Stone')
+        self.assertIsNone(bob.email)
+        self.assertEqual(bob.phone_number_normalized, '15550100101')
+
+    def test_vcard_and_ndjson_parsing(self):
+        self.run_import('vcard', VCARD_SOURCE)
+        self.assertEqual(
+            sorted(PhoneBook.objects.values_list('name', 'phone_number')),
+            [('Alice Johnson', '+1 555 010 0100'), ('Carol King', '+1 555 010 0199')],
+        )
+        result = self.run_import('ndjson', b'{"name": "Dan", "phone_number": "1"}\n\nnot json\n')
+        self.assertEqual((result.created, result.rejected), (1, 1))
+
+    def test_conflict_policies(self):
+        PhoneBook.objects.create(name='Alice Johnson', phone_number='000')
+        result = self.run_import('csv', CSV_SOURCE, policy='skip')
+        self.assertEqual((result.created, result.skipped), (1, 1))
+        self.assertEqual(PhoneBook.objects.get(name='Alice Johnson').phone_number, '000')
+
+        result = self.run_import('csv', CSV_SOURCE, policy='update')
+        self.assertEqual(result.updated, 2)
+        self.assertEqual(PhoneBook.objects.get(name='Alice Johnson').phone_number, '+1 555 010 0100')
+
+        with self.assertRaises(ContactImportError):
+            self.run_import('ndjson', b'{"name": "New", "phone": "1"}\n{"name": "Bob Stone", "phone": "2"}\n',
+                            policy='fail')
+        self.assertFalse(PhoneBook.objects.filter(name='New').exists())
+
+    def racing_import(self, policy):
+        """Import a file while a racing row, missed by the first lookup, holds line 2's phone."""
+        PhoneBook.objects.create(name='Racer', phone_number='+1 (555) 999-0000')
+        real_find = find_existing_contacts
+        calls = []
+
+        def find(contacts):
+            calls.append(1)
+            return {} if len(calls) == 1 else real_find(contacts)
+
+        source = b'{"name": "First", "phone": "1"}\n{"name": "Second", "phone": "+1 (555) 999-0000"}\n'
+        with mock.patch('phone_book.apps.phone_book.importers.find_existing_contacts', find):
+            return self.run_import('ndjson', source, policy=policy)
+
+    def test_skip_retries_a_batch_that_lost_a_race(self):
+        result = self.racing_import('skip')
+        self.assertEqual((result.created, result.skipped, result.rejected), (1, 1, 0))
+        self.assertEqual(PhoneBook.objects.count(), 2)
+
+    def test_race_under_other_policies_names_the_line(self):
+        for policy in ('update', 'fail'):
+            with self.assertRaises(ContactImportError) as caught:
+                self.racing_import(policy)
+            self.assertEqual(caught.exception.line, 2, policy)
+            self.assertIn('phone_number', str(caught.exception))
+            PhoneBook.objects.all().delete()
+
+    def test_queries_scale_with_batches_not_rows(self):
+        source = '\n'.join(
+            json.dumps({'name': f'Contact {i}', 'phone': f'555-{i:04d}'}) for i in range(50)
+        ).encode()
+        # Per batch: one conflict lookup and one INSERT, inside a savepoint.
+        with self.assertNumQueries(5 * 4):
+            result = self.run_import('ndjson', source, batch_size=10)
+        self.assertEqual(result.created, 50)
+
+    def test_import_endpoint(self):
+        url = reverse('phonebook-import')
+        upload = SimpleUploadedFile('contacts.csv', CSV_SOURCE, content_type='text/csv')
+        self.assertEqual(self.client.post(url, {'file': upload}).status_code, 401)
+        user = User.objects.create_user('importer', password='secret')
+        client = APIClient()
+        client.force_authenticate(user)
+        upload.seek(0)
+        response = client.post(url, {'file': upload, 'policy': 'skip'}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ImportJobTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Run tasks inline and keep their results in memory instead of Redis.
+        app = import_contacts_task.app
+        cls.celery_state = app.conf.CELERY_TASK_ALWAYS_EAGER, app.backend
+        app.conf.CELERY_TASK_ALWAYS_EAGER = True
+        app._backend = CacheBackend(app=app, backend='memory')
+        cls.import_dir = tempfile.TemporaryDirectory()
+
+    @classmethod
+    def tearDownClass(cls):
+        app = import_contacts_task.app
+        app.conf.CELERY_TASK_ALWAYS_EAGER, app._backend = cls.celery_state
+        cls.import_dir.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('importer', password='secret'))
+
+    def test_task_reports_progress_per_batch(self):
+        path = os.path.join(self.import_dir.name, 'contacts.ndjson')
+        with open(path, 'wb') as handle:
+            handle.write(b'\n'.join(b'{"name": "C%d", "phone": "%d"}' % (i, i) for i in range(5)))
+        updates = []
+        with self.settings(PHONEBOOK_IMPORT_BATCH_SIZE=2):
+            original = import_contacts_task.update_state
+            import_contacts_task.update_state = lambda *args, **kwargs: updates.append(kwargs)
+            try:
+                result = import_contacts_task.apply(args=(path, 'ndjson')).get()
+            finally:
+                import_contacts_task.update_state = original
+        self.assertEqual([update['meta']['rows_done'] for update in updates], [2, 4, 5])
+        self.assertEqual(updates[0]['state'], 'PROGRESS')
+        self.assertEqual(result['created'], 5)
+        self.assertFalse(os.path.exists(path))
+
+    def test_submit_and_poll_job(self):
+        upload = SimpleUploadedFile('contacts.csv', CSV_SOURCE, content_type='text/csv')
+        with self.settings(PHONEBOOK_IMPORT_DIR=self.import_dir.name):
+            response = self.client.post(reverse('phonebook-import-jobs'), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(os.listdir(self.import_dir.name), [])
+
+        status = self.client.get(reverse('phonebook-import-job', args=[response.data['job_id']]))
+        self.assertEqual(status.data['state'], 'SUCCESS')
+        self.assertEqual(status.data['result']['created'], 2)
+        self.assertEqual(status.data['result']['rows_rejected'], 1)
+
+    def test_status_is_only_visible_to_the_submitter(self):
+        upload = SimpleUploadedFile('contacts.csv', CSV_SOURCE, content_type='text/csv')
+        with self.settings(PHONEBOOK_IMPORT_DIR=self.import_dir.name):
+            response = self.client.post(reverse('phonebook-import-jobs'), {'file': upload}, format='multipart')
+        job_id = response.data['job_id']
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user('other', password='secret'))
+        self.assertEqual(other.get(reverse('phonebook-import-job', args=[job_id])).status_code, 404)
+        # Task ids that are not import jobs are not exposed either.
+        task = import_contacts_task.apply(args=('/missing.csv', 'csv'))
+        self.assertEqual(self.client.get(reverse('phonebook-import-job', args=[task.id])).status_code, 404)
+
+    def test_submit_rejects_unknown_policy(self):
+        upload = SimpleUploadedFile('contacts.csv', CSV_SOURCE, content_type='text/csv')
+        response = self.client.post(
+            reverse('phonebook-import-jobs'), {'file': upload, 'policy': 'merge'}, format='multipart',
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PhoneBookAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('api', password='secret'))
+        self.url = reverse('phonebook-api-list')
+        self.bulk_url = reverse('phonebook-api-bulk')
+
+    def payload(self, count, start=0):
+        return [{'name': f'Contact {i}', 'phone_number': f'555-{i:04d}'} for i in range(start, start + count)]
+
+    def test_list_filters_and_paginates(self):
+        PhoneBook.objects.create(name='Alice', phone_number='+1 (555) 010-0100', email='alice@example.com')
+        PhoneBook.objects.create(name='Bob', phone_number='555 0101')
+        response = self.client.get(self.url, {'phone_number': '1-555-010-0100'})
+        data = json.loads(response.content)['response_data']
+        self.assertEqual([row['name'] for row in data['results']], ['Alice'])
+        response = self.client.get(self.url, {'has_email': 'false', 'search': 'bo'})
+        self.assertEqual([row['name'] for row in json.loads(response.content)['response_data']['results']], ['Bob'])
+
+    def test_bulk_create_uses_constant_queries(self):
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.client.post(self.bulk_url, self.payload(2), format='json').status_code, 201)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post(self.bulk_url, self.payload(40, start=2), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(PhoneBook.objects.count(), 42)
+        self.assertEqual(PhoneBook.objects.get(name='Contact 7').phone_number_normalized, '5550007')
+
+    def test_bulk_create_rejects_conflicts(self):
+        PhoneBook.objects.create(name='Contact 0', phone_number='000')
+        payload = self.payload(2) + [{'name': 'Other', 'phone_number': '555-0001'}]
+        response = self.client.post(self.bulk_url, payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([sorted(errors) for errors in response.data], [['name'], [], ['phone_number']])
+        self.assertEqual(PhoneBook.objects.count(), 1)
+
+    def test_concurrent_conflict_names_the_field(self):
+        PhoneBook.objects.create(name='Racer', phone_number='555-0001')
+        real_find_conflicts = PhoneBookBulkListSerializer.find_conflicts
+        calls = []
+
+        def find_conflicts(serializer, contacts):
+            # Validation misses the row, as if it was committed just after.
+            calls.append(contacts)
+            if len(calls) == 1:
+                return [{} for _ in contacts]
+            return real_find_conflicts(serializer, contacts)
+
+        with mock.patch.object(PhoneBookBulkListSerializer, 'find_conflicts', find_conflicts):
+            response = self.client.post(self.bulk_url, self.payload(2), format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['errors'], [{}, {'phone_number': mock.ANY}])
+
+    def test_bulk_update_rejects_swapped_values(self):
+        first = PhoneBook.objects.create(name='A', phone_number='555-0001')
+        second = PhoneBook.objects.create(name='B', phone_number='555-0002')
+        payload = [{'id': first.pk, 'name': 'B'}, {'id': second.pk, 'name': 'A'}]
+        response = self.client.patch(self.bulk_url, payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([sorted(errors) for errors in response.data], [['name'], ['name']])
+        self.assertIn(f"Contact {second.pk} gives up", str(response.data[0]['name'][0]))
+        self.assertEqual(PhoneBook.objects.get(pk=first.pk).name, 'A')
+
+    def test_bulk_update_and_delete(self):
+        contacts = PhoneBook.objects.bulk_create(PhoneBook(**row) for row in self.payload(10))
+        payload = [{'id': contact.pk, 'phone_number': f'777-{contact.pk}'} for contact in contacts]
+        payload[0]['name'] = 'Renamed'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.bulk_url, payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(len(queries), 10)
+        renamed = PhoneBook.objects.get(pk=contacts[0].pk)
+        self.assertEqual((renamed.name, renamed.phone_number_normalized), ('Renamed', f'777{contacts[0].pk}'))
+
+        response = self.client.patch(self.bulk_url, [{'id': 0, 'name': 'Ghost'}], format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(
+            self.bulk_url, [{'id': contacts[2].pk, 'name': 'A'}, {'id': contacts[2].pk, 'name': 'B'}], format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[1]['id'], ["Appears more than once in this request."])
+
+        # Freed by the update above, so it may be taken now.
+        response = self.client.patch(self.bulk_url, [{'id': contacts[1].pk, 'name': 'Contact 0'}], format='json')
+        self.assertEqual(response.status_code, 200)
+
+        ids = [contact.pk for contact in contacts[:6]]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(self.bulk_url, {'ids': ids}, format='json')
+        self.assertEqual(response.data['deleted'], 6)
+        self.assertLess(len(queries), 10)
+        self.assertEqual(PhoneBook.objects.count(), 4)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ContactExportTests(TestCase):
+    def setUp(self):
+        PhoneBook.objects.create(name='Alice, Jr.', phone_number='555-0100', email='alice@example.com')
+        PhoneBook.objects.create(name='Bob', phone_number='555-0101')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('exporter'))
+        self.url = reverse('phonebook-export')
+
+    def export(self, format_name):
+        response = self.client.get(self.url, {'format': format_name})
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_formats_round_trip_through_the_importer(self):
+        for format_name in ('csv', 'vcard', 'ndjson'):
+            response, body = self.export(format_name)
+            self.assertIn('contacts.', response['Content-Disposition'])
+            rows = [(r.data['name'], r.data['phone_number'], r.data.get('email') or None)
+                    for r in parse(format_name, decode_lines(io.BytesIO(body)))]
+            self.assertEqual(rows, [('Alice, Jr.', '555-0100', 'alice@example.com'), ('Bob', '555-0101', None)])
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.get(self.url, {'format': 'xml'}).status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BenchmarkCommandTests(TestCase):
+    def test_reports_every_scenario_and_cleans_up(self):
+        out, err = io.StringIO(), io.StringIO()
+        call_command(
+            'bench_phonebook', contacts='30', requests=4, concurrency=1, warmup=1, stdout=out, stderr=err,
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(set(report['scenarios']), {'list', 'search', 'suggest', 'create', 'delete'})
+        for name, result in report['scenarios'].items():
+            self.assertEqual((result['requests'], result['errors']), (4, 0), name)
+            self.assertLessEqual(result['latency_ms']['p50'], result['latency_ms']['p99'])
+        self.assertEqual(report['meta']['contacts'], 30)
+        # Only the seeded contacts remain; created and deleted rows are gone.
+        self.assertEqual(PhoneBook.objects.count(), 30)
+
+    def test_tops_up_with_another_seed(self):
+        seed_contacts(20, seed=0)
+        out = io.StringIO()
+        call_command(
+            'bench_phonebook', contacts='30', scenarios='search', requests=2, concurrency=1, warmup=0,
+            seed=1, search_seed=5, stdout=out, stderr=io.StringIO(),
+        )
+        self.assertEqual(json.loads(out.getvalue())['meta']['search_seed'], 5)
+        self.assertEqual((seeded_count(0), seeded_count(1)), (20, 10))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ContactSeedingTests(TestCase):
+    def test_rows_are_deterministic_and_unique(self):
+        first, again = ContactGenerator(seed=7), ContactGenerator(seed=7)
+        rows = first.batch(0, 5000)
+        self.assertEqual(rows[1234], again.batch(1234, 1235)[0])
+        self.assertNotEqual(rows[:10], ContactGenerator(seed=8).batch(0, 10))
+        for column in range(4):
+            self.assertEqual(len({row[column] for row in rows}), len(rows))
+        for name, phone, normalized, email in rows[:50]:
+            self.assertEqual(normalize_phone_number(phone), normalized)
+
+    def test_seeds_never_collide(self):
+        # Seed 1's second stretch of rows once reused seed 0's names.
+        rows = ContactGenerator(seed=0).batch(0, 20000)
+        others = ContactGenerator(seed=1).batch(60000, 80000) + ContactGenerator(seed=99).batch(0, 20000)
+        for column in range(4):
+            self.assertFalse({row[column] for row in rows} & {row[column] for row in others})
+        with self.assertRaises(ValueError):
+            ContactGenerator(seed=100)
+
+    def test_seeds_continue_independently(self):
+        self.assertEqual(seed_contacts(200, seed=0), 200)
+        self.assertEqual(seed_contacts(300, seed=1), 300)
+        self.assertEqual(seed_contacts(50, seed=0), 50)
+        self.assertEqual((next_seed_index(0), next_seed_index(1), next_seed_index(2)), (250, 300, 0))
+        self.assertEqual(PhoneBook.objects.count(), 550)
+
+    def test_runs_continue_after_the_highest_seeded_index(self):
+        seed_contacts(300, seed=4, batch_size=128)
+        generated = ContactGenerator(seed=4).batch(0, 300)
+        PhoneBook.objects.filter(email__in=[row[3] for row in generated[100:120]]).delete()
+        self.assertEqual(next_seed_index(4), 300)
+        self.assertEqual(seed_contacts(50, seed=4), 50)
+        self.assertEqual(PhoneBook.objects.count(), 330)
+        self.assertEqual(next_seed_index(4), 350)
+
+    def test_runs_continue_where_the_last_one_stopped(self):
+        self.assertEqual(seed_contacts(300, seed=3, batch_size=128), 300)
+        self.assertEqual(seed_contacts(200, seed=3, method='orm'), 200)
+        self.assertEqual(PhoneBook.objects.count(), 500)
+        stored = set(PhoneBook.objects.values_list('name', 'phone_number', 'phone_number_normalized', 'email'))
+        self.assertEqual(stored, set(ContactGenerator(seed=3).batch(0, 500)))
+        contact = PhoneBook.objects.order_by('id').first()
+        self.assertIn(contact, search_contacts(PhoneBook.objects.all(), contact.name.split()[0]))
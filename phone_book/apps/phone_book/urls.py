@@ -1,12 +1,23 @@
 from django.urls import path
+from rest_framework.routers import SimpleRouter
 from .views import (
-    PhoneBookListView, PhoneBookCreateView, PhoneBookUpdateView, PhoneBookDeleteView, PhoneBookSearchSuggestionsView
+    PhoneBookListView, PhoneBookCreateView, PhoneBookUpdateView, PhoneBookDeleteView, PhoneBookSearchSuggestionsView,
+    PhoneBookLookupView, PhoneBookImportView, PhoneBookExportView, PhoneBookImportJobView,
+    PhoneBookImportJobStatusView, PhoneBookViewSet
 )
 
+router = SimpleRouter()
+router.register('v1', PhoneBookViewSet, basename='phonebook-api')
+
 urlpatterns = [
     path('', PhoneBookListView.as_view(), name='phonebook-list'),
     path('add/', PhoneBookCreateView.as_view(), name='phonebook-add'),
     path('edit/<int:pk>/', PhoneBookUpdateView.as_view(), name='phonebook-edit'),
     path('delete/<int:pk>/', PhoneBookDeleteView.as_view(), name='phonebook-delete'),
     path('search-suggestions/', PhoneBookSearchSuggestionsView.as_view(), name='phonebook-search-suggestions'),
-]
+    path('lookup/', PhoneBookLookupView.as_view(), name='phonebook-lookup'),
+    path('import/', PhoneBookImportView.as_view(), name='phonebook-import'),
+    path('import/jobs/', PhoneBookImportJobView.as_view(), name='phonebook-import-jobs'),
+    path('import/jobs/<str:job_id>/', PhoneBookImportJobStatusView.as_view(), name='phonebook-import-job'),
+    path('export/', PhoneBookExportView.as_view(), name='phonebook-export'),
+] + router.urls
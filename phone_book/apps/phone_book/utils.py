@@ -0,0 +1,32 @@
+from django.conf import settings
+
+ASCII_DIGITS = frozenset('0123456789')
+# Width of PhoneBook.phone_number_normalized
+MAX_NORMALIZED_LENGTH = 32
+
+
+def normalize_phone_number(value, default_country_code=None):
+    """
+    Reduce a free-text phone number to E.164-style digits (no leading '+').
+
+    "+1 (555) 010-2000", "001 555 010 2000" and, with a default country code
+    of "1", "555-010-2000" all normalize to "15550102000". Numbers written in
+    national format get their trunk '0' replaced by the default country code
+    when one is configured. The result is cut to ``MAX_NORMALIZED_LENGTH``
+    digits so it always fits the column.
+    """
+    if not value:
+        return ''
+    value = value.strip()
+    digits = ''.join(ch for ch in value if ch in ASCII_DIGITS)
+    if value.startswith('+'):
+        return digits[:MAX_NORMALIZED_LENGTH]
+    if digits.startswith('00'):
+        return digits[2:MAX_NORMALIZED_LENGTH + 2]
+    if default_country_code is None:
+        default_country_code = getattr(settings, 'PHONEBOOK_DEFAULT_COUNTRY_CODE', '')
+    if default_country_code and digits:
+        if digits.startswith('0'):
+            digits = digits[1:]
+        digits = f"{default_country_code}{digits}"
+    return digits[:MAX_NORMALIZED_LENGTH]
@@ -1,42 +1,195 @@
-from django.http import JsonResponse
-from django.db.models import Q
+import os
+import tempfile
+
+from asgiref.sync import sync_to_async
+from celery.result import AsyncResult
+from celery.utils import uuid
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
 from django.views import View
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from phone_book.apps.common.responses import EnvelopedJsonResponse
+from phone_book.apps.common.singleflight import SingleFlight
+from .cache import cache_get, cache_set, get_generation, normalize_query, suggestion_cache_key
+from .conditional import conditional_on_contacts
+from .debounce import LatestRequestGate, Superseded
+from .exporters import FORMATS as EXPORT_FORMATS, export_contacts
+from .importers import (
+	POLICIES, POLICY_SKIP, PARSERS, ContactImporter, ContactImportError, decode_lines, detect_format, parse,
+)
+from .search import search_contacts
+from .search_index import contact_search_index
+from .serializers import PhoneBookBulkDeleteSerializer, PhoneBookBulkSerializer, PhoneBookSerializer
+from .signals import batched_contact_notifications
+from .tasks import PROGRESS, get_job_owner, import_contacts_task, record_job_owner
+from .utils import normalize_phone_number
+
+@method_decorator(conditional_on_contacts, name='get')
 class PhoneBookSearchSuggestionsView(View):
+	"""
+	Async autocomplete endpoint.
+
+	Cache hits are answered at once. Misses are debounced per client
+	(``?client=`` or the session) and dropped with an empty 204 when a newer
+	keystroke from the same client supersedes them; in-flight queries are
+	cancelled, also when the client disconnects. Identical queries that
+	reach the database at the same time share one execution.
+	"""
+	limit = 10
+	gate = LatestRequestGate('phonebook:suggest-latest')
+	flight = SingleFlight('phonebook.suggestions')
+
+	async def get(self, request, *args, **kwargs):
+		query = normalize_query(request.GET.get('q', ''))
+		if not query:
+			return EnvelopedJsonResponse({'results': []})
+		cache_key = await sync_to_async(suggestion_cache_key)(query)
+		suggestions = await sync_to_async(cache_get)(cache_key) if cache_key else None
+		if suggestions is None:
+			try:
+				suggestions = await self.gate.run(
+					self.get_channel(request), self.get_debounce_delay(), self.flight.ado,
+					cache_key or query, self.get_suggestions, query,
+				)
+			except Superseded:
+				return HttpResponse(status=204)
+			if cache_key:
+				await sync_to_async(cache_set)(cache_key, suggestions)
+		return EnvelopedJsonResponse({'results': suggestions})
+
+	def get_channel(self, request):
+		"""Identify the tab or session whose older requests a new one replaces."""
+		client = request.GET.get('client', '')[:64]
+		return client or request.session.session_key
+
+	def get_debounce_delay(self):
+		return getattr(settings, 'PHONEBOOK_SUGGESTION_DEBOUNCE_MS', 100) / 1000
+
+	async def get_suggestions(self, query):
+		# Serve from the in-memory index when it is enabled and warm.
+		suggestions = contact_search_index.search(query, limit=self.limit)
+		if suggestions is not None:
+			return suggestions
+		# Resolving the search backend may inspect the schema once, synchronously.
+		qs = await sync_to_async(search_contacts)(PhoneBook.objects.all(), query)
+		return [
+			{
+				'id': contact.id,
+				'name': contact.name,
+				'phone_number': contact.phone_number,
+				'email': contact.email,
+			}
+			async for contact in qs.order_by('name')[:self.limit]
+		]
+
+class PhoneBookLookupView(View):
+	"""
+	Reverse lookup by phone number against the normalized, indexed column.
+
+	``?number=`` is normalized the same way stored numbers are; ``?match=prefix``
+	returns contacts whose number starts with it instead of an exact match.
+	"""
+	limit = 10
+
 	def get(self, request, *args, **kwargs):
-		query = request.GET.get('q', '').strip()
-		suggestions = []
-		if query:
+		number = normalize_phone_number(request.GET.get('number', ''))
+		if not number:
+			return EnvelopedJsonResponse({'detail': 'The number parameter must contain digits.'}, status=400)
+		match = request.GET.get('match', 'exact')
+		if match == 'exact':
+			qs = PhoneBook.objects.filter(phone_number_normalized=number)
+		elif match == 'prefix':
+			# A half-open range is a plain B-tree seek on every backend, unlike
+			# LIKE 'x%' which SQLite cannot serve from the index. ':' sorts right
+			# after '9', so it bounds every digit string starting with ``number``.
 			qs = PhoneBook.objects.filter(
-				Q(name__icontains=query) | Q(phone_number__icontains=query)
-			).order_by('name')[:10]
-			for contact in qs:
-				suggestions.append({
-					'id': contact.id,
-					'name': contact.name,
-					'phone_number': contact.phone_number,
-					'email': contact.email,
-				})
-		return JsonResponse({'results': suggestions})
-from django.urls import reverse_lazy
+				phone_number_normalized__gte=number,
+				phone_number_normalized__lt=f"{number}:",
+			)
+		else:
+			return EnvelopedJsonResponse({'detail': 'match must be "exact" or "prefix".'}, status=400)
+		results = list(
+			qs.order_by('phone_number_normalized', 'id')
+			.values('id', 'name', 'phone_number', 'email')[:self.limit]
+		)
+		return EnvelopedJsonResponse({'results': results})
+from django.http import Http404
+from django.urls import reverse, reverse_lazy
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
+from phone_book.apps.common.pagination import (
+	CoalescedPaginator, GenericPagination, InvalidCursor, KeysetPaginator, get_page_window,
+)
 from .models import PhoneBook
+from .filters import PhoneBookFilterSet
+from .fragments import render_contact_rows
 from .forms import PhoneBookForm
 
+@method_decorator(conditional_on_contacts, name='get')
 class PhoneBookListView(ListView):
 	model = PhoneBook
 	template_name = 'phone_book/list.html'
 	context_object_name = 'contacts'
 	paginate_by = 20
+	ordering = ('name', 'id')
+	page_window_radius = 4
+	search_flight = SingleFlight('phonebook.list-search')
+
+	def get_search_query(self):
+		return self.request.GET.get('q', '').strip()
 
 	def get_queryset(self):
 		queryset = super().get_queryset()
-		query = self.request.GET.get('q', '').strip()
+		query = self.get_search_query()
 		if query:
-			queryset = queryset.filter(
-				Q(name__icontains=query) | Q(phone_number__icontains=query)
-			)
+			queryset = search_contacts(queryset, query, ranked=True)
 		return queryset
 
+	def use_keyset_pagination(self):
+		"""
+		Browse with cursors unless the client asked for a page number (old
+		``?page=`` links) or is searching: relevance-ranked results have no
+		stable seek key, so searches keep numbered pages.
+		"""
+		return 'page' not in self.request.GET and not self.get_search_query()
+
+	def paginate_queryset(self, queryset, page_size):
+		if not self.use_keyset_pagination():
+			return super().paginate_queryset(queryset, page_size)
+		paginator = KeysetPaginator(queryset, page_size, ordering=self.ordering)
+		try:
+			page = paginator.page(self.request.GET.get('cursor'))
+		except InvalidCursor:
+			raise Http404('Invalid cursor.')
+		return (paginator, page, page.object_list, page.has_other_pages())
+
+	def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+		# Concurrent searches for the same page share the count and row queries.
+		# Keyed on the exact string searched for: normalize_query() would also
+		# collapse inner spaces, which the search keeps.
+		query = self.get_search_query()
+		if not query:
+			return super().get_paginator(queryset, per_page, orphans, allow_empty_first_page, **kwargs)
+		return CoalescedPaginator(
+			queryset, per_page, self.search_flight, f"{get_generation()}:{query!r}",
+			orphans=orphans, allow_empty_first_page=allow_empty_first_page, **kwargs
+		)
+
+	def get_context_data(self, **kwargs):
+		context = super().get_context_data(**kwargs)
+		context['contact_rows'] = render_contact_rows(context['contacts'])
+		page = context.get('page_obj')
+		if page is not None and not getattr(page, 'is_keyset', False):
+			context['page_window'] = get_page_window(page, self.page_window_radius)
+		return context
+
 class PhoneBookCreateView(CreateView):
 	model = PhoneBook
 	form_class = PhoneBookForm
@@ -54,3 +207,198 @@ class PhoneBookDeleteView(DeleteView):
 	template_name = 'phone_book/confirm_delete.html'
 	success_url = reverse_lazy('phonebook-list')
 	context_object_name = 'contact'
+
+class PhoneBookImportView(APIView):
+	"""
+	Stream an uploaded CSV, vCard or NDJSON file into the phone book.
+
+	Multipart fields: ``file``, and optionally ``format`` (inferred from the
+	file name otherwise), ``policy`` (skip, update or fail) and ``batch_size``.
+	"""
+	parser_classes = [MultiPartParser]
+	max_batch_size = 10000
+
+	def post(self, request, *args, **kwargs):
+		upload = request.FILES.get('file')
+		if upload is None:
+			return Response({'detail': 'Upload a file in the "file" field.'}, status=status.HTTP_400_BAD_REQUEST)
+		format_name = request.data.get('format') or detect_format(upload.name)
+		if format_name is None:
+			return Response({'detail': 'Could not infer the format; pass "format".'}, status=status.HTTP_400_BAD_REQUEST)
+		try:
+			batch_size = min(int(request.data.get('batch_size') or 0), self.max_batch_size) or None
+		except ValueError:
+			return Response({'detail': 'batch_size must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+		try:
+			importer = ContactImporter(policy=request.data.get('policy') or POLICY_SKIP, batch_size=batch_size)
+			result = importer.run(parse(format_name, decode_lines(upload)))
+		except ContactImportError as exc:
+			if exc.line is None:
+				return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+			return Response({'detail': str(exc), 'line': exc.line}, status=status.HTTP_409_CONFLICT)
+		return Response(result.as_dict())
+
+class ExportContentNegotiation(DefaultContentNegotiation):
+	"""
+	Always pick the first renderer (used for error responses only): on the
+	export view ``?format=`` selects the export format, not a DRF renderer.
+	"""
+
+	def select_renderer(self, request, renderers, format_suffix=None):
+		return (renderers[0], renderers[0].media_type)
+
+class PhoneBookExportView(APIView):
+	"""
+	Stream every contact as ``?format=csv`` (default), ``vcard`` or ``ndjson``.
+	"""
+	content_negotiation_class = ExportContentNegotiation
+
+	def get(self, request, *args, **kwargs):
+		format_name = request.query_params.get('format', 'csv')
+		if format_name not in EXPORT_FORMATS:
+			return Response(
+				{'detail': f"format must be one of {', '.join(EXPORT_FORMATS)}."},
+				status=status.HTTP_400_BAD_REQUEST,
+			)
+		content_type, extension, _ = EXPORT_FORMATS[format_name]
+		response = StreamingHttpResponse(
+			export_contacts(PhoneBook.objects.order_by('name', 'id'), format_name),
+			content_type=content_type,
+		)
+		response['Content-Disposition'] = f'attachment; filename="contacts.{extension}"'
+		return response
+
+class PhoneBookImportJobView(APIView):
+	"""
+	Stage an uploaded file and import it asynchronously on a Celery worker.
+
+	Accepts the same multipart fields as ``PhoneBookImportView`` and answers
+	``202 Accepted`` with the job id and its status URL. Only the submitting
+	user can read that status.
+	"""
+	parser_classes = [MultiPartParser]
+
+	def post(self, request, *args, **kwargs):
+		upload = request.FILES.get('file')
+		if upload is None:
+			return Response({'detail': 'Upload a file in the "file" field.'}, status=status.HTTP_400_BAD_REQUEST)
+		format_name = request.data.get('format') or detect_format(upload.name)
+		if format_name not in PARSERS:
+			return Response({'detail': 'Could not infer the format; pass "format".'}, status=status.HTTP_400_BAD_REQUEST)
+		policy = request.data.get('policy') or POLICY_SKIP
+		if policy not in POLICIES:
+			return Response({'detail': f"policy must be one of {', '.join(POLICIES)}."}, status=status.HTTP_400_BAD_REQUEST)
+		try:
+			batch_size = min(int(request.data.get('batch_size') or 0), PhoneBookImportView.max_batch_size) or None
+		except ValueError:
+			return Response({'detail': 'batch_size must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+		job_id = uuid()
+		if not record_job_owner(job_id, request.user.pk):
+			return Response(
+				{'detail': 'Could not start the import; retry.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE
+			)
+		path = self.stage(upload)
+		job = import_contacts_task.apply_async(
+			(path, format_name), {'policy': policy, 'batch_size': batch_size}, task_id=job_id
+		)
+		return Response({
+			'job_id': job.id,
+			'status_url': request.build_absolute_uri(reverse('phonebook-import-job', args=[job.id])),
+		}, status=status.HTTP_202_ACCEPTED)
+
+	def stage(self, upload):
+		"""Copy the upload into PHONEBOOK_IMPORT_DIR, where workers can read it."""
+		directory = settings.PHONEBOOK_IMPORT_DIR
+		os.makedirs(directory, exist_ok=True)
+		fd, path = tempfile.mkstemp(dir=directory, suffix=os.path.splitext(upload.name)[1])
+		with os.fdopen(fd, 'wb') as handle:
+			for chunk in upload.chunks():
+				handle.write(chunk)
+		return path
+
+class PhoneBookImportJobStatusView(APIView):
+	"""
+	Report the state of an asynchronous import: rows done and rejected and
+	throughput while running, the import summary once it has finished.
+
+	Jobs that were not submitted through ``PhoneBookImportJobView`` by the
+	requesting user are reported as not found, like any other task id.
+	"""
+
+	def get(self, request, job_id, *args, **kwargs):
+		if get_job_owner(job_id) != request.user.pk:
+			return Response({'detail': 'No such import job.'}, status=status.HTTP_404_NOT_FOUND)
+		job = AsyncResult(job_id, app=import_contacts_task.app)
+		data = {'job_id': job_id, 'state': job.state}
+		if job.state == PROGRESS:
+			data['progress'] = job.info
+		elif job.successful():
+			data['result'] = job.result
+		elif job.failed():
+			data['error'] = str(job.result)
+		return Response(data)
+
+class PhoneBookViewSet(viewsets.ModelViewSet):
+	"""
+	JSON API for contacts.
+
+	``bulk/`` takes a list of contacts to create (POST) or partially update
+	(PATCH, each item carrying its ``id``), or ``{"ids": [...]}`` to delete
+	(DELETE). Each bulk call is one transaction whose query count does not
+	grow with the number of contacts.
+	"""
+	queryset = PhoneBook.objects.order_by('name', 'id')
+	serializer_class = PhoneBookSerializer
+	pagination_class = GenericPagination
+	filter_backends = [DjangoFilterBackend]
+	filterset_class = PhoneBookFilterSet
+	max_bulk_size = 1000
+
+	@action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+	def bulk(self, request, *args, **kwargs):
+		if request.method == 'DELETE':
+			return self.bulk_destroy(request)
+		if request.method == 'PATCH':
+			return self.bulk_update(request)
+		return self.bulk_create(request)
+
+	def get_bulk_serializer(self, *args, **kwargs):
+		return PhoneBookBulkSerializer(
+			*args, many=True, max_length=self.max_bulk_size, context=self.get_serializer_context(), **kwargs
+		)
+
+	def bulk_create(self, request):
+		serializer = self.get_bulk_serializer(data=request.data)
+		return self.bulk_save(serializer, status.HTTP_201_CREATED)
+
+	def bulk_update(self, request):
+		serializer = self.get_bulk_serializer(PhoneBook.objects.all(), data=request.data, partial=True)
+		return self.bulk_save(serializer, status.HTTP_200_OK)
+
+	def bulk_save(self, serializer, success_status):
+		try:
+			with transaction.atomic():
+				serializer.is_valid(raise_exception=True)
+				contacts = serializer.save()
+		except IntegrityError:
+			errors = serializer.concurrent_conflicts()
+			if not any(errors):
+				raise
+			return Response(
+				{'detail': 'Another request changed these contacts; retry.', 'errors': errors},
+				status=status.HTTP_409_CONFLICT,
+			)
+		return Response(PhoneBookSerializer(contacts, many=True).data, status=success_status)
+
+	def bulk_destroy(self, request):
+		serializer = PhoneBookBulkDeleteSerializer(data=request.data)
+		serializer.is_valid(raise_exception=True)
+		ids = serializer.validated_data['ids']
+		if len(ids) > self.max_bulk_size:
+			return Response(
+				{'detail': f"At most {self.max_bulk_size} contacts per request."}, status=status.HTTP_400_BAD_REQUEST
+			)
+		with transaction.atomic(), batched_contact_notifications():
+			deleted, _ = PhoneBook.objects.filter(pk__in=ids).delete()
+		return Response({'deleted': deleted})
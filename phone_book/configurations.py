@@ -49,6 +49,50 @@ STRIPE_WEBHOOK_SECRET = config('STRIPE_WEBHOOK_SECRET', default='')
 # Celery settings
 CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=False, cast=bool)
+
+# API response settings
+JSON_ENCODER = config('JSON_ENCODER', default='auto')
+
+# Phone book search settings
+SEARCH_BACKEND = config('SEARCH_BACKEND', default='auto')
+PHONEBOOK_SEARCH_INDEX = config('PHONEBOOK_SEARCH_INDEX', default=False, cast=bool)
+PHONEBOOK_SEARCH_INDEX_TTL = config('PHONEBOOK_SEARCH_INDEX_TTL', default=300, cast=int)
+PHONEBOOK_SUGGESTION_CACHE_TIMEOUT = config('PHONEBOOK_SUGGESTION_CACHE_TIMEOUT', default=60, cast=int)
+PHONEBOOK_SUGGESTION_DEBOUNCE_MS = config('PHONEBOOK_SUGGESTION_DEBOUNCE_MS', default=100, cast=int)
+PHONEBOOK_DEFAULT_COUNTRY_CODE = config('PHONEBOOK_DEFAULT_COUNTRY_CODE', default='')
+PHONEBOOK_IMPORT_BATCH_SIZE = config('PHONEBOOK_IMPORT_BATCH_SIZE', default=1000, cast=int)
+PHONEBOOK_EXPORT_CHUNK_SIZE = config('PHONEBOOK_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+PHONEBOOK_IMPORT_DIR = config('PHONEBOOK_IMPORT_DIR', default='')
+PHONEBOOK_IMPORT_JOB_TTL = config('PHONEBOOK_IMPORT_JOB_TTL', default=86400, cast=int)
+PHONEBOOK_ROW_CACHE_TIMEOUT = config('PHONEBOOK_ROW_CACHE_TIMEOUT', default=3600, cast=int)
+
+# API pagination settings
+PAGINATION_COUNT_STRATEGY = config('PAGINATION_COUNT_STRATEGY', default='exact')
+PAGINATION_COUNT_CACHE_TIMEOUT = config('PAGINATION_COUNT_CACHE_TIMEOUT', default=60, cast=int)
+
+# Query coalescing settings
+SINGLEFLIGHT_DISTRIBUTED = config('SINGLEFLIGHT_DISTRIBUTED', default=False, cast=bool)
+SINGLEFLIGHT_WAIT_TIMEOUT_MS = config('SINGLEFLIGHT_WAIT_TIMEOUT_MS', default=2000, cast=int)
+
+# Request instrumentation settings
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', default=True, cast=bool)
+SLOW_REQUEST_THRESHOLD_MS = config('SLOW_REQUEST_THRESHOLD_MS', default=500, cast=int)
+REQUEST_TEMPLATE_TIMING = config('REQUEST_TEMPLATE_TIMING', default=True, cast=bool)
+REQUEST_LOG_LEVEL = config('REQUEST_LOG_LEVEL', default='WARNING')
+
+# Metrics settings
+METRICS_MULTIPROC_DIR = config('METRICS_MULTIPROC_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=float)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Common settings registry
+COMMON_SETTINGS_CHECK_INTERVAL = config('COMMON_SETTINGS_CHECK_INTERVAL', default=1.0, cast=float)
+COMMON_SETTINGS_POLL_INTERVAL = config('COMMON_SETTINGS_POLL_INTERVAL', default=30.0, cast=float)
+
+# Permission and authentication caches
+PERMISSION_CACHE_TIMEOUT = config('PERMISSION_CACHE_TIMEOUT', default=300, cast=int)
+JWT_USER_CACHE_TIMEOUT = config('JWT_USER_CACHE_TIMEOUT', default=300, cast=int)
 
 # Security settings
 SECURE_SSL_REDIRECT = config('SECURE_SSL_REDIRECT', default=False, cast=bool)
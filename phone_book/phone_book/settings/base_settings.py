@@ -47,6 +47,34 @@ from phone_book.configurations import (
     STRIPE_WEBHOOK_SECRET,
     CELERY_BROKER_URL,
     CELERY_RESULT_BACKEND,
+    CELERY_TASK_ALWAYS_EAGER,
+    JSON_ENCODER,
+    SEARCH_BACKEND,
+    PHONEBOOK_SEARCH_INDEX,
+    PHONEBOOK_SEARCH_INDEX_TTL,
+    PHONEBOOK_SUGGESTION_CACHE_TIMEOUT,
+    PHONEBOOK_SUGGESTION_DEBOUNCE_MS,
+    PHONEBOOK_DEFAULT_COUNTRY_CODE,
+    PHONEBOOK_IMPORT_BATCH_SIZE,
+    PHONEBOOK_EXPORT_CHUNK_SIZE,
+    PHONEBOOK_IMPORT_DIR,
+    PHONEBOOK_IMPORT_JOB_TTL,
+    PHONEBOOK_ROW_CACHE_TIMEOUT,
+    PAGINATION_COUNT_STRATEGY,
+    PAGINATION_COUNT_CACHE_TIMEOUT,
+    SINGLEFLIGHT_DISTRIBUTED,
+    SINGLEFLIGHT_WAIT_TIMEOUT_MS,
+    SERVER_TIMING_HEADER,
+    SLOW_REQUEST_THRESHOLD_MS,
+    REQUEST_TEMPLATE_TIMING,
+    REQUEST_LOG_LEVEL,
+    METRICS_MULTIPROC_DIR,
+    METRICS_FLUSH_INTERVAL,
+    METRICS_TOKEN,
+    COMMON_SETTINGS_CHECK_INTERVAL,
+    COMMON_SETTINGS_POLL_INTERVAL,
+    PERMISSION_CACHE_TIMEOUT,
+    JWT_USER_CACHE_TIMEOUT,
     LOG_LEVEL
 )
 
@@ -131,6 +159,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'middlewares.instrumentation_middleware.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
@@ -162,8 +191,14 @@ SPECTACULAR_SETTINGS = {
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        # Builds the standard response envelope before serializing
+        'phone_book.apps.common.renderers.EnvelopeJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication serving the user from the cache
+        'phone_book.apps.common.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -177,6 +212,8 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
+    # Checks the refresh token blacklist through the cache
+    'TOKEN_REFRESH_SERIALIZER': 'phone_book.apps.common.tokens.CachedTokenRefreshSerializer',
 }
 
 ROOT_URLCONF = 'phone_book.phone_book.urls'
@@ -213,6 +250,11 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
+# Report STARTED while a task runs; with ALWAYS_EAGER (local development and
+# tests) tasks run inline but their results are still stored for polling
+CELERY_TASK_TRACK_STARTED = True
+CELERY_TASK_ALWAYS_EAGER = CELERY_TASK_ALWAYS_EAGER
+CELERY_TASK_STORE_EAGER_RESULT = True
 
 CACHES = {
     "default": {
@@ -224,6 +266,96 @@ CACHES = {
     }
 }
 
+# JSON implementation used for API responses: 'auto' picks orjson when it is
+# installed and the standard library otherwise
+JSON_ENCODER = JSON_ENCODER
+
+# Text search backend: 'auto' (pg_trgm on PostgreSQL, FTS5 on SQLite), 'orm',
+# or a dotted path to a phone_book.apps.common.search.SearchBackend subclass
+SEARCH_BACKEND = SEARCH_BACKEND
+
+# In-memory suggestion index (see phone_book.apps.phone_book.search_index)
+PHONEBOOK_SEARCH_INDEX = PHONEBOOK_SEARCH_INDEX
+PHONEBOOK_SEARCH_INDEX_TTL = PHONEBOOK_SEARCH_INDEX_TTL
+
+# Seconds a search-suggestion payload stays in the shared cache; entries are
+# also invalidated by generation whenever a contact is written
+PHONEBOOK_SUGGESTION_CACHE_TIMEOUT = PHONEBOOK_SUGGESTION_CACHE_TIMEOUT
+
+# Milliseconds a suggestion request from a known client waits before querying;
+# it is dropped if a newer request from the same client arrives meanwhile
+PHONEBOOK_SUGGESTION_DEBOUNCE_MS = PHONEBOOK_SUGGESTION_DEBOUNCE_MS
+
+# Country calling code (digits only, e.g. '1') assumed for numbers stored
+# without an international prefix when normalizing them for lookups
+PHONEBOOK_DEFAULT_COUNTRY_CODE = PHONEBOOK_DEFAULT_COUNTRY_CODE
+
+# Rows validated and written per batch by contact imports
+PHONEBOOK_IMPORT_BATCH_SIZE = PHONEBOOK_IMPORT_BATCH_SIZE
+
+# Rows fetched per server-side cursor round trip by contact exports
+PHONEBOOK_EXPORT_CHUNK_SIZE = PHONEBOOK_EXPORT_CHUNK_SIZE
+
+# Where uploads for asynchronous imports are staged; must be shared between
+# the web processes and the Celery workers
+PHONEBOOK_IMPORT_DIR = PHONEBOOK_IMPORT_DIR or os.path.join(PROJECT_ROOT, 'media', 'imports')
+
+# Seconds the owner of an asynchronous import is remembered; its status can
+# only be read by that user, and only for this long (Celery keeps results
+# for a day by default)
+PHONEBOOK_IMPORT_JOB_TTL = PHONEBOOK_IMPORT_JOB_TTL
+
+# Seconds a rendered contact row of the list page stays in the shared cache
+# (0 disables the fragment cache)
+PHONEBOOK_ROW_CACHE_TIMEOUT = PHONEBOOK_ROW_CACHE_TIMEOUT
+
+# How GenericPagination obtains total counts: 'exact', 'cached' (per filter
+# signature, for PAGINATION_COUNT_CACHE_TIMEOUT seconds), 'estimate'
+# (PostgreSQL planner statistics) or 'none'
+PAGINATION_COUNT_STRATEGY = PAGINATION_COUNT_STRATEGY
+PAGINATION_COUNT_CACHE_TIMEOUT = PAGINATION_COUNT_CACHE_TIMEOUT
+
+# Identical searches running at the same time share one query per process
+# (see phone_book.apps.common.singleflight). When distributed, worker
+# processes also coordinate through the shared cache, waiting up to
+# SINGLEFLIGHT_WAIT_TIMEOUT_MS for another worker's result
+SINGLEFLIGHT_DISTRIBUTED = SINGLEFLIGHT_DISTRIBUTED
+SINGLEFLIGHT_WAIT_TIMEOUT_MS = SINGLEFLIGHT_WAIT_TIMEOUT_MS
+
+# Per-request query count, database, template and total time, sent as a
+# Server-Timing header (when SERVER_TIMING_HEADER is on) and logged on
+# 'phone_book.requests'. Requests slower than SLOW_REQUEST_THRESHOLD_MS are
+# logged with their SQL, without parameters (0 disables the slow-request log).
+# Every request is logged at INFO, so REQUEST_LOG_LEVEL=INFO turns on the full
+# per-request log. REQUEST_TEMPLATE_TIMING=False leaves Template.render
+# unpatched and reports no template time
+SERVER_TIMING_HEADER = SERVER_TIMING_HEADER
+SLOW_REQUEST_THRESHOLD_MS = SLOW_REQUEST_THRESHOLD_MS
+REQUEST_TEMPLATE_TIMING = REQUEST_TEMPLATE_TIMING
+
+# Prometheus metrics at /api/common/metrics/. With several worker processes,
+# point METRICS_MULTIPROC_DIR at a directory they share: each writes its
+# totals there every METRICS_FLUSH_INTERVAL seconds and a scrape adds them up.
+# METRICS_TOKEN, when set, is required as a bearer token to scrape
+METRICS_MULTIPROC_DIR = METRICS_MULTIPROC_DIR
+METRICS_FLUSH_INTERVAL = METRICS_FLUSH_INTERVAL
+METRICS_TOKEN = METRICS_TOKEN
+
+# CommonSettings are served from a per-process snapshot (see
+# phone_book.apps.common.settings_registry). Workers check the shared version
+# key every COMMON_SETTINGS_CHECK_INTERVAL seconds; without a cache they
+# reload every COMMON_SETTINGS_POLL_INTERVAL seconds
+COMMON_SETTINGS_CHECK_INTERVAL = COMMON_SETTINGS_CHECK_INTERVAL
+COMMON_SETTINGS_POLL_INTERVAL = COMMON_SETTINGS_POLL_INTERVAL
+
+# Seconds a user's resolved groups and permissions stay in the shared cache
+# (see phone_book.apps.common.permission_cache); changes invalidate them sooner
+PERMISSION_CACHE_TIMEOUT = PERMISSION_CACHE_TIMEOUT
+
+# Seconds CachedJWTAuthentication keeps a token's user in the shared cache;
+# saving or deleting the user invalidates it sooner
+JWT_USER_CACHE_TIMEOUT = JWT_USER_CACHE_TIMEOUT
+
 # Stripe Configuration
 STRIPE_SECRET_KEY = STRIPE_SECRET_KEY
 STRIPE_PUBLISHABLE_KEY = STRIPE_PUBLISHABLE_KEY
@@ -328,5 +460,10 @@ LOGGING = {
             'level': LOG_LEVEL,
             'propagate': False,
         },
+        'phone_book.requests': {
+            'handlers': ['console', 'file'],
+            'level': REQUEST_LOG_LEVEL,
+            'propagate': False,
+        },
     },
 }
@@ -28,6 +28,7 @@ urlpatterns = [
     path('', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),  # Serve redoc at root
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/phonebook/', include('phone_book.apps.phone_book.urls')),
+    path('api/common/', include('phone_book.apps.common.urls')),
 ]
 
 # Add a prefix for deployment (e.g., 'dev' or 'prod') if BASE_PREFIX is set